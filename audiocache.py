@@ -0,0 +1,197 @@
+import collections
+import hashlib
+import os
+import shutil
+import threading
+
+
+class AudioCache:
+    """Class handling on-disk cache of rendered audio files.
+        Files are addressed by hash of everything affecting rendering result
+        (text, audible parameters and renderer version) and the least
+        recently used ones are removed when cache size limit is exceeded.
+        Safe to use from many threads.
+    """
+
+    FILE_EXTENSION = '.mp3'
+
+    def __init__(self, cache_folder, max_size):
+        """Class initialization
+
+        Args:
+            cache_folder (str): Folder where audio files are stored
+            max_size (int): Maximal size of all cached files in bytes
+        """
+
+        self.cache_folder = os.path.normpath(cache_folder)
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        # key: audio key, value: file size (least recently used first)
+        self.entries = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_key(text, wpm, farns, pitch, renderer_version):
+        """Gets audio key out of rendering parameters.
+
+        Args:
+            text (bytes): Rendered text
+            wpm (int): Characters speed in words per minute
+            farns (int): Effective (Farnsworth) speed in words per minute
+            pitch (int): Tone frequency in Hz
+            renderer_version (str): Version of the renderer
+
+        Returns:
+            str: HEX representation of the key
+        """
+
+        # Farnsworth speed is not used when not lower than characters speed
+        if not 0 < farns < wpm:
+            farns = 0
+
+        hash_sha256 = hashlib.sha256()
+        hash_sha256.update('{}|{}|{}|{}|'.format(
+            wpm, farns, pitch, renderer_version).encode('utf-8'))
+        hash_sha256.update(text)
+
+        return hash_sha256.hexdigest()
+
+    def _get_entry_path(self, key):
+        return os.path.join(self.cache_folder, key + self.FILE_EXTENSION)
+
+    def _load_entries(self):
+        """Builds entries list out of cache folder content
+            (ordered by modification time, which is refreshed on every hit).
+            Called with lock held.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        self.entries = collections.OrderedDict()
+        self.size = 0
+
+        if os.path.isdir(self.cache_folder):
+            files = []
+            for entry in os.scandir(self.cache_folder):
+                if entry.is_file() and entry.name.endswith(self.FILE_EXTENSION):
+                    entry_stat = entry.stat()
+                    files.append((entry_stat.st_mtime_ns, entry.name[:-len(
+                        self.FILE_EXTENSION)], entry_stat.st_size))
+            for _mtime, key, size in sorted(files):
+                self.entries[key] = size
+                self.size += size
+
+    def _evict(self):
+        """Removes least recently used files until size limit is met.
+            Called with lock held.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        while self.entries and self.size > self.max_size:
+            key, size = self.entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            try:
+                os.remove(self._get_entry_path(key))
+            except OSError:
+                pass
+
+    def fetch(self, key, destination_path):
+        """Copies cached audio file to destination when available.
+
+        Args:
+            key (str): Audio key as returned by get_key()
+            destination_path (str): Path of the resulting file
+
+        Returns:
+            bool: True on cache hit, False otherwise
+        """
+
+        with self.lock:
+            if self.entries is None:
+                self._load_entries()
+
+            if key in self.entries:
+                entry_path = self._get_entry_path(key)
+                try:
+                    shutil.copyfile(entry_path, destination_path)
+                    os.utime(entry_path)
+                except OSError:
+                    # entry removed behind our back
+                    self.size -= self.entries.pop(key)
+                else:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True
+
+            self.misses += 1
+
+        return False
+
+    def store(self, key, source_path):
+        """Stores rendered audio file in the cache.
+
+        Args:
+            key (str): Audio key as returned by get_key()
+            source_path (str): Path of the rendered file
+
+        Returns:
+            bool: True when file was stored, False otherwise
+        """
+
+        with self.lock:
+            if self.entries is None:
+                self._load_entries()
+
+            entry_path = self._get_entry_path(key)
+            try:
+                if not os.path.exists(self.cache_folder):
+                    os.makedirs(self.cache_folder)
+                shutil.copyfile(source_path, entry_path + '_tmp')
+                os.replace(entry_path + '_tmp', entry_path)
+                size = os.path.getsize(entry_path)
+            except OSError:
+                return False
+
+            self.size += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            self._evict()
+
+        return True
+
+    def get_info(self):
+        """Gets cache statistics.
+
+        Args:
+            None
+
+        Returns:
+            dict: Dictionary
+                'hits' -> number of fetches served from the cache
+                'misses' -> number of fetches not found in the cache
+                'hit_rate' -> hits to all fetches ratio
+                'evictions' -> number of files removed due to size limit
+                'size' -> current size of all cached files in bytes
+                'max_size' -> maximal size of all cached files in bytes
+        """
+
+        with self.lock:
+            fetches = self.hits + self.misses
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'hit_rate': self.hits / fetches if fetches else 0.0,
+                    'evictions': self.evictions,
+                    'size': self.size,
+                    'max_size': self.max_size}
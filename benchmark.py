@@ -0,0 +1,1117 @@
+import cwaudio
+import cwgen
+import ebook2cw
+import helpers
+import argparse
+import collections
+import hashlib
+import http.server
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import string
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+
+
+def generate_dictionary_file(file_path, words_count, seed=0):
+    """Generates synthetic ispell-like dictionary file
+        (words with optional '/metadata' suffix).
+
+    Args:
+        file_path (str): Path to the resulting file
+        words_count (int): Number of words to generate
+        seed (int): Random generator seed
+
+    Returns:
+        None
+    """
+
+    rng = random.Random(seed)
+    letters = string.ascii_lowercase * 4 + string.digits + '?'
+    rare_letters = 'éüßÄ'
+    lengths = list(range(2, 15))
+    lengths_weights = [3, 8, 14, 16, 15, 13, 10, 8, 5, 3, 2, 2, 1]
+
+    with open(file_path, mode="w", encoding="ISO-8859-1") as dictionary:
+        for _ in range(words_count):
+            word_length = rng.choices(lengths, lengths_weights)[0]
+            word = ''.join(rng.choices(letters, k=word_length))
+            if rng.random() < 0.01:
+                word += rng.choice(rare_letters)
+            if rng.random() < 0.3:
+                word += '/' + ''.join(rng.choice(string.ascii_uppercase)
+                                      for _ in range(rng.randint(1, 4)))
+            dictionary.write(word + '\n')
+
+
+def get_index_words(index):
+    """Gets all words of the index (used as a reference for checks).
+
+    Args:
+        index (WordIndex): Words or phrases index
+
+    Returns:
+        dict: Dictionary (key, value)
+            key: bucket key (word length)
+            value: list of distinct words in the index order
+    """
+
+    return {key: list(index.select(key, 0)) for key in index.get_words_counts()}
+
+
+def get_words_filtered_counter(cw_gen, min_length, max_length, letters_set):
+    """Reference words filtering based on collections.Counter
+        (implementation used before characters masks were introduced)
+        returning distinct words in order of their first occurrence.
+
+    Args:
+        cw_gen (CwGen): Object with loaded dictionaries
+        min_length (int): Minimal words length
+        max_length (int): Maximal words length
+        letters_set (str): Id of the letters set
+
+    Returns:
+        dict: Same as CwGen.get_words_filtered()
+    """
+
+    words_filtered_dict = {}
+    letters = cw_gen.letters_sets[letters_set]['letters']
+    letters_set_counter = collections.Counter(letters.upper())
+
+    for word_len, words in get_index_words(cw_gen.word_index).items():
+        if word_len >= min_length and word_len <= max_length:
+            for word in words:
+                if letters[0] == '*':
+                    words_filtered_dict.setdefault(
+                        word_len, []).append(word)
+                    continue
+                word_counter = collections.Counter(word.upper())
+                expected_result = word_len - len(word_counter.keys())
+                distinct_letters_subtracted = word_counter - letters_set_counter
+                if sum(distinct_letters_subtracted.values()) == expected_result:
+                    words_filtered_dict.setdefault(
+                        word_len, []).append(word)
+
+    for word_len, words in words_filtered_dict.items():
+        words_filtered_dict[word_len] = list(dict.fromkeys(words))
+
+    return words_filtered_dict
+
+
+def benchmark_filtering(words_count):
+    """Compares words filtering across all letters sets
+        using Counter based reference and characters masks.
+
+    Args:
+        words_count (int): Size of the synthetic dictionary
+
+    Returns:
+        dict: Timings in seconds
+    """
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'dictionary.txt')
+        generate_dictionary_file(file_path, words_count)
+        cw_gen = cwgen.CwGen(
+            dictionary_cache_folder=os.path.join(temp_dir, 'cache'))
+        cw_gen.add_dictionary(file_path)
+
+    timings = {'counter': 0.0, 'mask': 0.0}
+    for letters_set in cw_gen.get_letters_sets():
+        start = time.perf_counter()
+        expected = get_words_filtered_counter(cw_gen, 0, 100, letters_set)
+        timings['counter'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = cw_gen.get_words_filtered(0, 100, letters_set)
+        timings['mask'] += time.perf_counter() - start
+
+        if result != expected:
+            raise AssertionError(
+                'Filtering mismatch for letters set ' + letters_set)
+
+    return timings
+
+
+def get_words_stat_recomputed(cw_gen):
+    """Reference words stat aggregation recomputed from stats of all dictionaries.
+
+    Args:
+        cw_gen (CwGen): Object with loaded dictionaries
+
+    Returns:
+        dict: Same as CwGen.get_words_stat()
+    """
+
+    aggregated_words_stat = {}
+    for dictionary in cw_gen.dictionary_list:
+        for word_length, words_count in dictionary['stat'].get('words_stat', {}).items():
+            aggregated_words_stat[word_length] = aggregated_words_stat.get(
+                word_length, 0) + words_count
+
+    words_info = {}
+    if aggregated_words_stat:
+        words_info['words_count'] = sum(aggregated_words_stat.values())
+        words_info['min_length'] = min(aggregated_words_stat)
+        words_info['max_length'] = max(aggregated_words_stat)
+        words_info['words_stat'] = aggregated_words_stat
+
+    return words_info
+
+
+def benchmark_stats(words_count, dictionaries_count=8, operations_count=40):
+    """Adds and removes dictionaries in random order verifying
+        the incrementally maintained words stat against full recomputation.
+
+    Args:
+        words_count (int): Size of each synthetic dictionary
+        dictionaries_count (int): Number of synthetic dictionaries
+        operations_count (int): Number of random add / remove operations
+
+    Returns:
+        dict: Timings in seconds of stat getters (incremental vs recomputed)
+    """
+
+    rng = random.Random(0)
+    timings = {'incremental': 0.0, 'recomputed': 0.0}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cw_gen = cwgen.CwGen(
+            dictionary_cache_folder=os.path.join(temp_dir, 'cache'))
+        files_paths = []
+        for index in range(dictionaries_count):
+            file_path = os.path.join(temp_dir, 'dictionary{}.txt'.format(index))
+            generate_dictionary_file(
+                file_path, rng.randint(1, words_count), seed=index)
+            files_paths.append(file_path)
+
+        for _ in range(operations_count):
+            loaded = cw_gen.get_dictionaries_info()
+            if loaded and rng.random() < 0.4:
+                cw_gen.remove_dictionary(rng.choice(loaded)['uuid'])
+            else:
+                cw_gen.add_dictionary(rng.choice(files_paths))
+
+            start = time.perf_counter()
+            words_info = cw_gen.get_words_stat()
+            cw_gen.get_dictionaries_info()
+            timings['incremental'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            expected = get_words_stat_recomputed(cw_gen)
+            timings['recomputed'] += time.perf_counter() - start
+
+            if words_info != expected:
+                raise AssertionError('Aggregated words stat mismatch')
+
+    return timings
+
+
+def benchmark_dictionary_changes(words_count, small_words_count=1000):
+    """Measures adding and removing a small dictionary while a large one
+        is loaded (the GUI does it on its event thread).
+
+    Args:
+        words_count (int): Size of the large synthetic dictionary
+        small_words_count (int): Size of the added and removed dictionary
+
+    Returns:
+        dict: Timings in seconds
+    """
+
+    timings = {}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        large_file_path = os.path.join(temp_dir, 'large.txt')
+        small_file_path = os.path.join(temp_dir, 'small.txt')
+        generate_dictionary_file(large_file_path, words_count, seed=1)
+        generate_dictionary_file(small_file_path, small_words_count, seed=2)
+        cw_gen = cwgen.CwGen(
+            dictionary_cache_folder=os.path.join(temp_dir, 'cache'))
+        cw_gen.add_dictionary(large_file_path)
+        words_stat = cw_gen.get_words_stat()
+        words_count = cw_gen.word_index.get_words_count()
+        dictionary = cw_gen.load_dictionary(small_file_path)
+
+        start = time.perf_counter()
+        cw_gen.add_loaded_dictionary(dictionary)
+        timings['add'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cw_gen.remove_dictionary(dictionary['uuid'])
+        timings['remove'] = time.perf_counter() - start
+
+        if cw_gen.get_words_stat() != words_stat or \
+                cw_gen.word_index.get_words_count() != words_count:
+            raise AssertionError('Index changed after adding and removing dictionary')
+
+    return timings
+
+
+def benchmark_stats_filtered(words_count, dictionaries_count=4, operations_count=12):
+    """Adds and removes overlapping dictionaries in random order verifying
+        count-only filtered words stat against stat of filtered words
+        for all letters sets and a few length ranges.
+
+    Args:
+        words_count (int): Size of each synthetic dictionary
+        dictionaries_count (int): Number of synthetic dictionaries
+        operations_count (int): Number of random add / remove operations
+
+    Returns:
+        dict: Timings in seconds of filtered stat getters (counted vs filtered)
+    """
+
+    rng = random.Random(0)
+    timings = {'counted': 0.0, 'filtered': 0.0}
+    lengths_ranges = [(0, 100), (2, 5), (6, 9), (12, 14)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cw_gen = cwgen.CwGen(
+            dictionary_cache_folder=os.path.join(temp_dir, 'cache'))
+        letters_sets = list(cw_gen.get_letters_sets())
+        files_paths = []
+        for index in range(dictionaries_count):
+            # dictionaries share their first words (same seed)
+            file_path = os.path.join(temp_dir, 'dictionary{}.txt'.format(index))
+            generate_dictionary_file(file_path, words_count * (index + 1) // dictionaries_count)
+            files_paths.append(file_path)
+
+        for _ in range(operations_count):
+            loaded = cw_gen.get_dictionaries_info()
+            if loaded and rng.random() < 0.4:
+                cw_gen.remove_dictionary(rng.choice(loaded)['uuid'])
+            else:
+                cw_gen.add_dictionary(rng.choice(files_paths))
+
+            for min_length, max_length in lengths_ranges:
+                for letters_set in letters_sets:
+                    start = time.perf_counter()
+                    words_stat = cw_gen.get_words_stat_filtered(
+                        min_length, max_length, letters_set, 'rand')
+                    timings['counted'] += time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    expected = cw_gen._get_words_stat(cw_gen._filter_words(
+                        min_length, max_length, letters_set))
+                    timings['filtered'] += time.perf_counter() - start
+
+                    if words_stat != expected:
+                        raise AssertionError('Filtered words stat mismatch for {} {}-{}'.format(
+                            letters_set, min_length, max_length))
+
+    return timings
+
+
+def benchmark_loading(words_count):
+    """Compares dictionary loading with empty (cold)
+        and populated (warm) compiled dictionary cache.
+
+    Args:
+        words_count (int): Size of the synthetic dictionary
+
+    Returns:
+        dict: Timings in seconds
+    """
+
+    timings = {}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'dictionary.txt')
+        cache_folder = os.path.join(temp_dir, 'cache')
+        generate_dictionary_file(file_path, words_count)
+
+        results = []
+        for run in ('cold', 'warm'):
+            cw_gen = cwgen.CwGen(dictionary_cache_folder=cache_folder)
+            start = time.perf_counter()
+            cw_gen.add_dictionary(file_path)
+            timings[run] = time.perf_counter() - start
+            results.append(get_index_words(cw_gen.word_index))
+
+        if results[0] != results[1]:
+            raise AssertionError('Cached dictionary mismatch')
+
+    return timings
+
+
+def generate_phrases_file(file_path, phrases_count, seed=0):
+    """Generates synthetic dictionary file of multi word phrases
+        ('%' lines) mixed with comments, empty and single word lines.
+
+    Args:
+        file_path (str): Path to the resulting file
+        phrases_count (int): Number of phrases to generate
+        seed (int): Random generator seed
+
+    Returns:
+        None
+    """
+
+    rng = random.Random(seed)
+    letters = string.ascii_lowercase * 4 + string.digits + '?'
+
+    with open(file_path, mode="w", encoding="ISO-8859-1") as dictionary:
+        for phrase_number in range(phrases_count):
+            phrase_words = [''.join(rng.choices(letters, k=rng.randint(1, 6)))
+                            for _ in range(rng.randint(2, 5))]
+            dictionary.write('%' + '  '.join(phrase_words) + '\n')
+            if phrase_number % 10 == 0:
+                dictionary.write('# comment\n\n' + phrase_words[0] + '\n')
+
+
+def benchmark_phrases(phrases_count):
+    """Measures loading of phrases dictionary with empty (cold) and
+        populated (warm) compiled dictionary cache and verifies phrases
+        filtering against a straightforward per phrase check.
+
+    Args:
+        phrases_count (int): Number of synthetic phrases
+
+    Returns:
+        dict: Timings in seconds and load report
+    """
+
+    timings = {}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'phrases.txt')
+        cache_folder = os.path.join(temp_dir, 'cache')
+        generate_phrases_file(file_path, phrases_count)
+
+        results = []
+        for run in ('cold', 'warm'):
+            cw_gen = cwgen.CwGen(dictionary_cache_folder=cache_folder)
+            start = time.perf_counter()
+            cw_gen.add_dictionary(file_path)
+            timings[run] = time.perf_counter() - start
+            results.append(get_index_words(cw_gen.phrase_index))
+
+        if results[0] != results[1]:
+            raise AssertionError('Cached phrases mismatch')
+        timings['report'] = cw_gen.get_dictionaries_info()[0]['report']
+
+        # reference filtering (spaces are not characters of the phrase)
+        with open(file_path, mode="r", encoding="ISO-8859-1") as dictionary:
+            phrases = set(' '.join(line[1:].split())
+                          for line in dictionary if line.startswith('%'))
+        start = time.perf_counter()
+        for letters_set_id, letters_set in cw_gen.get_letters_sets().items():
+            allowed = set(letters_set['letters'])
+            expected = set(phrase for phrase in phrases
+                           if 4 <= len(phrase.replace(' ', '')) <= 12
+                           and (letters_set['letters'][0] == '*' or set(phrase.replace(' ', '')) <= allowed))
+            filtered = set(phrase for bucket in cw_gen.get_phrases_filtered(
+                4, 12, letters_set_id).values() for phrase in bucket)
+            if filtered != expected:
+                raise AssertionError(
+                    'Phrases filtering mismatch for {}'.format(letters_set_id))
+        timings['filtering'] = time.perf_counter() - start
+
+    return timings
+
+
+def benchmark_parallel_loading(words_count, files_count=8):
+    """Compares serial and process pool loading of many dictionaries
+        (compiled dictionary cache is cold in both cases).
+
+    Args:
+        words_count (int): Size of each synthetic dictionary
+        files_count (int): Number of synthetic dictionaries
+
+    Returns:
+        dict: Timings in seconds and number of worker processes used
+    """
+
+    timings = {'workers': os.cpu_count() or 1}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files_paths = []
+        for index in range(files_count):
+            file_path = os.path.join(temp_dir, 'dictionary{}.txt'.format(index))
+            generate_dictionary_file(file_path, words_count, seed=index)
+            files_paths.append(file_path)
+
+        for run, max_workers in (('serial', 1), ('parallel', timings['workers'])):
+            cw_gen = cwgen.CwGen(
+                dictionary_cache_folder=os.path.join(temp_dir, run))
+            start = time.perf_counter()
+            report = cw_gen.add_dictionaries(files_paths, max_workers)
+            timings[run] = time.perf_counter() - start
+
+            if any(file_report['status'] != 'added' for file_report in report):
+                raise AssertionError('Dictionary not loaded')
+
+    return timings
+
+
+def benchmark_memory(words_count):
+    """Compares memory footprint of loaded dictionary data stored
+        as lists of str and as WordsBucket (words data + characters masks)
+        and measures the whole words index (buckets, dictionaries counts,
+        lookup tables and dictionaries positions).
+
+    Args:
+        words_count (int): Size of the synthetic dictionary
+
+    Returns:
+        dict: Sizes in bytes
+    """
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'dictionary.txt')
+        generate_dictionary_file(file_path, words_count)
+        cw_gen = cwgen.CwGen(
+            dictionary_cache_folder=os.path.join(temp_dir, 'cache'))
+        cw_gen.add_dictionary(file_path)
+
+    sizes = {'lists': 0, 'buckets': 0, 'index': cw_gen.word_index.get_size()}
+    for bucket in cw_gen.word_index.buckets.values():
+        words = list(bucket)
+        sizes['lists'] += sys.getsizeof(words) + \
+            sum(sys.getsizeof(word) for word in words) + \
+            sys.getsizeof(bucket.masks)
+        sizes['buckets'] += sys.getsizeof(bucket) + \
+            sys.getsizeof(bucket.data) + sys.getsizeof(bucket.masks)
+
+    return sizes
+
+
+def get_cpu_time():
+    """Gets CPU time of this process and its finished child processes"""
+
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def benchmark_synthesis(words_count, wpm=25, farns=0, pitch=600):
+    """Compares CW audio rendering throughput of ebook2cw subprocess
+        (when executable is present) and in-process synthesizer backends.
+
+    Args:
+        words_count (int): Number of rendered words
+        wpm (int): Characters speed in words per minute
+        farns (int): Effective (Farnsworth) speed in words per minute
+        pitch (int): Tone frequency in Hz
+
+    Returns:
+        dict: Seconds of audio rendered per CPU second by renderer name
+    """
+
+    rng = random.Random(0)
+    words = [''.join(rng.choice(string.ascii_lowercase + string.digits)
+                     for _ in range(rng.randint(2, 8))) for _ in range(words_count)]
+
+    throughputs = {}
+    audio_time = None
+    for backend, synthesizer_class in cwaudio.SYNTHESIZERS.items():
+        start = get_cpu_time()
+        synthesizer = synthesizer_class(wpm, farns, pitch)
+        pcm = synthesizer.render_text(words)
+        cpu_time = get_cpu_time() - start
+        if audio_time is None:
+            audio_time = len(pcm) / cwaudio.SAMPLE_WIDTH / synthesizer.sample_rate
+        elif len(pcm) / cwaudio.SAMPLE_WIDTH / synthesizer.sample_rate != audio_time:
+            raise AssertionError('{} backend audio length differs'.format(backend))
+        throughputs[backend] = audio_time / cpu_time
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cw_gen = cwgen.CwGen(dictionary_cache_folder=os.path.join(temp_dir, 'cache'),
+                             audio_cache_size=0)
+        if os.path.exists(cw_gen.e2cw.executable_local_path):
+            text_file_path = os.path.join(temp_dir, 'text.txt')
+            with open(text_file_path, mode='w', encoding='ISO-8859-1') as text_file:
+                text_file.write(' '.join(words) + '\n')
+            start = get_cpu_time()
+            if cw_gen.render_with_ebook2cw(text_file_path, os.path.join(temp_dir, 'text'), wpm, farns, pitch):
+                throughputs['ebook2cw'] = audio_time / \
+                    (get_cpu_time() - start)
+
+    return throughputs
+
+
+def benchmark_streaming(session_minutes=30, wpm=25, farns=0, pitch=600):
+    """Compares time to first audio of streamed session against
+        rendering whole session before playback.
+
+    Args:
+        session_minutes (int): Session length (words count is wpm * minutes)
+        wpm (int): Characters speed in words per minute
+        farns (int): Effective (Farnsworth) speed in words per minute
+        pitch (int): Tone frequency in Hz
+
+    Returns:
+        dict: Times in seconds
+    """
+
+    rng = random.Random(0)
+    words = [''.join(rng.choice(string.ascii_lowercase)
+                     for _ in range(5)) for _ in range(session_minutes * wpm)]
+
+    start = time.perf_counter()
+    cwaudio.PcmSynthesizer(wpm, farns, pitch).render_text(words)
+    whole = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks = cwaudio.PcmSynthesizer(wpm, farns, pitch).stream(iter(words))
+    next(chunks)
+    first_chunk = time.perf_counter() - start
+    for _ in chunks:
+        pass
+    streamed = time.perf_counter() - start
+
+    return {'whole': whole, 'first_chunk': first_chunk, 'streamed': streamed}
+
+
+def benchmark_gui_startup():
+    """Measures time to first window of the GUI along with time of
+        ebook2cw version probes which used to delay it.
+        Needs PySimpleGUI and a display.
+
+    Args:
+        None
+
+    Returns:
+        dict: Times in seconds, None when GUI can't be started
+    """
+
+    try:
+        import tkinter
+        import gui
+    except ImportError:
+        return None
+
+    start = time.perf_counter()
+    try:
+        ui = gui.CwGenUI()
+    except tkinter.TclError:
+        return None
+    first_window = time.perf_counter() - start
+    ui.window.close()
+
+    cw_gen = cwgen.CwGen()
+    start = time.perf_counter()
+    cw_gen.get_ebook2cw_version_local()
+    cw_gen.get_ebook2cw_version_online()
+    probes = time.perf_counter() - start
+
+    return {'first_window': first_window, 'probes': probes}
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Local stand-in of ebook2cw server serving FILES by path
+        with ETag and Last-Modified validators and Range support,
+        counting requests. Connection of the first response of
+        a path in BROKEN is closed in the middle of the file,
+        of a path in RESET it is reset (TCP RST) there.
+    """
+
+    FILES = {'/ChangeLog': b'0.8.5 - 2024-01-01\n  - stand-in release\n'}
+    BROKEN = set()
+    RESET = set()
+    # time for the client to receive data sent before connection reset
+    RESET_DELAY = 0.2
+    LAST_MODIFIED = 'Mon, 01 Jan 2024 00:00:00 GMT'
+    requests = collections.Counter()
+
+    def do_GET(self):
+        data = self.FILES.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+
+        etag = '"{}"'.format(len(data))
+        if self.headers.get('If-None-Match') == etag:
+            self.requests['not_modified'] += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        start = 0
+        range_header = self.headers.get('Range')
+        if range_header and self.headers.get('If-Range') == etag:
+            start = int(range_header.split('=')[1].split('-')[0])
+            self.requests['partial'] += 1
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(
+                start, len(data) - 1, len(data)))
+        else:
+            self.requests['full'] += 1
+            self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', self.LAST_MODIFIED)
+        self.send_header('Content-Length', str(len(data) - start))
+        self.end_headers()
+
+        if self.path in self.BROKEN:
+            self.BROKEN.discard(self.path)
+            self.wfile.write(data[start:len(data) // 2])
+            self.close_connection = True
+            return
+        if self.path in self.RESET:
+            self.RESET.discard(self.path)
+            self.wfile.write(data[start:len(data) // 2])
+            time.sleep(self.RESET_DELAY)
+            # zero linger time makes close send RST instead of FIN
+            self.connection.setsockopt(
+                socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.connection.close()
+            self.close_connection = True
+            return
+        self.wfile.write(data[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stand_in_server():
+    """Starts stand-in server on a background thread.
+
+    Args:
+        None
+
+    Returns:
+        tuple: (server, base URL)
+    """
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, 'http://127.0.0.1:{}'.format(server.server_port)
+
+
+def benchmark_version_check(launches=5):
+    """Counts requests of online ebook2cw version checks made by
+        repeated launches against local stand-in server:
+        within TTL and after TTL expired (conditional request).
+
+    Args:
+        launches (int): Number of launches per case
+
+    Returns:
+        dict: Requests counters by case ('full' and 'not_modified' responses)
+    """
+
+    server, base_url = start_stand_in_server()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for case, ttl in (('within_ttl', 3600), ('ttl_expired', 0)):
+            StandInHandler.requests.clear()
+            for _ in range(launches):
+                e2cw = ebook2cw.Ebook2Cw(temp_dir, ttl)
+                e2cw.changelog_file_url = base_url + '/ChangeLog'
+                if e2cw.get_executable_version_online() != '0.8.5':
+                    raise AssertionError('Unexpected online version')
+            results[case] = dict(StandInHandler.requests)
+
+    server.shutdown()
+    server.server_close()
+
+    return results
+
+
+def download_and_hash_twice(file_url, file_path):
+    """Previous download scheme: retrieve the file, then read it back to hash it"""
+
+    urllib.request.urlretrieve(file_url, file_path)
+    return helpers.md5(file_path)
+
+
+def benchmark_download(size_mb=32):
+    """Compares download followed by hashing pass with single pass
+        streaming download, and checks resuming of interrupted download.
+
+    Args:
+        size_mb (int): Size of the downloaded file
+
+    Returns:
+        dict: Times in seconds and requests made to resume download
+    """
+
+    data = random.Random(0).randbytes(size_mb * 1024 * 1024)
+    expected_md5 = hashlib.md5(data).hexdigest()
+    StandInHandler.FILES['/big'] = data
+    server, base_url = start_stand_in_server()
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'big')
+
+        start = time.perf_counter()
+        if download_and_hash_twice(base_url + '/big', file_path) != expected_md5:
+            raise AssertionError('Download corrupted')
+        timings['two_pass'] = time.perf_counter() - start
+        os.remove(file_path)
+
+        start = time.perf_counter()
+        if helpers.download_file(base_url + '/big', file_path)['md5'] != expected_md5:
+            raise AssertionError('Download corrupted')
+        timings['single_pass'] = time.perf_counter() - start
+        os.remove(file_path)
+
+        StandInHandler.requests.clear()
+        StandInHandler.BROKEN.add('/big')
+        if helpers.download_file(base_url + '/big', file_path)['success']:
+            raise AssertionError('Broken download reported as successful')
+        if helpers.download_file(base_url + '/big', file_path)['md5'] != expected_md5:
+            raise AssertionError('Resumed download corrupted')
+        timings['resume_requests'] = dict(StandInHandler.requests)
+        os.remove(file_path)
+
+        StandInHandler.requests.clear()
+        StandInHandler.RESET.add('/big')
+        if helpers.download_file(base_url + '/big', file_path)['success']:
+            raise AssertionError('Reset download reported as successful')
+        if helpers.download_file(base_url + '/big', file_path)['md5'] != expected_md5:
+            raise AssertionError('Download resumed after reset corrupted')
+        timings['reset_resume_requests'] = dict(StandInHandler.requests)
+        if timings['reset_resume_requests'] != {'full': 1, 'partial': 1}:
+            raise AssertionError('Download not resumed after reset')
+
+    server.shutdown()
+    server.server_close()
+    del StandInHandler.FILES['/big']
+
+    return timings
+
+
+def benchmark_executable_probes(probes_count=20):
+    """Compares repeated local ebook2cw version and MD5 probes
+        with and without memoized executable info. Stand-in executable
+        is a shell script, so it runs on Linux only.
+
+    Args:
+        probes_count (int): Number of probes
+
+    Returns:
+        dict: Times in seconds, None when not on Linux
+    """
+
+    if platform.system() != 'Linux':
+        return None
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        e2cw = ebook2cw.Ebook2Cw(temp_dir)
+        with open(e2cw.executable_local_path, mode='w') as executable:
+            executable.write('#!/bin/sh\necho "ebook2cw 0.8.5 - stand-in"\n')
+            # make stand-in executable big enough for hashing to matter
+            executable.write('#' * 4 * 1024 * 1024 + '\n')
+        os.chmod(e2cw.executable_local_path, 0o755)
+        with open(e2cw.hash_file_local_path, mode='w') as hash_file:
+            hash_file.write('{} {}\n'.format(helpers.md5(
+                e2cw.executable_local_path), os.path.basename(e2cw.executable_local_path)))
+
+        for case in ('spawned', 'memoized'):
+            start = time.perf_counter()
+            for _ in range(probes_count):
+                if case == 'spawned':
+                    e2cw._invalidate_executable_info()
+                if e2cw.get_executable_version_local() != '0.8.5' or \
+                        not e2cw._verify_executable_against_md5_file():
+                    raise AssertionError('Unexpected probe result')
+            timings[case] = time.perf_counter() - start
+
+        # replaced executable must not be served from memoized info
+        with open(e2cw.executable_local_path, mode='w') as executable:
+            executable.write('#!/bin/sh\necho "ebook2cw 0.8.6 - stand-in"\n')
+        if e2cw.get_executable_version_local() != '0.8.6':
+            raise AssertionError('Memoized info not invalidated')
+
+    return timings
+
+
+def benchmark_instrumentation(words_count, calls_count=100000):
+    """Measures per call overhead of instrumentation on cached
+        get_words_filtered calls (the cheapest instrumented method).
+
+    Args:
+        words_count (int): Size of the synthetic dictionary
+        calls_count (int): Number of calls per case
+
+    Returns:
+        dict: Time per call in seconds by case
+    """
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'dictionary.txt')
+        generate_dictionary_file(file_path, words_count)
+        cw_gen = cwgen.CwGen(
+            dictionary_cache_folder=os.path.join(temp_dir, 'cache'))
+        cw_gen.add_dictionary(file_path)
+
+    timings = {}
+    for case in ('never_enabled', 'enabled', 'disabled'):
+        if case == 'enabled':
+            cw_gen.enable_instrumentation()
+        elif case == 'disabled':
+            cw_gen.disable_instrumentation()
+        start = time.perf_counter()
+        for _ in range(calls_count):
+            cw_gen.get_words_filtered(2, 10, 'cwo5')
+        timings[case] = (time.perf_counter() - start) / calls_count
+
+    return timings
+
+
+def measure(function, setup=None):
+    """Measures function run time and peak memory allocated while it runs.
+        Function is run twice (setup is called before each run) as tracing
+        memory allocations slows it down too much to be timed at once.
+
+    Args:
+        function (function): Measured function (no arguments)
+        setup (function): Function restoring initial state (no arguments)
+
+    Returns:
+        dict: Dictionary
+            'time' -> run time in seconds
+            'peak_memory' -> peak of memory allocated by the function in bytes
+    """
+
+    if setup is not None:
+        setup()
+    start = time.perf_counter()
+    function()
+    run_time = time.perf_counter() - start
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    function()
+    _current, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'time': run_time, 'peak_memory': peak_memory}
+
+
+def get_commit_id():
+    """Gets git commit id of the working tree (None when not known)"""
+
+    try:
+        completed = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return completed.stdout.decode().strip()
+
+
+def run_suite(sizes, seed=0, training_words_count=1000):
+    """Runs benchmark suite over synthetic dictionaries of given sizes:
+        loading (with cold and warm dictionary cache), filtering across
+        all letters sets, words stat aggregation and training words generation.
+
+    Args:
+        sizes (list): Synthetic dictionaries sizes (words count)
+        seed (int): Synthetic dictionaries and generation seed
+        training_words_count (int): Number of words generated per scheme
+
+    Returns:
+        dict: Dictionary (JSON serializable)
+            'environment' -> Python, platform and commit id
+            'results' -> list of measurements per size, each a dictionary of
+                {'time', 'peak_memory'} (see measure()) by operation
+    """
+
+    suite = {'environment': {'python': platform.python_version(),
+                             'implementation': platform.python_implementation(),
+                             'platform': platform.platform(),
+                             'commit': get_commit_id(),
+                             'seed': seed},
+             'results': []}
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'dictionary.txt')
+            cache_folder = os.path.join(temp_dir, 'cache')
+            generate_dictionary_file(file_path, size, seed)
+
+            cw_gens = []
+
+            def load():
+                cw_gen = cwgen.CwGen(dictionary_cache_folder=cache_folder)
+                cw_gen.add_dictionary(file_path)
+                cw_gens.append(cw_gen)
+
+            def clear_dictionary_cache():
+                shutil.rmtree(cache_folder, ignore_errors=True)
+
+            result = {'words': size,
+                      'file_size': os.path.getsize(file_path),
+                      'load_cold': measure(load, clear_dictionary_cache),
+                      'load_warm': measure(load)}
+
+        cw_gen = cw_gens[-1]
+        letters_sets = list(cw_gen.get_letters_sets())
+        schemes = list(cw_gen.get_training_generator_schemes())
+
+        def filter_all_letters_sets():
+            for letters_set in letters_sets:
+                cw_gen.get_words_filtered(0, 100, letters_set)
+
+        def stat_all_letters_sets():
+            cw_gen.get_words_stat()
+            for letters_set in letters_sets:
+                cw_gen.get_words_stat_filtered(0, 100, letters_set, 'rand')
+
+        def generate_all_schemes():
+            for scheme in schemes:
+                cw_gen.generate_training_words(
+                    0, 100, 'all', scheme, training_words_count, seed)
+
+        def prepare_generation():
+            # filtering result is cached, samplers are built while measured
+            cw_gen.filter_cache.clear()
+            cw_gen.get_words_filtered(0, 100, 'all')
+
+        result['filter'] = measure(
+            filter_all_letters_sets, cw_gen.filter_cache.clear)
+        result['stat'] = measure(
+            stat_all_letters_sets, cw_gen.filter_cache.clear)
+        result['generate'] = measure(generate_all_schemes, prepare_generation)
+
+        suite['results'].append(result)
+
+    return suite
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CwGen benchmarks')
+    parser.add_argument('--words', type=int, default=100000,
+                        help='synthetic dictionary size')
+    parser.add_argument('--suite', action='store_true',
+                        help='run benchmark suite emitting JSON results instead')
+    parser.add_argument('--sizes', default='10000,100000,1000000,5000000',
+                        help='comma separated synthetic dictionaries sizes of the suite')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='synthetic dictionaries seed of the suite')
+    parser.add_argument('--output',
+                        help='suite JSON results file (standard output by default)')
+    args = parser.parse_args()
+
+    if args.suite:
+        suite = run_suite([int(size)
+                           for size in args.sizes.split(',')], args.seed)
+        if args.output:
+            with open(args.output, mode='w', encoding='utf-8') as output_file:
+                json.dump(suite, output_file, indent=2)
+        else:
+            json.dump(suite, sys.stdout, indent=2)
+            print()
+        return
+
+    timings = benchmark_loading(args.words)
+    print('Loading {} words dictionary:'.format(args.words))
+    print('  Cold cache: {:.3f} s'.format(timings['cold']))
+    print('  Warm cache: {:.3f} s'.format(timings['warm']))
+
+    timings = benchmark_phrases(args.words // 10)
+    print('Loading {} phrases dictionary:'.format(args.words // 10))
+    print('  Cold cache: {:.3f} s'.format(timings['cold']))
+    print('  Warm cache: {:.3f} s'.format(timings['warm']))
+    print('  Report:     {lines} lines, {words} words, {phrases} phrases, {ignored} ignored'.format(
+        **timings['report']))
+    print('  Filtering across all letters sets verified in {:.3f} s'.format(
+        timings['filtering']))
+
+    timings = benchmark_parallel_loading(args.words)
+    print('Loading 8 dictionaries of {} words:'.format(args.words))
+    print('  Serial:                   {:.3f} s'.format(timings['serial']))
+    print('  Parallel ({:>2} processes): {:.3f} s'.format(
+        timings['workers'], timings['parallel']))
+
+    sizes = benchmark_memory(args.words)
+    print('Memory of {} words dictionary data:'.format(args.words))
+    print('  Lists of str: {:.1f} MB'.format(sizes['lists'] / 1e6))
+    print('  WordsBucket:  {:.1f} MB'.format(sizes['buckets'] / 1e6))
+    print('  Words index:  {:.1f} MB'.format(sizes['index'] / 1e6))
+
+    timings = benchmark_filtering(args.words)
+    print('Filtering {} words across all letters sets:'.format(args.words))
+    print('  Counter based: {:.3f} s'.format(timings['counter']))
+    print('  Masks based:   {:.3f} s'.format(timings['mask']))
+    print('  Speedup:       {:.1f}x'.format(
+        timings['counter'] / timings['mask']))
+
+    throughputs = benchmark_synthesis(min(args.words, 5000))
+    print('Rendering {} words, seconds of audio per CPU second:'.format(
+        min(args.words, 5000)))
+    for renderer, throughput in throughputs.items():
+        print('  {:<8}: {:.1f}'.format(renderer, throughput))
+    if 'ebook2cw' not in throughputs:
+        print('  ebook2cw: executable not present, skipped')
+
+    timings = benchmark_streaming()
+    print('Rendering 30 minutes session:')
+    print('  Whole session: {:.3f} s'.format(timings['whole']))
+    print('  First chunk:   {:.3f} s (all chunks {:.3f} s)'.format(
+        timings['first_chunk'], timings['streamed']))
+
+    timings = benchmark_gui_startup()
+    print('GUI startup:')
+    if timings is None:
+        print('  PySimpleGUI or display not available, skipped')
+    else:
+        print('  Time to first window:         {:.3f} s'.format(
+            timings['first_window']))
+        print('  ebook2cw probes (background): {:.3f} s'.format(
+            timings['probes']))
+
+    requests = benchmark_version_check()
+    print('Online ebook2cw version check, requests of 5 launches:')
+    for case, counters in requests.items():
+        print('  {:<12}: {} full, {} not modified'.format(
+            case, counters.get('full', 0), counters.get('not_modified', 0)))
+
+    timings = benchmark_download()
+    print('Downloading 32 MB file from local server:')
+    print('  Download, then hash: {:.3f} s'.format(timings['two_pass']))
+    print('  Single pass:         {:.3f} s'.format(timings['single_pass']))
+    print('  Interrupted download resumed with {} full and {} partial request(s)'.format(
+        timings['resume_requests'].get('full', 0), timings['resume_requests'].get('partial', 0)))
+    print('  Reset download resumed with {} full and {} partial request(s)'.format(
+        timings['reset_resume_requests'].get('full', 0), timings['reset_resume_requests'].get('partial', 0)))
+
+    timings = benchmark_executable_probes()
+    print('20 local ebook2cw version and MD5 probes:')
+    if timings is None:
+        print('  stand-in executable needs Linux, skipped')
+    else:
+        print('  Spawned and hashed: {:.3f} s'.format(timings['spawned']))
+        print('  Memoized:           {:.3f} s'.format(timings['memoized']))
+
+    timings = benchmark_instrumentation(args.words)
+    print('Instrumentation overhead on cached get_words_filtered call:')
+    for case, call_time in timings.items():
+        print('  {:<13}: {:.2f} us'.format(case, call_time * 1e6))
+
+    timings = benchmark_stats(args.words)
+    print('Words stat getters over random dictionary set changes:')
+    print('  Recomputed:  {:.6f} s'.format(timings['recomputed']))
+    print('  Incremental: {:.6f} s'.format(timings['incremental']))
+
+    timings = benchmark_dictionary_changes(args.words * 5)
+    print('1000 words dictionary with {} words dictionary loaded:'.format(args.words * 5))
+    print('  Add:    {:.4f} s'.format(timings['add']))
+    print('  Remove: {:.4f} s'.format(timings['remove']))
+
+    timings = benchmark_stats_filtered(args.words)
+    print('Filtered words stat over all letters sets and random dictionary set changes:')
+    print('  Filtered words: {:.6f} s'.format(timings['filtered']))
+    print('  Counted:        {:.6f} s'.format(timings['counted']))
+
+
+if __name__ == '__main__':
+    main()
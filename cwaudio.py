@@ -0,0 +1,510 @@
+import helpers
+import array
+import importlib
+import importlib.util
+import math
+import struct
+import sys
+import wave
+
+# optional, used by NumpySynthesizer, imported on its first use (see _import_numpy)
+# as importing numpy takes more time than loading all other modules
+numpy = None
+
+
+# dots and dashes of supported characters (unsupported ones are skipped)
+MORSE_CODE = {
+    'A': '.-',     'B': '-...',   'C': '-.-.',   'D': '-..',    'E': '.',
+    'F': '..-.',   'G': '--.',    'H': '....',   'I': '..',     'J': '.---',
+    'K': '-.-',    'L': '.-..',   'M': '--',     'N': '-.',     'O': '---',
+    'P': '.--.',   'Q': '--.-',   'R': '.-.',    'S': '...',    'T': '-',
+    'U': '..-',    'V': '...-',   'W': '.--',    'X': '-..-',   'Y': '-.--',
+    'Z': '--..',
+    '0': '-----',  '1': '.----',  '2': '..---',  '3': '...--',  '4': '....-',
+    '5': '.....',  '6': '-....',  '7': '--...',  '8': '---..',  '9': '----.',
+    '.': '.-.-.-', ',': '--..--', '?': '..--..', '/': '-..-.',  '=': '-...-',
+    '+': '.-.-.',  '-': '-....-', ':': '---...', "'": '.----.', '(': '-.--.',
+    ')': '-.--.-', '"': '.-..-.', '@': '.--.-.', '!': '-.-.--', '&': '.-...',
+}
+
+SAMPLE_WIDTH = 2
+SAMPLE_MAX = 32767
+# default streamed PCM chunk size in bytes (4096 samples)
+CHUNK_SIZE = 4096 * SAMPLE_WIDTH
+
+
+def get_timing(wpm, farns):
+    """Gets CW elements duration for PARIS standard word.
+        Farnsworth timing stretches gaps between characters and words
+        so the overall speed drops to farns while characters are sent at wpm.
+
+    Args:
+        wpm (int): Characters speed in words per minute
+        farns (int): Effective (Farnsworth) speed in words per minute,
+            ignored when 0 or not lower than wpm
+
+    Returns:
+        dict: Dictionary (durations in seconds)
+            'dit' -> dot length
+            'dah' -> dash length
+            'element_gap' -> gap between dots and dashes of a character
+            'character_gap' -> gap between characters
+            'word_gap' -> gap between words
+    """
+
+    dit = 1.2 / wpm
+    character_gap = 3 * dit
+    word_gap = 7 * dit
+
+    if 0 < farns < wpm:
+        # ARRL Farnsworth formula: PARIS has 19 units of character and word gaps
+        gaps_time = (60 * wpm - 37.2 * farns) / (farns * wpm)
+        character_gap = 3 * gaps_time / 19
+        word_gap = 7 * gaps_time / 19
+
+    return {'dit': dit,
+            'dah': 3 * dit,
+            'element_gap': dit,
+            'character_gap': character_gap,
+            'word_gap': word_gap}
+
+
+class PcmSynthesizer:
+    """Class producing 16-bit mono PCM of CW text in pure Python.
+        Dit and dah tones (with raised cosine rise and fall shaping)
+        and gaps are rendered once, characters and words are made up
+        by joining them.
+    """
+
+    def __init__(self, wpm, farns, pitch, sample_rate=11025, ramp_time=0.005, volume=0.8):
+        """Class initialization
+
+        Args:
+            wpm (int): Characters speed in words per minute
+            farns (int): Effective (Farnsworth) speed in words per minute
+            pitch (int): Tone frequency in Hz
+            sample_rate (int): Samples per second
+            ramp_time (float): Tone rise and fall time in seconds
+            volume (float): Tone amplitude (0.0 - 1.0)
+        """
+
+        self.wpm = wpm
+        self.farns = farns
+        self.pitch = pitch
+        self.sample_rate = sample_rate
+        self.ramp_time = ramp_time
+        self.volume = volume
+
+        timing = get_timing(wpm, farns)
+        self.dit = self._render_tone(timing['dit'])
+        self.dah = self._render_tone(timing['dah'])
+        self.element_gap = self._render_silence(timing['element_gap'])
+        self.character_gap = self._render_silence(timing['character_gap'])
+        self.word_gap = self._render_silence(timing['word_gap'])
+        self.characters = {}
+
+    def get_parameters(self):
+        """Gets parameters which make up synthesized audio.
+
+        Args:
+            None
+
+        Returns:
+            tuple: Parameters (hashable)
+        """
+
+        return (type(self).__name__, self.wpm, self.farns, self.pitch,
+                self.sample_rate, self.ramp_time, self.volume)
+
+    def _get_samples_count(self, duration):
+        return int(round(duration * self.sample_rate))
+
+    def _render_silence(self, duration):
+        return bytes(self._get_samples_count(duration) * SAMPLE_WIDTH)
+
+    def _render_tone(self, duration):
+        """Renders tone of given duration with shaped edges.
+
+        Args:
+            duration (float): Tone duration in seconds
+
+        Returns:
+            bytes: PCM samples
+        """
+
+        samples_count = self._get_samples_count(duration)
+        ramp_count = min(self._get_samples_count(
+            self.ramp_time), samples_count // 2)
+        step = 2 * math.pi * self.pitch / self.sample_rate
+        amplitude = self.volume * SAMPLE_MAX
+
+        samples = array.array('h', bytes(samples_count * SAMPLE_WIDTH))
+        for index in range(samples_count):
+            envelope = 1.0
+            edge_distance = min(index, samples_count - 1 - index)
+            if edge_distance < ramp_count:
+                envelope = 0.5 - 0.5 * \
+                    math.cos(math.pi * edge_distance / ramp_count)
+            samples[index] = int(amplitude * envelope * math.sin(step * index))
+
+        return self._to_little_endian(samples)
+
+    @staticmethod
+    def _to_little_endian(samples):
+        # WAV PCM samples are little endian
+        if sys.byteorder != 'little':
+            samples.byteswap()
+        return samples.tobytes()
+
+    def render_character(self, character):
+        """Renders single character (without trailing gap).
+
+        Args:
+            character (str): Character (case insensitive)
+
+        Returns:
+            bytes: PCM samples (empty for unsupported character)
+        """
+
+        pcm = self.characters.get(character)
+        if pcm is None:
+            code = MORSE_CODE.get(character.upper(), '')
+            pcm = self.element_gap.join(
+                self.dit if element == '.' else self.dah for element in code)
+            self.characters[character] = pcm
+
+        return pcm
+
+    def render_word(self, word):
+        """Renders a word (without trailing gap).
+
+        Args:
+            word (str): Word (case insensitive)
+
+        Returns:
+            bytes: PCM samples
+        """
+
+        characters = [self.render_character(character) for character in word]
+
+        return self.character_gap.join(pcm for pcm in characters if pcm)
+
+    def render_text(self, words):
+        """Renders words sequence (each word followed by a word gap).
+
+        Args:
+            words (iterable): Words to render
+
+        Returns:
+            bytes: PCM samples
+        """
+
+        return b''.join(self.render_word(word) + self.word_gap for word in words)
+
+    def write_wav(self, words, file_path):
+        """Writes WAV file of words sequence rendered at once.
+
+        Args:
+            words (iterable): Words to render
+            file_path (str): Path to the resulting WAV file
+
+        Returns:
+            None
+        """
+
+        write_wav(file_path, self.sample_rate, [self.render_text(words)])
+
+    def stream(self, words, chunk_size=CHUNK_SIZE):
+        """Renders words sequence as it is consumed, word by word.
+
+        Args:
+            words (iterable): Words to render (may be a generator)
+            chunk_size (int): Size of yielded chunks in bytes (multiple of SAMPLE_WIDTH)
+
+        Returns:
+            generator: bytes chunks of PCM samples
+        """
+
+        return iter_pcm_chunks((self.render_word(word) + self.word_gap for word in words),
+                               chunk_size)
+
+
+def _import_numpy():
+    """Imports numpy on first use.
+
+    Args:
+        None
+
+    Returns:
+        bool: True when numpy is available, False otherwise
+    """
+
+    global numpy
+
+    if numpy is None:
+        try:
+            numpy = importlib.import_module('numpy')
+        except ImportError:
+            return False
+
+    return True
+
+
+class NumpySynthesizer(PcmSynthesizer):
+    """Class producing 16-bit mono PCM of CW text with NumPy.
+        Element waveforms are computed vectorized and whole text
+        is assembled with a single array concatenation.
+    """
+
+    def __init__(self, wpm, farns, pitch, sample_rate=11025, ramp_time=0.005, volume=0.8):
+        """Class initialization (see PcmSynthesizer)"""
+
+        if not _import_numpy():
+            raise ImportError('NumpySynthesizer requires numpy')
+
+        super().__init__(wpm, farns, pitch, sample_rate, ramp_time, volume)
+
+        self.element_arrays = {'.': self._to_array(self.dit),
+                               '-': self._to_array(self.dah)}
+        self.element_gap_array = self._to_array(self.element_gap)
+        self.character_gap_array = self._to_array(self.character_gap)
+        self.word_gap_array = self._to_array(self.word_gap)
+        self.character_arrays = {}
+
+    @staticmethod
+    def _to_array(pcm):
+        return numpy.frombuffer(pcm, dtype='<i2')
+
+    def _render_tone(self, duration):
+        samples_count = self._get_samples_count(duration)
+        ramp_count = min(self._get_samples_count(
+            self.ramp_time), samples_count // 2)
+
+        index = numpy.arange(samples_count)
+        edge_distance = numpy.minimum(index, samples_count - 1 - index)
+        envelope = numpy.ones(samples_count)
+        if ramp_count > 0:
+            ramp = edge_distance < ramp_count
+            envelope[ramp] = 0.5 - 0.5 * \
+                numpy.cos(numpy.pi * edge_distance[ramp] / ramp_count)
+        samples = self.volume * SAMPLE_MAX * envelope * \
+            numpy.sin(2 * numpy.pi * self.pitch / self.sample_rate * index)
+
+        return samples.astype('<i2').tobytes()
+
+    def _get_character_array(self, character):
+        """Gets samples of single character (without trailing gap).
+
+        Args:
+            character (str): Character (case insensitive)
+
+        Returns:
+            numpy.ndarray: Samples (empty for unsupported character)
+        """
+
+        samples = self.character_arrays.get(character)
+        if samples is None:
+            parts = []
+            for element in MORSE_CODE.get(character.upper(), ''):
+                if parts:
+                    parts.append(self.element_gap_array)
+                parts.append(self.element_arrays[element])
+            samples = numpy.concatenate(parts) if parts else numpy.zeros(0, dtype='<i2')
+            self.character_arrays[character] = samples
+
+        return samples
+
+    def _get_text_parts(self, words):
+        """Gets list of samples arrays making up words sequence.
+
+        Args:
+            words (iterable): Words to render
+
+        Returns:
+            list: numpy.ndarray parts (each word followed by a word gap)
+        """
+
+        parts = []
+        for word in words:
+            is_first_character = True
+            for character in word:
+                samples = self._get_character_array(character)
+                if samples.size:
+                    if not is_first_character:
+                        parts.append(self.character_gap_array)
+                    parts.append(samples)
+                    is_first_character = False
+            parts.append(self.word_gap_array)
+
+        return parts
+
+    def render_character(self, character):
+        return self._get_character_array(character).tobytes()
+
+    def render_word(self, word):
+        parts = self._get_text_parts([word])[:-1]
+        return numpy.concatenate(parts).tobytes() if parts else b''
+
+    def render_text(self, words):
+        parts = self._get_text_parts(words)
+        return numpy.concatenate(parts).tobytes() if parts else b''
+
+
+# in-process synthesizers by backend name (numpy one only when numpy is installed,
+# which is checked without importing it)
+SYNTHESIZERS = {'python': PcmSynthesizer}
+if importlib.util.find_spec('numpy') is not None:
+    SYNTHESIZERS['numpy'] = NumpySynthesizer
+
+
+def iter_pcm_chunks(pcm_parts, chunk_size=CHUNK_SIZE):
+    """Regroups PCM parts of any size into fixed size chunks.
+        Only not yet yielded samples are kept, so memory is bounded
+        by chunk size plus the largest part.
+
+    Args:
+        pcm_parts (iterable): bytes with PCM samples (consumed lazily)
+        chunk_size (int): Size of yielded chunks in bytes (multiple of SAMPLE_WIDTH)
+
+    Returns:
+        generator: bytes chunks (the last one may be shorter)
+    """
+
+    if chunk_size <= 0 or chunk_size % SAMPLE_WIDTH:
+        raise ValueError('Chunk size must be a positive multiple of sample width')
+
+    buffer = bytearray()
+    for pcm in pcm_parts:
+        buffer += pcm
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+
+    if buffer:
+        yield bytes(buffer)
+
+
+def get_wav_header(sample_rate, data_size=None):
+    """Gets 16-bit mono WAV file header to be followed by PCM samples,
+        e.g. when streaming audio of yet unknown length.
+
+    Args:
+        sample_rate (int): Samples per second
+        data_size (int): Size of PCM samples in bytes (None when unknown)
+
+    Returns:
+        bytes: RIFF / WAVE header
+    """
+
+    # players treat maximal sizes as 'read until the end of stream'
+    data_chunk_size = 0xFFFFFFFF - 36 if data_size is None else data_size
+    riff_chunk_size = 0xFFFFFFFF if data_size is None else 36 + data_size
+
+    return struct.pack('<4sI4s4sIHHIIHH4sI',
+                       b'RIFF', riff_chunk_size, b'WAVE',
+                       b'fmt ', 16, 1, 1, sample_rate, sample_rate * SAMPLE_WIDTH,
+                       SAMPLE_WIDTH, 8 * SAMPLE_WIDTH,
+                       b'data', data_chunk_size)
+
+
+def write_wav(file_path, sample_rate, pcm_chunks):
+    """Writes 16-bit mono WAV file.
+
+    Args:
+        file_path (str): Path to the resulting WAV file
+        sample_rate (int): Samples per second
+        pcm_chunks (iterable): bytes with PCM samples
+
+    Returns:
+        None
+    """
+
+    with wave.open(file_path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(SAMPLE_WIDTH)
+        wav_file.setframerate(sample_rate)
+        for pcm in pcm_chunks:
+            wav_file.writeframesraw(pcm)
+
+
+class WordSnippetCache:
+    """Class caching PCM of words (followed by a word gap) per synthesizer
+        parameters so texts made up of a small vocabulary are assembled
+        by joining snippets, each distinct word being rendered once.
+        Cache is bounded by total PCM size as a single snippet is large
+        (6 letters word at 15 WPM and 11025 Hz takes about 110 kB,
+        so 64 MB holds some 600 of them).
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """Class initialization
+
+        Args:
+            max_bytes (int): Maximal total size of cached snippets in bytes
+        """
+
+        self.snippets = helpers.LruCache(max_bytes, len)
+
+    def get_snippet(self, synthesizer, word):
+        """Gets PCM of a word followed by a word gap.
+
+        Args:
+            synthesizer (PcmSynthesizer): Synthesizer (any backend) rendering missing snippet
+            word (str): Word (case insensitive)
+
+        Returns:
+            bytes: PCM samples
+        """
+
+        key = (synthesizer.get_parameters(), word.upper())
+        snippet = self.snippets.get(key)
+        if snippet is None:
+            snippet = synthesizer.render_word(word) + synthesizer.word_gap
+            self.snippets.put(key, snippet)
+
+        return snippet
+
+    def write_wav(self, synthesizer, words, file_path):
+        """Writes WAV file of words sequence assembled out of snippets.
+
+        Args:
+            synthesizer (PcmSynthesizer): Synthesizer rendering missing snippets
+            words (iterable): Words to render
+            file_path (str): Path to the resulting WAV file
+
+        Returns:
+            None
+        """
+
+        write_wav(file_path, synthesizer.sample_rate,
+                  (self.get_snippet(synthesizer, word) for word in words))
+
+    def stream(self, synthesizer, words, chunk_size=CHUNK_SIZE):
+        """Assembles words sequence out of snippets as it is consumed.
+            Besides the chunk being assembled memory holds snippets cache
+            which grows with the number of distinct words (up to its limit).
+
+        Args:
+            synthesizer (PcmSynthesizer): Synthesizer rendering missing snippets
+            words (iterable): Words to render (may be a generator)
+            chunk_size (int): Size of yielded chunks in bytes (multiple of SAMPLE_WIDTH)
+
+        Returns:
+            generator: bytes chunks of PCM samples
+        """
+
+        return iter_pcm_chunks((self.get_snippet(synthesizer, word) for word in words),
+                               chunk_size)
+
+    def get_info(self):
+        """Gets snippets cache statistics.
+
+        Args:
+            None
+
+        Returns:
+            dict: Dictionary as returned by helpers.LruCache.get_info()
+                (sizes in bytes)
+        """
+
+        return self.snippets.get_info()
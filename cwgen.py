@@ -1,17 +1,146 @@
+import audiocache
+import cwaudio
+import dictcache
 import ebook2cw as e2cw
-import collections
+import helpers
+import instrumentation
+import sampling
+import wordindex
+import wordsbucket
+import argparse
+import array
+import collections.abc
+import concurrent.futures
+import json
 import os
+import random
 import sys
 import uuid
 
 
+# characters from '!' to '_' (digits, upper case letters and punctuation) get
+# their own bit in the word characters mask, anything else shares the last bit
+MASK_FIRST_CHARACTER = ord('!')
+MASK_OTHER_BIT = 63
+MASK_ALL = (1 << (MASK_OTHER_BIT + 1)) - 1
+
+_characters_bits = {}
+
+
+def get_character_bit(character):
+    """Gets the bit representing a character in words characters mask.
+        Letters are case insensitive. Characters out of the mask range
+        (or changing length when upper cased) are mapped to MASK_OTHER_BIT.
+
+    Args:
+        character (str): Single character
+
+    Returns:
+        int: Bit value (not its position) of the character
+    """
+
+    bit = _characters_bits.get(character)
+    if bit is None:
+        upper_character = character.upper()
+        position = MASK_OTHER_BIT
+        if len(upper_character) == 1:
+            offset = ord(upper_character) - MASK_FIRST_CHARACTER
+            if 0 <= offset < MASK_OTHER_BIT:
+                position = offset
+        bit = 1 << position
+        _characters_bits[character] = bit
+
+    return bit
+
+
+def get_word_mask(word):
+    """Gets a mask of all distinct characters the word is made of.
+
+    Args:
+        word (str): Word to analyze
+
+    Returns:
+        int: Characters mask
+    """
+
+    mask = 0
+    for character in set(word):
+        mask |= get_character_bit(character)
+
+    return mask
+
+
+def get_words_dictionary_size(words_dictionary):
+    """Gets memory taken by words data and characters masks of words buckets.
+
+    Args:
+        words_dictionary (dict): WordsBucket by key (word length)
+
+    Returns:
+        int: Size in bytes
+    """
+
+    return sum(len(bucket.data) + len(bucket.masks) * bucket.masks.itemsize
+               for bucket in words_dictionary.values())
+
+
+def get_letters_mask(letters):
+    """Gets a mask of letters set characters. Characters which can't be
+        represented in the mask are skipped so words containing them
+        never match the set.
+
+    Args:
+        letters (str): Letters set definition
+
+    Returns:
+        int: Characters mask
+    """
+
+    mask = 0
+    for character in letters:
+        mask |= get_character_bit(character)
+
+    return mask & ~(1 << MASK_OTHER_BIT)
+
+
+def _load_dictionary_in_worker(file_path, dictionary_cache_folder):
+    """Loads dictionary in a worker process
+        (module level function so it can be pickled).
+
+    Args:
+        file_path (str): Path to the dictionary file
+        dictionary_cache_folder (str): Folder for compiled dictionaries
+
+    Returns:
+        dict: Dictionary as returned by CwGen.load_dictionary()
+    """
+
+    cw_gen = CwGen(dictionary_cache_folder=dictionary_cache_folder)
+
+    return cw_gen.load_dictionary(file_path)
+
+
 class CwGen:
     """Class handling CW learning material generation"""
 
-    def __init__(self):
-        """Class initialization"""
+    def __init__(self, filter_cache_size=64 * 1024 * 1024, dictionary_cache_folder=None, audio_cache_size=512 * 1024 * 1024,
+                 ebook2cw_version_check_ttl=24 * 60 * 60):
+        """Class initialization
+
+        Args:
+            filter_cache_size (int): Size limit of filtering results cache in bytes
+                (words and phrases data of all cached results)
+            dictionary_cache_folder (str): Folder for compiled dictionaries
+                (None selects default one next to ebook2cw subfolder)
+            audio_cache_size (int): Size limit of rendered audio cache in bytes
+                (0 disables the cache)
+            ebook2cw_version_check_ttl (float): Seconds online ebook2cw version
+                is reused without asking the server
+        """
 
         E2CW_SUBFOLDER = 'ebook2cw'
+        DICTIONARY_CACHE_SUBFOLDER = 'dictionary_cache'
+        AUDIO_CACHE_SUBFOLDER = 'audio_cache'
 
         self.letters_sets = {
             'all':   {'description': 'All letters and numbers', 'letters': '*'},
@@ -36,9 +165,53 @@ class CwGen:
         }
 
         self.e2cw = e2cw.Ebook2Cw(os.path.join(
-            os.path.dirname(__file__), E2CW_SUBFOLDER))
+            os.path.dirname(__file__), E2CW_SUBFOLDER), ebook2cw_version_check_ttl)
         self.dictionary_list = []
 
+        if dictionary_cache_folder is None:
+            dictionary_cache_folder = os.path.join(
+                os.path.dirname(__file__), DICTIONARY_CACHE_SUBFOLDER)
+        self.dictionary_cache = dictcache.DictionaryCache(
+            dictionary_cache_folder)
+
+        # in-process audio: synthesizers by audible parameters, words PCM snippets
+        self.synthesizers = helpers.LruCache(8)
+        self.snippet_cache = cwaudio.WordSnippetCache()
+
+        self.audio_cache = None
+        if audio_cache_size > 0:
+            self.audio_cache = audiocache.AudioCache(os.path.join(
+                os.path.dirname(__file__), AUDIO_CACHE_SUBFOLDER), audio_cache_size)
+
+        # distinct words of all loaded dictionaries along with their counts
+        # per letters set (maintained as words enter and leave the index)
+        self.letters_sets_indexes = {letters_set: index for index,
+                                     letters_set in enumerate(self.letters_sets)}
+        self.rejected_masks = [self._get_rejected_mask(
+            letters_set) for letters_set in self.letters_sets]
+        self.word_index = wordindex.WordIndex(self.rejected_masks)
+        # distinct phrases of all loaded dictionaries (keyed by characters and words count)
+        self.phrase_index = wordindex.WordIndex()
+
+        # words stat aggregated over all loaded dictionaries
+        self.words_stat_aggregate = {}
+        self.words_info = {}
+
+        # filtering results cache, version changes along with dictionary set
+        self.dictionaries_version = 0
+
+        def get_filter_cache_entry_size(entry):
+            # samplers reference filtered words buckets, so only buckets are counted
+            return sum(get_words_dictionary_size(entry.get(name, {})) for name in ('words', 'phrases'))
+
+        self.filter_cache = helpers.LruCache(
+            filter_cache_size, get_filter_cache_entry_size)
+
+        # words scanned by filtering (read by instrumentation)
+        self.words_scanned = 0
+        # opt-in methods measurement (None when disabled)
+        self.instrumentation = None
+
     def _get_words_stat(self, words_dictionary):
         """Generate a statistics on a dictionary data.
 
@@ -61,7 +234,7 @@ class CwGen:
         # generate words stat [words count, min length, max length, dictionary with stat of key: length, value: words count]
         total_words_count = 0
         for words_length, words_list in words_dictionary.items():
-            if isinstance(words_list, list):
+            if isinstance(words_list, collections.abc.Sequence):
                 words_count = len(words_list)
                 words_stat[words_length] = words_count
                 total_words_count += words_count
@@ -76,52 +249,431 @@ class CwGen:
 
         return stat
 
-    def _load_dictionary_from_file(self, file_path):
-        """Load dictionary data from file
-            and calculate its statistics.
+    def _get_phrases_stat(self, phrases_dictionary):
+        """Generate a statistics on a dictionary phrases.
+
+        Args:
+            phrases_dictionary (dict): as generated in _parse_dictionary_file()
+                or phrases count (int) by the same keys
+
+        Returns:
+            dict: Dictionary (empty when there are no phrases)
+                'phrases_count' -> number of phrases
+                'min_length' -> minimal characters count (spaces excluded)
+                'max_length' -> maximal characters count (spaces excluded)
+                'min_words' -> minimal words count
+                'max_words' -> maximal words count
+                'phrases_stat' -> Dictionary{key, phrases_by_key}
+                    key -> (characters count, words count)
+                    phrases_by_key -> number of phrases having the same key
+        """
+
+        stat = {}
+        phrases_stat = {}
+        for key, phrases in phrases_dictionary.items():
+            phrases_count = len(phrases) if isinstance(
+                phrases, collections.abc.Sequence) else phrases
+            if phrases_count > 0:
+                phrases_stat[key] = phrases_count
+
+        if phrases_stat:
+            stat['phrases_count'] = sum(phrases_stat.values())
+            stat['min_length'] = min(key[0] for key in phrases_stat)
+            stat['max_length'] = max(key[0] for key in phrases_stat)
+            stat['min_words'] = min(key[1] for key in phrases_stat)
+            stat['max_words'] = max(key[1] for key in phrases_stat)
+            stat['phrases_stat'] = phrases_stat
+
+        return stat
+
+    def _get_matching_counts(self, words_dictionary):
+        """Counts dictionary words matching each letters set by word length.
+
+        Args:
+            words_dictionary (dict): as generated in _parse_dictionary_file()
+
+        Returns:
+            dict: Dictionary {key, value}
+                key: letters set rejected mask (see _get_rejected_mask())
+                value: Dictionary {key: word length, value: matching words count}
+        """
+
+        matching_counts = {rejected_mask: {}
+                           for rejected_mask in self.rejected_masks}
+        for word_length, bucket in words_dictionary.items():
+            for rejected_mask, words_count in zip(self.rejected_masks, wordindex.get_matching_counts(
+                    bucket.masks, self.rejected_masks)):
+                matching_counts[rejected_mask][word_length] = words_count
+
+        return matching_counts
+
+    def _update_words_stat_aggregate(self, dictionary_stat, multiplier):
+        """Adds (or subtracts) a dictionary stat to the aggregated words stat
+            and reassembles words information returned by get_words_stat().
+            Cost depends on number of words lengths only.
+
+        Args:
+            dictionary_stat (dict): Stat as returned by _get_words_stat()
+            multiplier (int): 1 when dictionary is added, -1 when removed
+
+        Returns:
+            None
+        """
+
+        for word_length, words_count in dictionary_stat.get('words_stat', {}).items():
+            aggregated_count = self.words_stat_aggregate.get(
+                word_length, 0) + multiplier * words_count
+            if aggregated_count > 0:
+                self.words_stat_aggregate[word_length] = aggregated_count
+            else:
+                self.words_stat_aggregate.pop(word_length, None)
+
+        words_info = {}
+        if self.words_stat_aggregate:
+            words_info['words_count'] = sum(self.words_stat_aggregate.values())
+            words_info['min_length'] = min(self.words_stat_aggregate)
+            words_info['max_length'] = max(self.words_stat_aggregate)
+            words_info['words_stat'] = self.words_stat_aggregate
+        self.words_info = words_info
+
+    def _on_dictionary_set_change(self):
+        """Invalidates data derived from the dictionary set.
+            Version bump makes cached filtering results unreachable
+            and clearing the cache releases their memory at once.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        self.dictionaries_version += 1
+        self.filter_cache.clear()
+
+    def _get_filter_cache_entry(self, min_length, max_length, letters_set, with_phrases=False):
+        """Gets filtering result cache entry for given parameters
+            (filtering is performed when not yet cached).
+
+        Args:
+            min_length (int): Minimal words length
+            max_length (int): Maximal words length
+            letters_set (str): Id of the letters set
+            with_phrases (bool): True when phrases have to be filtered as well
+
+        Returns:
+            dict: Dictionary
+                'words' -> words filtered as returned by get_words_filtered()
+                'phrases' -> (optional) phrases filtered as returned by get_phrases_filtered()
+                'samplers' -> (optional) Dictionary {key, value}
+                    key: generator scheme id
+                    value (WordsSampler): sampler of filtered words
+        """
+
+        key = (self.dictionaries_version, min_length, max_length, letters_set)
+        entry = self.filter_cache.get(key)
+        if entry is None:
+            entry = {'words': self._filter_words(
+                min_length, max_length, letters_set)}
+            self.filter_cache.put(key, entry)
+        if with_phrases and 'phrases' not in entry:
+            # new entry is stored so the cache accounts for phrases size too
+            entry = dict(entry, phrases=self._filter_index(
+                self.phrase_index, min_length, max_length, letters_set))
+            self.filter_cache.put(key, entry)
+
+        return entry
+
+    def _parse_dictionary_file(self, file_path, progress_callback=None, cancel_event=None):
+        """Parse dictionary file into words grouped by length
+            and multi word phrases ('%' lines) grouped by characters
+            and words count, along with their characters masks.
 
         Args:
             file_path (str): Path to the dictionary file
+            progress_callback (callable): Called periodically with
+                (bytes_read, bytes_total, words_parsed)
+            cancel_event (threading.Event): Parsing stops when set
 
         Returns:
             dict: Dictionary
-                'uuid': generated UUID
-                'name': file name
-                'path': dictionary path
-                'data': Dictionary {key, value}
+                'words' -> Dictionary {key, value}
                     key: word length
-                    value (list): words list of the same length
+                    value (WordsBucket): words of the same length
+                'phrases' -> Dictionary {key, value}
+                    key: (characters count without spaces, words count)
+                    value (WordsBucket): phrases (words separated with single space)
+                'report' -> Dictionary (lines counts)
+                    'lines' -> all lines
+                    'words' -> word lines
+                    'phrases' -> phrase lines
+                    'ignored' -> empty, comment and metadata only lines
+            None: when parsing was cancelled
         """
 
-        result = {}
+        PROGRESS_INTERVAL_LINES = 10000
+
         words_dictionary = {}
+        phrases_dictionary = {}
+        report = {'lines': 0, 'words': 0, 'phrases': 0, 'ignored': 0}
+        bytes_total = os.path.getsize(file_path)
+        bytes_read = 0
+        words_parsed = 0
 
         with open(os.path.normpath(file_path), mode="r", encoding="ISO-8859-1") as dictionary:
-            for line in dictionary:
+            for line_number, line in enumerate(dictionary, 1):
+                # single byte encoding so characters count is (almost) bytes count
+                bytes_read += len(line)
+                if line_number % PROGRESS_INTERVAL_LINES == 0:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return None
+                    if progress_callback is not None:
+                        progress_callback(
+                            min(bytes_read, bytes_total), bytes_total, words_parsed)
+                report['lines'] = line_number
+
                 # populate dictionary (key: word letters count, value: list of words with same length)
                 split_data = line.strip().split(None, 1)
                 # ignore empty lines and comments
                 if len(split_data) > 0 and split_data[0][0] != '#':
                     # handle multi word row (starting with %)
                     if split_data[0][0] == '%':
-                        print('Multi word line: ', end='[')
-                        print(*split_data[1:], end='] ')
-                        print('not supported yet.')
+                        phrase_words = line.strip()[1:].split()
+                        if not phrase_words:
+                            report['ignored'] += 1
+                            continue
+                        # spaces are not counted as characters and not taken into mask
+                        characters = ''.join(phrase_words)
+                        key = (len(characters), len(phrase_words))
+                        bucket = phrases_dictionary.get(key)
+                        if bucket is None:
+                            bucket = wordsbucket.WordsBucket(
+                                len(characters) + len(phrase_words) - 1)
+                            phrases_dictionary[key] = bucket
+                        bucket.append(' '.join(phrase_words),
+                                      get_word_mask(characters))
+                        report['phrases'] += 1
                     else:
                         # handle simple or more complex dictionary having additional data separated with '/' (like ispell -> [word/metadata occurence])
-                        word_meta_list = split_data[0].split("/", 1)
-                        words_dictionary.setdefault(
-                            len(word_meta_list[0]), []).append(word_meta_list[0])
+                        word = split_data[0].split("/", 1)[0]
+                        # ignore rows having metadata only
+                        if word:
+                            bucket = words_dictionary.get(len(word))
+                            if bucket is None:
+                                bucket = wordsbucket.WordsBucket(len(word))
+                                words_dictionary[len(word)] = bucket
+                            bucket.append(word, get_word_mask(word))
+                            words_parsed += 1
+                            report['words'] += 1
+                        else:
+                            report['ignored'] += 1
+                else:
+                    report['ignored'] += 1
+
+        if progress_callback is not None:
+            progress_callback(bytes_total, bytes_total, words_parsed)
+
+        return {'words': words_dictionary,
+                'phrases': phrases_dictionary,
+                'report': report}
+
+    def _load_dictionary_from_file(self, file_path, progress_callback=None, cancel_event=None):
+        """Load dictionary data from file (or its compiled cache)
+            and calculate its statistics.
+
+        Args:
+            file_path (str): Path to the dictionary file
+            progress_callback (callable): As in _parse_dictionary_file()
+            cancel_event (threading.Event): Loading stops when set
+
+        Returns:
+            dict: Dictionary
+                'uuid': generated UUID
+                'name': file name
+                'path': dictionary path
+                'stat': words statistics returned by _get_words_stat()
+                'data': Dictionary {key, value}
+                    key: word length
+                    value (WordsBucket): words of the same length
+                'phrases_stat': phrases statistics returned by _get_phrases_stat()
+                'phrases': Dictionary {key, value}
+                    key: (characters count, words count)
+                    value (WordsBucket): phrases of the same characters and words count
+                'report': load report as returned by _parse_dictionary_file()
+                'matching_counts': words counts returned by _get_matching_counts()
+            Empty dictionary is returned when file has neither words nor phrases
+            or loading was cancelled.
+        """
+
+        result = {}
+
+        # use compiled dictionary when already cached for current file content
+        parsed_dictionary = self.dictionary_cache.load(file_path)
+        if parsed_dictionary is not None:
+            if progress_callback is not None:
+                file_size = os.path.getsize(file_path)
+                progress_callback(file_size, file_size, sum(
+                    len(bucket) for bucket in parsed_dictionary['words'].values()))
+        else:
+            file_identity = self.dictionary_cache.get_file_identity(file_path)
+            parsed_dictionary = self._parse_dictionary_file(
+                file_path, progress_callback, cancel_event)
+            if parsed_dictionary is None:
+                return result
+            # counted once here and kept in the cache along with words
+            parsed_dictionary['matching_counts'] = self._get_matching_counts(
+                parsed_dictionary['words'])
+            if len(parsed_dictionary['words']) > 0 or len(parsed_dictionary['phrases']) > 0:
+                self.dictionary_cache.store(file_identity, parsed_dictionary)
 
         # assemble result
-        if len(words_dictionary) > 0:
+        if len(parsed_dictionary['words']) > 0 or len(parsed_dictionary['phrases']) > 0:
             result['uuid'] = uuid.uuid1()
             result['name'] = os.path.basename(file_path)
             result['path'] = file_path
-            result['data'] = words_dictionary
+            result['stat'] = self._get_words_stat(parsed_dictionary['words'])
+            result['data'] = parsed_dictionary['words']
+            result['phrases_stat'] = self._get_phrases_stat(
+                parsed_dictionary['phrases'])
+            result['phrases'] = parsed_dictionary['phrases']
+            result['report'] = parsed_dictionary['report']
+            result['matching_counts'] = parsed_dictionary['matching_counts']
 
         return result
 
+    def _get_rejected_mask(self, letters_set):
+        '''Gets mask of characters out of the letters set.
+
+        Args:
+            letters_set (str): Id of the letters set (already validated)
+
+        Returns:
+            int: Characters mask, word matches the letters set when it has
+                none of these characters (0 for wildcard letters set)
+        '''
+
+        if self.letters_sets[letters_set]['letters'][0] == '*':
+            return 0
+
+        return MASK_ALL & ~get_letters_mask(self.letters_sets[letters_set]['letters'])
+
+    def _filter_words(self, min_length, max_length, letters_set):
+        '''Filters distinct words of all loaded dictionaries by parameters
+
+        Args:
+            min_length (int): Minimal words length
+            max_length (int): Maximal words length
+            letters_set (str): Id of the letters set (already validated)
+
+        Returns:
+            dict: Dictionary (key, value)
+                    key: word length
+                    value (WordsBucket): words of the same length
+        '''
+
+        return self._filter_index(self.word_index, min_length, max_length, letters_set)
+
+    def _filter_index(self, index, min_length, max_length, letters_set):
+        '''Filters distinct words (or phrases) of the index by parameters
+
+        Args:
+            index (WordIndex): Index with buckets keyed by word length
+                or by (characters count, words count) tuple
+            min_length (int): Minimal characters count
+            max_length (int): Maximal characters count
+            letters_set (str): Id of the letters set (already validated)
+
+        Returns:
+            dict: Dictionary (key, value)
+                    key: bucket key
+                    value (WordsBucket): words (phrases) of the bucket matching parameters
+        '''
+
+        words_filtered_dict = {}
+
+        # word matches the letters set when none of its characters is out of the set
+        # (wildcard letters set rejects nothing, so everything gets copied)
+        rejected_mask = self._get_rejected_mask(letters_set)
+
+        # filter distinct words of all loaded dictionaries
+        for key, words_count in index.get_words_counts().items():
+            # filter by words length (phrases by characters count)
+            word_len = key if isinstance(key, int) else key[0]
+            if word_len >= min_length and word_len <= max_length:
+                self.words_scanned += words_count
+                # copy as index changes along with dictionary set
+                words_matching = index.select(key, rejected_mask)
+                if words_matching:
+                    words_filtered_dict[key] = words_matching
+
+        return words_filtered_dict
+
+    def is_dictionary_loaded(self, file_path):
+        """Checks if dictionary file is already on the internal list
+            (verification based on file path).
+
+        Args:
+            file_path (str): Path to the dictionary file
+
+        Returns:
+            bool: True when dictionary is already loaded, False otherwise
+        """
+
+        for dictionary in self.dictionary_list:
+            if os.path.normpath(dictionary['path']) == os.path.normpath(file_path):
+                return True
+
+        return False
+
+    def load_dictionary(self, file_path, progress_callback=None, cancel_event=None):
+        """Loads dictionary from file without adding it to the internal list.
+            Does not modify CwGen state so it may be run on a worker thread
+            and its result passed to add_loaded_dictionary() afterwards.
+
+        Args:
+            file_path (str): Path to the dictionary file
+            progress_callback (callable): Called periodically with
+                (bytes_read, bytes_total, words_parsed)
+            cancel_event (threading.Event): Loading stops when set
+
+        Returns:
+            dict: Dictionary as returned by _load_dictionary_from_file()
+                (empty when file has no words or loading was cancelled)
+        """
+
+        return self._load_dictionary_from_file(file_path, progress_callback, cancel_event)
+
+    def add_loaded_dictionary(self, dictionary):
+        """Adds dictionary returned by load_dictionary() to the internal list.
+            Words and phrases are copied to the index, internal list keeps
+            dictionary information only (so words are not stored twice).
+
+        Args:
+            dictionary (dict): Dictionary as returned by load_dictionary()
+
+        Returns:
+            bool: True when dictionary was added, False otherwise
+        """
+
+        if len(dictionary) == 0 or self.is_dictionary_loaded(dictionary['path']):
+            return False
+
+        # precomputed counts are used by the index for words new to it
+        matching_counts = None
+        if all(rejected_mask in dictionary.get('matching_counts', {}) for rejected_mask in self.rejected_masks):
+            matching_counts = {word_length: [dictionary['matching_counts'][rejected_mask].get(word_length, 0)
+                                             for rejected_mask in self.rejected_masks]
+                               for word_length in dictionary['data']}
+
+        self.word_index.add(dictionary['uuid'], dictionary['data'], matching_counts)
+        self.phrase_index.add(dictionary['uuid'], dictionary.get('phrases', {}))
+        self.dictionary_list.append({key: value for key, value in dictionary.items()
+                                     if key not in ('data', 'phrases', 'matching_counts')})
+        self._update_words_stat_aggregate(dictionary['stat'], 1)
+        self._on_dictionary_set_change()
+
+        return True
+
     def add_dictionary(self, file_path):
         """Adds dictionary (loaded from file) to the internal list
 
@@ -133,19 +685,130 @@ class CwGen:
         """
 
         # add only distinct file (verification based on file path)
-        for dictionary in self.dictionary_list:
-            if os.path.normpath(dictionary['path']) == os.path.normpath(file_path):
-                return False
-
-        # load data from file
-        new_dictionary = self._load_dictionary_from_file(file_path)
+        if self.is_dictionary_loaded(file_path):
+            return False
 
-        # add new dictionary if it contains data
-        if len(new_dictionary) > 0:
-            self.dictionary_list.append(new_dictionary)
+        # load data from file and add new dictionary if it contains data
+        self.add_loaded_dictionary(self._load_dictionary_from_file(file_path))
 
         return True
 
+    def load_dictionaries(self, file_paths, max_workers=None, progress_callback=None, cancel_event=None):
+        """Loads many dictionaries concurrently in a process pool
+            without adding them to the internal list.
+            Results are returned in file_paths order regardless of
+            the order in which files were parsed.
+
+        Args:
+            file_paths (list): Paths to the dictionary files
+            max_workers (int): Number of worker processes (None means CPU count)
+            progress_callback (callable): Called with (files_done, files_total)
+                each time a file gets loaded
+            cancel_event (threading.Event): Loading stops when set
+                (files already being parsed are finished anyway)
+
+        Returns:
+            list: list of dict (one per distinct file path)
+                'path': -> dictionary file path
+                'dictionary': -> as returned by load_dictionary() (None on error)
+                'error': -> error description (None when loaded)
+            None: when loading was cancelled
+        """
+
+        # drop repeated paths keeping the first occurrence
+        unique_paths = list(dict.fromkeys(
+            os.path.normpath(file_path) for file_path in file_paths))
+        results = [{'path': file_path, 'dictionary': None, 'error': None}
+                   for file_path in unique_paths]
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = min(max_workers, len(unique_paths))
+
+        if max_workers <= 1:
+            # no gain from worker processes
+            for files_done, result in enumerate(results, 1):
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                try:
+                    result['dictionary'] = self._load_dictionary_from_file(
+                        result['path'], cancel_event=cancel_event)
+                except (OSError, ValueError) as error:
+                    result['error'] = str(error)
+                if progress_callback is not None:
+                    progress_callback(files_done, len(results))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+                futures = {executor.submit(_load_dictionary_in_worker, result['path'],
+                                           self.dictionary_cache.cache_folder): result
+                           for result in results}
+                pending = set(futures)
+                while pending:
+                    done, pending = concurrent.futures.wait(
+                        pending, timeout=0.1, return_when=concurrent.futures.FIRST_COMPLETED)
+                    if cancel_event is not None and cancel_event.is_set():
+                        for future in pending:
+                            future.cancel()
+                        return None
+                    for future in done:
+                        try:
+                            futures[future]['dictionary'] = future.result()
+                        except (OSError, ValueError, RuntimeError) as error:
+                            futures[future]['error'] = str(error)
+                    if done and progress_callback is not None:
+                        progress_callback(
+                            len(futures) - len(pending), len(futures))
+
+            # UUIDs are generated in this process to keep them unique
+            for result in results:
+                if result['dictionary']:
+                    result['dictionary']['uuid'] = uuid.uuid1()
+
+        return results
+
+    def add_dictionaries(self, file_paths, max_workers=None):
+        """Adds many dictionaries (loaded concurrently from files) to the internal list
+            in file_paths order.
+
+        Args:
+            file_paths (list): Paths to the dictionary files
+            max_workers (int): Number of worker processes (None means CPU count)
+
+        Returns:
+            list: list of dict (one per distinct file path)
+                'path': -> dictionary file path
+                'status': -> 'added', 'duplicate' (already loaded),
+                    'empty' (no words found) or 'failed'
+                'error': -> error description for 'failed' status, None otherwise
+        """
+
+        report = []
+        paths_to_load = []
+
+        for file_path in dict.fromkeys(os.path.normpath(file_path) for file_path in file_paths):
+            if self.is_dictionary_loaded(file_path):
+                report.append(
+                    {'path': file_path, 'status': 'duplicate', 'error': None})
+            else:
+                report.append(
+                    {'path': file_path, 'status': 'failed', 'error': None})
+                paths_to_load.append(file_path)
+
+        results = {result['path']: result for result in self.load_dictionaries(
+            paths_to_load, max_workers)}
+
+        for file_report in report:
+            result = results.get(file_report['path'])
+            if result is None:
+                continue
+            if result['error'] is not None:
+                file_report['error'] = result['error']
+            elif self.add_loaded_dictionary(result['dictionary']):
+                file_report['status'] = 'added'
+            else:
+                file_report['status'] = 'empty'
+
+        return report
+
     def remove_dictionary(self, dictionary_uuid):
         """Removes dictionary from the internal list
             using UUID to select right one.
@@ -162,6 +825,10 @@ class CwGen:
         for index, dictionary in enumerate(self.dictionary_list):
             if dictionary['uuid'] == dictionary_uuid:
                 del self.dictionary_list[index]
+                self.word_index.remove(dictionary_uuid)
+                self.phrase_index.remove(dictionary_uuid)
+                self._update_words_stat_aggregate(dictionary['stat'], -1)
+                self._on_dictionary_set_change()
                 if_removed = True
                 break
 
@@ -169,6 +836,7 @@ class CwGen:
 
     def get_dictionaries_info(self):
         """Gets basic information of all loaded dictionaries
+            (statistics are copies, so caller may modify them)
 
         Args:
             None
@@ -178,6 +846,8 @@ class CwGen:
                 'uuid': -> dictionary uuid (generated for identification purposes)
                 'name': -> dictionary name
                 'stat': -> words statistics returned by _get_words_stat()
+                'phrases_stat': -> phrases statistics returned by _get_phrases_stat()
+                'report': -> load report (lines counts) as returned by _parse_dictionary_file()
         """
 
         dictionaries_info = []
@@ -186,11 +856,29 @@ class CwGen:
             data = {}
             data['uuid'] = dictionary['uuid']
             data['name'] = dictionary['name']
-            data['stat'] = self._get_words_stat(dictionary['data'])
+            data['stat'] = dictionary['stat'].copy()
+            if 'words_stat' in data['stat']:
+                data['stat']['words_stat'] = data['stat']['words_stat'].copy()
+            data['phrases_stat'] = dictionary.get('phrases_stat', {}).copy()
+            if 'phrases_stat' in data['phrases_stat']:
+                data['phrases_stat']['phrases_stat'] = data['phrases_stat']['phrases_stat'].copy()
+            data['report'] = dictionary.get('report', {}).copy()
             dictionaries_info.append(data)
 
         return dictionaries_info
 
+    def get_word_dictionaries(self, word):
+        """Gets UUIDs of loaded dictionaries containing the word
+
+        Args:
+            word (str): Word to look for (exact match)
+
+        Returns:
+            list: UUIDs of dictionaries containing the word
+        """
+
+        return self.word_index.get_word_dictionaries(word)
+
     def get_words_stat(self):
         """Gets aggregated statistics on words from all loaded dictionaries.
 
@@ -207,33 +895,10 @@ class CwGen:
                     words_by_key -> number of words having the same length
         """
 
-        words_info = {}
-        aggregated_words_stat = {}
-        words_count = 0
-        min_length = 1000
-        max_length = 0
-
-        for dictionary in self.dictionary_list:
-            single_stat = self._get_words_stat(dictionary['data'])
-
-            # aggregate data - if any
-            if single_stat:
-                words_count += single_stat['words_count']
-                if single_stat['min_length'] < min_length:
-                    min_length = single_stat['min_length']
-                if single_stat['max_length'] > max_length:
-                    max_length = single_stat['max_length']
-
-                for word_length, words_count in single_stat['words_stat'].items():
-                    aggregated_words_stat[word_length] = aggregated_words_stat.setdefault(
-                        word_length, 0) + words_count
-
-        # assemble information - if any
-        if words_count > 0:
-            words_info['words_count'] = words_count
-            words_info['min_length'] = min_length
-            words_info['max_length'] = max_length
-            words_info['words_stat'] = aggregated_words_stat
+        # aggregate is maintained on dictionary set change, caller gets a copy
+        words_info = self.words_info.copy()
+        if 'words_stat' in words_info:
+            words_info['words_stat'] = words_info['words_stat'].copy()
 
         return words_info
 
@@ -265,7 +930,9 @@ class CwGen:
         return self.training_generator_schemes
 
     def get_words_filtered(self, min_length, max_length, letters_set):
-        '''Gets words dictionary filtered by parameters
+        '''Gets distinct words of all loaded dictionaries filtered by parameters
+            (word present in many dictionaries is returned once).
+            Results are cached so returned data must not be modified.
 
         Args:
             min_length (int): Minimal words length
@@ -276,57 +943,34 @@ class CwGen:
         Returns:
             dict: Dictionary (key, value)
                     key: word length
-                    value (list): words list of the same length
+                    value (WordsBucket): words of the same length
         '''
 
-        words_filtered_dict = {}
-
         # parameters validation
         if min_length < 0 or max_length < min_length or max_length == 0:
-            return words_filtered_dict
+            return {}
         if letters_set not in self.letters_sets.keys():
-            return words_filtered_dict
+            return {}
 
-        # verify if letters wildcard is available
-        all_characters_mode = True if self.letters_sets[letters_set]['letters'][0] == '*' else False
+        return self._get_filter_cache_entry(min_length, max_length, letters_set)['words']
 
-        # letters set counter is assumed to have all values for each key == 1
-        # meaning no letter repeats in letters set definition
-        letters_set_counter = collections.Counter(
-            self.letters_sets[letters_set]['letters'].upper())
+    def get_filter_cache_info(self):
+        '''Gets filtering results cache statistics.
 
-        # aggregate and filter words from all loaded dictionaries
-        for dictionary in self.dictionary_list:
-            for word_len in dictionary['data'].keys():
-                # filter by words length
-                if word_len >= min_length and word_len <= max_length:
-                    # filter by character set
-                    if all_characters_mode:
-                        # for wildcard get eveything
-                        words_filtered_dict.setdefault(word_len, []).extend(
-                            dictionary['data'][word_len])
-                    else:
-                        # analyze word by word
-                        for word in dictionary['data'][word_len]:
-                            word_counter = collections.Counter(word.upper())
-                            # we expect result as word character count reduction by number
-                            # of all distinct characters that should be present in letters set
-                            expected_result = word_len - \
-                                len(word_counter.keys())
-                            distinct_letters_subtracted = word_counter - letters_set_counter
-                            result = 0 if not distinct_letters_subtracted.values() else sum(
-                                distinct_letters_subtracted.values())
-
-                            if result == expected_result:
-                                # update result with filtered word
-                                words_filtered_dict.setdefault(
-                                    word_len, []).append(word)
+        Args:
+            None
 
-        return words_filtered_dict
+        Returns:
+            dict: Dictionary as returned by helpers.LruCache.get_info()
+        '''
+
+        return self.filter_cache.get_info()
 
     def get_words_stat_filtered(self, min_length, max_length, letters_set, generator_scheme):
         """Gets words statistics on loaded dictionaries data filtered by parameters
             to visualize words set that can be used for training material generation.
+            Stat is summed up from distinct words counts per length and letters set
+            maintained by the index, so no words are filtered.
 
         Args:
             min_length (int): Minimal words length
@@ -350,15 +994,172 @@ class CwGen:
         if generator_scheme not in self.training_generator_schemes.keys():
             return words_stat
 
-        words_filtered = self.get_words_filtered(
-            min_length, max_length, letters_set)
-        if not words_filtered:
-            return words_stat
+        matching_counts = self.word_index.get_matching_counts(
+            self.letters_sets_indexes[letters_set])
+        words_stat_by_length = {word_length: words_count for word_length, words_count in sorted(matching_counts.items())
+                                if word_length >= min_length and word_length <= max_length}
 
-        words_stat = self._get_words_stat(words_filtered)
+        if words_stat_by_length:
+            words_stat['words_count'] = sum(words_stat_by_length.values())
+            words_stat['min_length'] = min(words_stat_by_length)
+            words_stat['max_length'] = max(words_stat_by_length)
+            words_stat['words_stat'] = words_stat_by_length
 
         return words_stat
 
+    def get_phrases_filtered(self, min_length, max_length, letters_set):
+        '''Gets distinct phrases of all loaded dictionaries filtered by parameters
+            (phrase present in many dictionaries is returned once).
+            Phrase length is its characters count (spaces excluded).
+            Results are cached so returned data must not be modified.
+
+        Args:
+            min_length (int): Minimal phrase characters count
+            max_length (int): Maximal phrase characters count
+            letters_set (str): Id of the letters set out of which phrases could be made up
+                (check self.letters_sets)
+
+        Returns:
+            dict: Dictionary (key, value)
+                    key: (characters count, words count)
+                    value (WordsBucket): phrases (words separated with single space)
+        '''
+
+        # parameters validation
+        if min_length < 0 or max_length < min_length or max_length == 0:
+            return {}
+        if letters_set not in self.letters_sets.keys():
+            return {}
+
+        # phrases are cached along with words filtered by the same parameters
+        return self._get_filter_cache_entry(min_length, max_length, letters_set, True)['phrases']
+
+    def get_phrases_stat(self):
+        '''Gets statistics on distinct phrases from all loaded dictionaries.
+            Cost depends on number of phrase buckets only.
+
+        Args:
+            None
+
+        Returns:
+            dict: Dictionary (as returned by _get_phrases_stat())
+        '''
+
+        return self._get_phrases_stat(self.phrase_index.get_words_counts())
+
+    def get_phrases_stat_filtered(self, min_length, max_length, letters_set):
+        '''Gets statistics on distinct phrases of all loaded dictionaries
+            filtered by parameters (see get_phrases_filtered()).
+
+        Args:
+            min_length (int): Minimal phrase characters count
+            max_length (int): Maximal phrase characters count
+            letters_set (str): Id of the letters set out of which phrases could be made up
+                (check self.letters_sets)
+
+        Returns:
+            dict: Dictionary (as returned by _get_phrases_stat())
+        '''
+
+        return self._get_phrases_stat(self.get_phrases_filtered(min_length, max_length, letters_set))
+
+    def generate_training_words(self, min_length, max_length, letters_set, generator_scheme, words_count, seed=None):
+        """Generates training words sequence out of loaded dictionaries data
+            filtered by parameters. Sampling tables are cached along with
+            filtering results so generation cost depends on words_count only.
+
+        Args:
+            min_length (int): Minimal words length
+            max_length (int): Maximal words length
+            letters_set (str): Id of the letters set out of which words could be made up
+                (check self.letters_sets)
+            generator_scheme (str): Id of the generator scheme to use
+                (check self.training_generator_schemes)
+            words_count (int): Number of words to generate
+                ('all' scheme returns no more words than available)
+            seed (int): Random generator seed (None for non reproducible sequence)
+
+        Returns:
+            list: Words sequence (empty when no words match parameters)
+        """
+
+        # parameters validation
+        if min_length < 0 or max_length < min_length or max_length == 0:
+            return []
+        if letters_set not in self.letters_sets.keys():
+            return []
+        if generator_scheme not in self.training_generator_schemes.keys():
+            return []
+
+        sampler = self._get_words_sampler(
+            min_length, max_length, letters_set, generator_scheme)
+        if sampler is None:
+            return []
+
+        return sampler.sample(words_count, random.Random(seed))
+
+    def generate_training_sets(self, specs):
+        """Generates many independent training words sequences.
+            Specs are processed grouped by their filtering parameters
+            so each filtered words pool is built once per group. Pools stay
+            in the filtering results cache (bounded by filter_cache_size bytes)
+            until evicted by pools of later groups. Sequences are yielded one
+            by one (tagged with spec index), so apart from the cache memory use
+            depends on the largest sequence ('all' scheme copies whole pool).
+
+        Args:
+            specs (iterable): dict with training set parameters
+                'letters_set' -> Id of the letters set (check self.letters_sets)
+                'min_length' -> Minimal words length
+                'max_length' -> Maximal words length
+                'words_count' -> Number of words to generate
+                'generator_scheme' -> (optional, 'rand' by default) Id of the generator scheme
+                    (check self.training_generator_schemes)
+                'seed' -> (optional) Random generator seed
+
+        Returns:
+            generator: dict for every spec (grouped by filtering parameters)
+                'index' -> spec index in specs
+                'spec' -> spec itself
+                'words' -> words sequence as returned by generate_training_words()
+        """
+
+        specs = list(specs)
+        order = sorted(range(len(specs)), key=lambda index: (
+            specs[index]['min_length'], specs[index]['max_length'], specs[index]['letters_set']))
+
+        for index in order:
+            spec = specs[index]
+            words = self.generate_training_words(spec['min_length'], spec['max_length'], spec['letters_set'],
+                                                 spec.get('generator_scheme', 'rand'), spec['words_count'],
+                                                 spec.get('seed'))
+            yield {'index': index, 'spec': spec, 'words': words}
+
+    def _get_words_sampler(self, min_length, max_length, letters_set, generator_scheme):
+        """Gets (cached) sampler of words filtered by parameters.
+
+        Args:
+            min_length (int): Minimal words length
+            max_length (int): Maximal words length
+            letters_set (str): Id of the letters set (already validated)
+            generator_scheme (str): Id of the generator scheme (already validated)
+
+        Returns:
+            WordsSampler: Sampler or None when no words match parameters
+        """
+
+        entry = self._get_filter_cache_entry(
+            min_length, max_length, letters_set)
+        if not entry['words']:
+            return None
+
+        samplers = entry.setdefault('samplers', {})
+        if generator_scheme not in samplers:
+            samplers[generator_scheme] = sampling.WordsSampler(
+                entry['words'], generator_scheme)
+
+        return samplers[generator_scheme]
+
     def get_ebook2cw_version_online(self):
         """Gets online ebook2cw version.
 
@@ -383,22 +1184,584 @@ class CwGen:
 
         return self.e2cw.get_executable_version_local()
 
-    def get_ebook2cw(self, force_latest):
+    def get_ebook2cw(self, force_latest, progress_callback=None):
         """Downloads proper version of the ebook2cw
             performing MD5 verification for integrity check.
 
         Args:
-            None
+            force_latest (bool): Forces to download latest version
+                regardless if local copy exist or not
+            progress_callback (function): Called with (bytes_done, bytes_total)
+                while executable is being downloaded (bytes_total is 0 when not known)
 
         Returns:
             bool: True when executable was downloaded, False otherwise
         """
-        return self.e2cw.get_executable(force_latest)
+        return self.e2cw.get_executable(force_latest, progress_callback)
+
+    def render_with_ebook2cw(self, text_file_path, output_base_path, wpm, farns, pitch, timeout=None):
+        """Renders text file to audio using ebook2cw.
+
+        Args:
+            text_file_path (str): Path to the text file (ISO-8859-1 encoded)
+            output_base_path (str): Path prefix of resulting audio file
+            wpm (int): Characters speed in words per minute
+            farns (int): Effective (Farnsworth) speed in words per minute
+            pitch (int): Tone frequency in Hz
+            timeout (float): Maximal rendering time in seconds (None for no limit)
+
+        Returns:
+            bool: True when audio was rendered, False otherwise
+        """
+
+        return self.e2cw.render(text_file_path, output_base_path, wpm, farns, pitch, timeout)
+
+    def get_ebook2cw_render_scheduler(self, max_workers=None, timeout=None, retries=1):
+        """Creates scheduler rendering many texts with concurrent ebook2cw processes.
+
+        Args:
+            max_workers (int): Maximal number of concurrent ebook2cw processes
+                (None means CPU count)
+            timeout (float): Maximal single rendering time in seconds (None for no limit)
+            retries (int): Number of additional attempts for failed job
+
+        Returns:
+            RenderScheduler: Scheduler (check ebook2cw.RenderScheduler.run())
+                using rendered audio cache (when enabled)
+        """
+
+        return e2cw.RenderScheduler(self.e2cw, max_workers, timeout, retries, self.audio_cache)
+
+    def get_audio_cache_info(self):
+        """Gets rendered audio cache statistics.
+
+        Args:
+            None
+
+        Returns:
+            dict: Dictionary as returned by AudioCache.get_info()
+                (empty when cache is disabled)
+        """
+
+        if self.audio_cache is None:
+            return {}
+
+        return self.audio_cache.get_info()
+
+    def get_synthesizer_backends(self):
+        """Gets names of available in-process audio synthesizer backends.
+
+        Args:
+            None
+
+        Returns:
+            list: Backend names ('numpy' only when numpy is installed)
+        """
+
+        return list(cwaudio.SYNTHESIZERS.keys())
+
+    def _get_synthesizer(self, wpm, farns, pitch, backend='python'):
+        """Gets (cached) in-process synthesizer for audible parameters.
+
+        Args:
+            wpm (int): Characters speed in words per minute
+            farns (int): Effective (Farnsworth) speed in words per minute
+            pitch (int): Tone frequency in Hz
+            backend (str): Synthesizer backend name (see get_synthesizer_backends())
+
+        Returns:
+            PcmSynthesizer: Synthesizer
+        """
+
+        key = (backend, wpm, farns, pitch)
+        synthesizer = self.synthesizers.get(key)
+        if synthesizer is None:
+            synthesizer = cwaudio.SYNTHESIZERS[backend](wpm, farns, pitch)
+            self.synthesizers.put(key, synthesizer)
+
+        return synthesizer
+
+    def write_training_wav(self, words, file_path, wpm, farns, pitch, backend='python', use_snippets=True):
+        """Writes training words audio as WAV file synthesized in-process.
+            With snippets words audio is assembled out of cached per word
+            PCM snippets (each distinct word is rendered once per audible
+            parameters set), otherwise whole text is rendered at once.
+
+        Args:
+            words (iterable): Words sequence
+            file_path (str): Path to the resulting WAV file
+            wpm (int): Characters speed in words per minute
+            farns (int): Effective (Farnsworth) speed in words per minute
+            pitch (int): Tone frequency in Hz
+            backend (str): Synthesizer backend name (see get_synthesizer_backends())
+            use_snippets (bool): Assemble audio out of cached words snippets
+
+        Returns:
+            None
+        """
+
+        synthesizer = self._get_synthesizer(wpm, farns, pitch, backend)
+        if use_snippets:
+            self.snippet_cache.write_wav(synthesizer, words, file_path)
+        else:
+            synthesizer.write_wav(words, file_path)
+
+    def stream_training_audio(self, words, wpm, farns, pitch, chunk_size=cwaudio.CHUNK_SIZE,
+                              backend='python', use_snippets=False):
+        """Streams training words audio synthesized in-process as fixed size
+            PCM chunks (16-bit mono, see get_training_audio_format()).
+            Words are consumed lazily, so playback may start as soon as
+            the first chunk is yielded. Without snippets memory stays bounded
+            regardless of session length, with snippets rendered words are
+            kept in the snippets cache as well (up to its size limit).
+
+        Args:
+            words (iterable): Words sequence (may be a generator)
+            wpm (int): Characters speed in words per minute
+            farns (int): Effective (Farnsworth) speed in words per minute
+            pitch (int): Tone frequency in Hz
+            chunk_size (int): Size of yielded chunks in bytes (multiple of 2)
+            backend (str): Synthesizer backend name (see get_synthesizer_backends())
+            use_snippets (bool): Assemble audio out of cached words snippets
+                (faster for small vocabulary at the cost of cache memory)
+
+        Returns:
+            generator: bytes chunks of PCM samples (the last one may be shorter)
+        """
+
+        synthesizer = self._get_synthesizer(wpm, farns, pitch, backend)
+        if use_snippets:
+            return self.snippet_cache.stream(synthesizer, words, chunk_size)
+
+        return synthesizer.stream(words, chunk_size)
 
+    def get_training_audio_format(self, wpm, farns, pitch, backend='python'):
+        """Gets format of audio produced by stream_training_audio().
+
+        Args:
+            wpm (int): Characters speed in words per minute
+            farns (int): Effective (Farnsworth) speed in words per minute
+            pitch (int): Tone frequency in Hz
+            backend (str): Synthesizer backend name (see get_synthesizer_backends())
+
+        Returns:
+            dict: Dictionary
+                'sample_rate' -> samples per second
+                'sample_width' -> bytes per sample (little endian signed)
+                'channels' -> number of channels
+                'wav_header' -> WAV header for stream of unknown length
+        """
+
+        sample_rate = self._get_synthesizer(
+            wpm, farns, pitch, backend).sample_rate
+
+        return {'sample_rate': sample_rate,
+                'sample_width': cwaudio.SAMPLE_WIDTH,
+                'channels': 1,
+                'wav_header': cwaudio.get_wav_header(sample_rate)}
+
+    def enable_instrumentation(self):
+        """Starts measuring calls count, latencies and items scanned / returned
+            of dictionary loading (load_dictionary, add_loaded_dictionary used by
+            the GUI and add_dictionaries used by batch mode), get_words_filtered,
+            get_words_stat_filtered, get_dictionaries_info and ebook2cw version probes.
+            Methods are wrapped only while instrumentation is enabled.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        if self.instrumentation is not None:
+            return
+
+        def get_words_scanned(cw_gen):
+            return cw_gen.words_scanned
+
+        def get_words_loaded(cw_gen):
+            # dictionary without words is not added, so only loaded words tell what was added
+            return sum(dictionary['stat'].get('words_count', 0) for dictionary in cw_gen.dictionary_list)
+
+        def get_dictionary_words(cw_gen, dictionary):
+            # empty dictionary is returned when file has no words or loading was cancelled
+            return dictionary.get('stat', {}).get('words_count', 0)
+
+        def get_words_returned(cw_gen, words_dictionary):
+            return sum(len(bucket) for bucket in words_dictionary.values())
+
+        def get_words_counted(cw_gen, stat):
+            return stat.get('words_count', 0)
+
+        def get_items_count(instance, items):
+            return len(items)
+
+        self.instrumentation = instrumentation.Instrumentation()
+        self.instrumentation.instrument(
+            self, 'load_dictionary', get_returned=get_dictionary_words)
+        self.instrumentation.instrument(
+            self, 'add_loaded_dictionary', get_returned_total=get_words_loaded)
+        self.instrumentation.instrument(
+            self, 'add_dictionaries', get_returned_total=get_words_loaded)
+        self.instrumentation.instrument(
+            self, 'get_words_filtered', get_words_scanned, get_words_returned)
+        self.instrumentation.instrument(
+            self, 'get_words_stat_filtered', get_words_scanned, get_words_counted)
+        self.instrumentation.instrument(
+            self, 'get_dictionaries_info', get_returned=get_items_count)
+        self.instrumentation.instrument(
+            self.e2cw, 'get_executable_version_local')
+        self.instrumentation.instrument(
+            self.e2cw, 'get_executable_version_online')
+
+    def disable_instrumentation(self):
+        """Stops measuring methods restoring them intact.
+
+        Args:
+            None
+
+        Returns:
+            dict: Statistics collected so far (see get_instrumentation_stats())
+        """
+
+        if self.instrumentation is None:
+            return {}
+
+        stats = self.instrumentation.get_stats()
+        self.instrumentation.restore()
+        self.instrumentation = None
+
+        return stats
+
+    def get_instrumentation_stats(self):
+        """Gets statistics of measured methods.
+
+        Args:
+            None
+
+        Returns:
+            dict: Dictionary as returned by instrumentation.Instrumentation.get_stats()
+                (empty when instrumentation is disabled)
+        """
+
+        if self.instrumentation is None:
+            return {}
+
+        return self.instrumentation.get_stats()
+
+    def dump_instrumentation_stats(self, file_path):
+        """Writes statistics of measured methods to JSON file.
+
+        Args:
+            file_path (str): Path to the resulting file
+
+        Returns:
+            bool: True when file was written, False otherwise
+        """
+
+        if self.instrumentation is None:
+            return False
+
+        try:
+            self.instrumentation.dump_json(file_path)
+        except OSError:
+            return False
+
+        return True
+
+    def profile_call(self, method_name, *args, **kwargs):
+        """Runs single call of a method under cProfile.
+
+        Args:
+            method_name (str): Name of CwGen method (e.g. 'get_words_filtered')
+            *args: Method positional arguments
+            **kwargs: Method keyword arguments
+
+        Returns:
+            tuple: (method result, pstats.Stats of the call)
+        """
+
+        return instrumentation.profile_call(getattr(self, method_name), *args, **kwargs)
+
+
+# command line exit statuses
+EXIT_OK = 0
+EXIT_JOB_FAILED = 1
+EXIT_USAGE_ERROR = 2
+
+# job parameters used when neither job nor job file defaults specify them
+JOB_DEFAULTS = {
+    'letters_set': 'all',
+    'min_length': 1,
+    'max_length': 100,
+    'generator_scheme': 'rand',
+    'words_count': 100,
+    'seed': None,
+    'audio': True,
+    'wpm': 25,
+    'farns': 0,
+    'pitch': 600,
+}
+
+# job parameters types and minimal values (bool is not accepted as int)
+JOB_INT_MINIMUMS = {
+    'min_length': 1,
+    'max_length': 1,
+    'words_count': 1,
+    'wpm': 1,
+    'farns': 0,
+    'pitch': 1,
+}
+
+
+def validate_job(job, letters_sets=None, generator_schemes=None):
+    """Checks batch job parameters so invalid job file is reported
+        before any dictionary gets loaded.
+
+    Args:
+        job (dict): Job having all JOB_DEFAULTS keys and 'name'
+        letters_sets (collection): Known letters sets ids (None skips the check)
+        generator_schemes (collection): Known generator schemes ids (None skips the check)
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: When a parameter has wrong type or value
+    """
+
+    name = job['name']
+    if not isinstance(name, str) or not name or os.path.basename(name) != name:
+        raise ValueError('Job name {!r} is not a valid file name'.format(name))
+
+    for key, minimum in JOB_INT_MINIMUMS.items():
+        value = job[key]
+        if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+            raise ValueError('Job {}: {} must be an integer >= {}, got {!r}'.format(
+                name, key, minimum, value))
+    if job['min_length'] > job['max_length']:
+        raise ValueError('Job {}: min_length is greater than max_length'.format(name))
+
+    if not isinstance(job['letters_set'], str) or \
+            (letters_sets is not None and job['letters_set'] not in letters_sets):
+        raise ValueError('Job {}: unknown letters_set {!r}'.format(name, job['letters_set']))
+    if not isinstance(job['generator_scheme'], str) or \
+            (generator_schemes is not None and job['generator_scheme'] not in generator_schemes):
+        raise ValueError('Job {}: unknown generator_scheme {!r}'.format(
+            name, job['generator_scheme']))
+    if job['seed'] is not None and (not isinstance(job['seed'], (int, str)) or isinstance(job['seed'], bool)):
+        raise ValueError('Job {}: seed must be an integer or a string'.format(name))
+    if not isinstance(job['audio'], bool):
+        raise ValueError('Job {}: audio must be true or false'.format(name))
+
+
+def read_job_file(file_path, letters_sets=None, generator_schemes=None):
+    """Reads batch job file (JSON) validating its content.
+        Relative paths are resolved against job file location.
+
+    Example:
+        {
+            "dictionaries": ["words.txt"],
+            "output_folder": "training",
+            "defaults": {"min_length": 2, "max_length": 6, "wpm": 20},
+            "jobs": [
+                {"name": "student1-cwo3", "letters_set": "cwo3", "words_count": 200, "seed": 1},
+                {"name": "student2-all", "generator_scheme": "short", "audio": false}
+            ]
+        }
 
-def main():
-    print("To be implemented...")
+    Args:
+        file_path (str): Path to the job file
+        letters_sets (collection): Known letters sets ids (None skips the check)
+        generator_schemes (collection): Known generator schemes ids (None skips the check)
+
+    Returns:
+        dict: Dictionary
+            'dictionaries' -> list of dictionary files paths
+            'output_folder' -> folder for generated files
+            'jobs' -> list of dict, each having all JOB_DEFAULTS keys and 'name'
+
+    Raises:
+        ValueError: When job file content is not valid (see validate_job())
+    """
+
+    with open(file_path, mode="r", encoding="utf-8") as job_file:
+        job_data = json.load(job_file)
+
+    if not isinstance(job_data, dict):
+        raise ValueError('Job file must contain an object')
+    dictionaries = job_data.get('dictionaries', [])
+    if not isinstance(dictionaries, list) or not all(isinstance(path, str) for path in dictionaries):
+        raise ValueError('dictionaries must be a list of paths')
+    output_folder = job_data.get('output_folder', '.')
+    if not isinstance(output_folder, str):
+        raise ValueError('output_folder must be a path')
+    if not isinstance(job_data.get('defaults', {}), dict) or not isinstance(job_data.get('jobs', []), list):
+        raise ValueError('defaults must be an object and jobs a list of objects')
+
+    base_folder = os.path.dirname(os.path.abspath(file_path))
+    defaults = dict(JOB_DEFAULTS)
+    defaults.update(job_data.get('defaults', {}))
+
+    jobs = []
+    for index, job_spec in enumerate(job_data.get('jobs', [])):
+        if not isinstance(job_spec, dict):
+            raise ValueError('Job {} is not an object'.format(index))
+        job = dict(defaults)
+        job.update(job_spec)
+        job.setdefault('name', 'job{:04d}'.format(index))
+        validate_job(job, letters_sets, generator_schemes)
+        jobs.append(job)
+
+    names = [job['name'] for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError('Job names are not unique')
+
+    return {'dictionaries': [os.path.join(base_folder, path) for path in dictionaries],
+            'output_folder': os.path.join(base_folder, output_folder),
+            'jobs': jobs}
+
+
+def main(argv=None):
+    """Command line batch mode: generates training text (and audio)
+        files for all jobs from a job file.
+
+    Args:
+        argv (list): Command line arguments (None for sys.argv)
+
+    Returns:
+        int: Exit status (EXIT_OK, EXIT_JOB_FAILED or EXIT_USAGE_ERROR)
+    """
+
+    parser = argparse.ArgumentParser(
+        description='CW training material generator - batch mode')
+    parser.add_argument('job_file', help='JSON file describing jobs to run')
+    parser.add_argument('-d', '--dictionary', action='append', default=[],
+                        help='additional dictionary file (may be repeated)')
+    parser.add_argument('-o', '--output-folder',
+                        help='output folder (overrides job file setting)')
+    parser.add_argument('--no-audio', action='store_true',
+                        help='generate training text files only')
+    parser.add_argument('--renderer', choices=['ebook2cw', 'snippets', 'numpy'], default='ebook2cw',
+                        help='ebook2cw (MP3), in-process words snippets assembly (WAV) '
+                        'or in-process NumPy synthesis (WAV, requires numpy)')
+    parser.add_argument('--render-workers', type=int,
+                        help='concurrent ebook2cw processes (CPU count by default)')
+    parser.add_argument('--render-timeout', type=float,
+                        help='ebook2cw single run time limit in seconds')
+    parser.add_argument('--render-retries', type=int, default=1,
+                        help='additional ebook2cw runs for failed job (default: 1)')
+    parser.add_argument('--audio-cache-size', type=int, default=512,
+                        help='rendered audio cache size limit in MB, 0 disables it (default: 512)')
+    args = parser.parse_args(argv)
+
+    cw_gen = CwGen(audio_cache_size=args.audio_cache_size * 1024 * 1024)
+
+    try:
+        job_file = read_job_file(args.job_file, cw_gen.get_letters_sets(),
+                                 cw_gen.get_training_generator_schemes())
+    except (OSError, ValueError) as error:
+        print('Invalid job file: {}'.format(error), file=sys.stderr)
+        return EXIT_USAGE_ERROR
+
+    output_folder = args.output_folder or job_file['output_folder']
+    dictionaries = job_file['dictionaries'] + args.dictionary
+    if not dictionaries or not job_file['jobs']:
+        print('No dictionaries or no jobs defined', file=sys.stderr)
+        return EXIT_USAGE_ERROR
+
+    exit_status = EXIT_OK
+
+    for file_report in cw_gen.add_dictionaries(dictionaries):
+        if file_report['status'] == 'failed':
+            print('Dictionary {} not loaded: {}'.format(
+                file_report['path'], file_report['error']), file=sys.stderr)
+            exit_status = EXIT_JOB_FAILED
+
+    # single aggregated load report line per dictionary
+    for dictionary_info in cw_gen.get_dictionaries_info():
+        report = dictionary_info['report']
+        print('Dictionary {}: {} words, {} phrases, {} lines ignored'.format(
+            dictionary_info['name'], report.get('words', 0), report.get('phrases', 0), report.get('ignored', 0)))
+
+    is_audio_needed = not args.no_audio and any(
+        job['audio'] for job in job_file['jobs'])
+    renderer = args.renderer
+    if is_audio_needed and renderer == 'numpy' and 'numpy' not in cw_gen.get_synthesizer_backends():
+        print('numpy is not installed, using snippets renderer', file=sys.stderr)
+        renderer = 'snippets'
+    is_ebook2cw_needed = is_audio_needed and renderer == 'ebook2cw'
+    is_ebook2cw_available = is_ebook2cw_needed and cw_gen.get_ebook2cw(False)
+    if is_ebook2cw_needed and not is_ebook2cw_available:
+        print('ebook2cw is not available, audio will not be generated', file=sys.stderr)
+
+    os.makedirs(output_folder, exist_ok=True)
+
+    def write_training_texts():
+        """Writes training text files yielding audio rendering jobs"""
+
+        nonlocal exit_status
+
+        for result in cw_gen.generate_training_sets(job_file['jobs']):
+            job = result['spec']
+            if not result['words']:
+                print('Job {}: no words match parameters'.format(
+                    job['name']), file=sys.stderr)
+                exit_status = EXIT_JOB_FAILED
+                continue
+
+            text_file_path = os.path.join(output_folder, job['name'] + '.txt')
+            with open(text_file_path, mode="w", encoding="ISO-8859-1") as text_file:
+                text_file.write(' '.join(result['words']) + '\n')
+            print('Job {}: {} words written to {}'.format(
+                job['name'], len(result['words']), text_file_path))
+
+            if is_audio_needed and job['audio'] and renderer != 'ebook2cw':
+                wav_file_path = os.path.join(
+                    output_folder, job['name'] + '.wav')
+                if renderer == 'numpy':
+                    cw_gen.write_training_wav(
+                        result['words'], wav_file_path, job['wpm'], job['farns'], job['pitch'], 'numpy', False)
+                else:
+                    cw_gen.write_training_wav(
+                        result['words'], wav_file_path, job['wpm'], job['farns'], job['pitch'])
+                print('Job {}: audio written to {}'.format(
+                    job['name'], wav_file_path))
+            elif is_ebook2cw_available and job['audio']:
+                yield {'name': job['name'],
+                       'text_file_path': text_file_path,
+                       'output_base_path': os.path.join(output_folder, job['name']),
+                       'wpm': job['wpm'],
+                       'farns': job['farns'],
+                       'pitch': job['pitch']}
+
+    # texts are written while already generated ones are being rendered
+    scheduler = cw_gen.get_ebook2cw_render_scheduler(
+        args.render_workers, args.render_timeout, args.render_retries)
+    for render_result in scheduler.run(write_training_texts()):
+        if render_result['cached']:
+            print('Job {}: audio taken from cache'.format(
+                render_result['job']['name']))
+        elif render_result['success']:
+            print('Job {}: audio rendered in {:.2f} s'.format(
+                render_result['job']['name'], render_result['run_time']))
+        else:
+            print('Job {}: audio not rendered'.format(
+                render_result['job']['name']), file=sys.stderr)
+            exit_status = EXIT_JOB_FAILED
+
+    statistics = scheduler.get_statistics()
+    if statistics['jobs'] > 0:
+        print('Finished {} rendering jobs in {:.2f} s (latency mean {:.2f} s, max {:.2f} s)'.format(
+            statistics['jobs'], statistics['batch_time'], statistics['latency_mean'], statistics['latency_max']))
+        audio_cache_info = cw_gen.get_audio_cache_info()
+        if audio_cache_info:
+            print('Audio cache hit rate {:.0%} ({} hits, {} misses)'.format(
+                audio_cache_info['hit_rate'], audio_cache_info['hits'], audio_cache_info['misses']))
+
+    return exit_status
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,223 @@
+import wordsbucket
+import array
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+
+class DictionaryCache:
+    """Class handling on-disk cache of compiled (already parsed) dictionaries.
+        Single cache file holds all words length buckets of a dictionary
+        followed by its phrases buckets, each being WordsBucket data followed
+        by its characters masks. Load report and words counts matching
+        letters sets are kept in the header.
+    """
+
+    # format version 2 added phrases and load report, 3 matching words counts
+    MAGIC = b'CWGENDC3'
+    HEADER_SIZE_FORMAT = '<I'
+    FILE_EXTENSION = '.cwd'
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, cache_folder):
+        """Class initialization
+
+        Args:
+            cache_folder (str): Folder where compiled dictionaries are stored
+        """
+
+        self.cache_folder = os.path.normpath(cache_folder)
+
+    def _get_entry_path(self, file_path):
+        """Gets cache file path related to the dictionary file.
+
+        Args:
+            file_path (str): Path to the dictionary file
+
+        Returns:
+            str: Path to the cache file
+        """
+
+        path_hash = hashlib.md5(os.path.normcase(os.path.abspath(
+            file_path)).encode('utf-8')).hexdigest()
+
+        return os.path.join(self.cache_folder, path_hash + self.FILE_EXTENSION)
+
+    def get_file_identity(self, file_path):
+        """Gets data identifying dictionary file content.
+
+        Args:
+            file_path (str): Path to the dictionary file
+
+        Returns:
+            dict: Dictionary
+                'path' -> absolute file path
+                'size' -> file size in bytes
+                'mtime_ns' -> file modification time in nanoseconds
+                'md5' -> HEX representation of file content MD5 hash
+        """
+
+        file_stat = os.stat(file_path)
+        hash_md5 = hashlib.md5()
+        with open(file_path, "rb") as f:
+            for data_chunk in iter(lambda: f.read(self.HASH_CHUNK_SIZE), b""):
+                hash_md5.update(data_chunk)
+
+        return {'path': os.path.abspath(file_path),
+                'size': file_stat.st_size,
+                'mtime_ns': file_stat.st_mtime_ns,
+                'md5': hash_md5.hexdigest()}
+
+    def _is_entry_fresh(self, header, file_path):
+        """Verifies cache entry header against current dictionary file state.
+            Cheap stat based checks go first, content hash is calculated
+            only when they pass.
+
+        Args:
+            header (dict): Cache entry header
+            file_path (str): Path to the dictionary file
+
+        Returns:
+            bool: True when cache entry describes current file content
+        """
+
+        file_stat = os.stat(file_path)
+        if header['path'] != os.path.abspath(file_path) or \
+                header['size'] != file_stat.st_size or \
+                header['mtime_ns'] != file_stat.st_mtime_ns:
+            return False
+
+        return header['md5'] == self.get_file_identity(file_path)['md5']
+
+    def load(self, file_path):
+        """Loads compiled dictionary data with a single memory-mapped read.
+            Missing, stale or corrupted entries are reported as not cached.
+
+        Args:
+            file_path (str): Path to the dictionary file
+
+        Returns:
+            dict: Parsed dictionary as returned by CwGen._parse_dictionary_file()
+                or None when not cached
+        """
+
+        entry_path = self._get_entry_path(file_path)
+        if not os.path.isfile(entry_path):
+            return None
+
+        try:
+            with open(entry_path, "rb") as entry_file, \
+                    mmap.mmap(entry_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return self._parse_entry(data, file_path)
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return None
+
+    def _parse_entry(self, data, file_path):
+        """Parses cache entry data.
+
+        Args:
+            data (mmap): Cache entry content
+            file_path (str): Path to the dictionary file
+
+        Returns:
+            dict: As returned by load()
+        """
+
+        magic_size = len(self.MAGIC)
+        header_size_size = struct.calcsize(self.HEADER_SIZE_FORMAT)
+        if data[:magic_size] != self.MAGIC:
+            return None
+        header_size = struct.unpack_from(
+            self.HEADER_SIZE_FORMAT, data, magic_size)[0]
+        offset = magic_size + header_size_size
+        header = json.loads(data[offset:offset + header_size].decode('utf-8'))
+        offset += header_size
+
+        if header['byteorder'] != sys.byteorder or \
+                header['masks_typecode'] != wordsbucket.MASKS_TYPECODE:
+            return None
+        if not self._is_entry_fresh(header, file_path):
+            return None
+
+        parsed_dictionary = {'words': {}, 'phrases': {},
+                             'report': header['report'],
+                             'matching_counts': {rejected_mask: {word_length: words_count for word_length, words_count in counts}
+                                                 for rejected_mask, counts in header['matching_counts']}}
+        mask_size = array.array(wordsbucket.MASKS_TYPECODE).itemsize
+        # phrases of the same characters and words count have the same length (words + spaces)
+        buckets = [('words', word_length, word_length, words_count)
+                   for word_length, words_count in header['buckets']]
+        buckets += [('phrases', (characters_count, phrase_words_count), characters_count + phrase_words_count - 1, phrases_count)
+                    for characters_count, phrase_words_count, phrases_count in header['phrase_buckets']]
+        for kind, key, word_length, words_count in buckets:
+            words_size = word_length * words_count
+            masks_size = mask_size * words_count
+            if word_length <= 0 or offset + words_size + masks_size > len(data):
+                raise ValueError('Invalid cache entry bucket')
+
+            words = data[offset:offset + words_size]
+            offset += words_size
+            masks = array.array(wordsbucket.MASKS_TYPECODE)
+            masks.frombytes(data[offset:offset + masks_size])
+            offset += masks_size
+
+            parsed_dictionary[kind][key] = wordsbucket.WordsBucket(
+                word_length, words, masks)
+
+        if offset != len(data):
+            raise ValueError('Unexpected cache entry size')
+
+        return parsed_dictionary
+
+    def store(self, file_identity, parsed_dictionary):
+        """Stores compiled dictionary data. Entry is written to a temporary
+            file first and then replaces the old one so readers never
+            see partially written data. Write errors are ignored
+            (cache is just an optimization).
+
+        Args:
+            file_identity (dict): As returned by get_file_identity()
+                (taken before dictionary file was parsed)
+            parsed_dictionary (dict): As returned by CwGen._parse_dictionary_file()
+
+        Returns:
+            bool: True when entry was stored, False otherwise
+        """
+
+        header = dict(file_identity)
+        header['byteorder'] = sys.byteorder
+        header['masks_typecode'] = wordsbucket.MASKS_TYPECODE
+        header['buckets'] = [[word_length, len(words)]
+                             for word_length, words in sorted(parsed_dictionary['words'].items())]
+        header['phrase_buckets'] = [[characters_count, phrase_words_count, len(phrases)]
+                                    for (characters_count, phrase_words_count), phrases in sorted(parsed_dictionary['phrases'].items())]
+        header['report'] = parsed_dictionary['report']
+        header['matching_counts'] = [[rejected_mask, sorted(counts.items())]
+                                     for rejected_mask, counts in parsed_dictionary.get('matching_counts', {}).items()]
+        header_data = json.dumps(header).encode('utf-8')
+
+        entry_path = self._get_entry_path(file_identity['path'])
+        temp_entry_path = entry_path + '_tmp'
+        try:
+            if not os.path.exists(self.cache_folder):
+                os.makedirs(self.cache_folder)
+            with open(temp_entry_path, "wb") as entry_file:
+                entry_file.write(self.MAGIC)
+                entry_file.write(struct.pack(
+                    self.HEADER_SIZE_FORMAT, len(header_data)))
+                entry_file.write(header_data)
+                buckets = [parsed_dictionary['words'][word_length]
+                           for word_length, _words_count in header['buckets']]
+                buckets += [parsed_dictionary['phrases'][(characters_count, phrase_words_count)]
+                            for characters_count, phrase_words_count, _phrases_count in header['phrase_buckets']]
+                for bucket in buckets:
+                    entry_file.write(bucket.data)
+                    entry_file.write(bucket.masks.tobytes())
+            os.replace(temp_entry_path, entry_path)
+        except OSError:
+            return False
+
+        return True
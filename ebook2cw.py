@@ -1,22 +1,33 @@
 import helpers
+import concurrent.futures
+import itertools
+import json
 import os
 import platform
 import subprocess
+import time
 
 
 class Ebook2Cw:
-    def __init__(self, executable_folder):
+    def __init__(self, executable_folder, version_check_ttl=24 * 60 * 60):
         """Class initialization.
             Setup internal data and detect if running on supported OS.
             Supported OSes: Windows, Linux.
+
+        Args:
+            executable_folder (str): Folder where executable and related files are stored
+            version_check_ttl (float): Seconds online version is taken from
+                already downloaded ChangeLog without asking the server
         """
 
         BASE_URL = 'https://fkurz.net/ham/ebook2cw/'
         EXECUTABLE_BASE_NAME = 'ebook2cw'
         HASH_FILE_NAME = 'md5sums-bin.txt'
         CHANGELOG_FILE_NAME = 'ChangeLog'
+        EXECUTABLE_INFO_FILE_NAME = 'executable_info.json'
 
         self.is_os_supported = False
+        self.version_check_ttl = version_check_ttl
 
         # assembly paths and urls
         ebook2cw_folder = os.path.normpath(executable_folder)
@@ -36,6 +47,11 @@ class Ebook2Cw:
         self.changelog_file_local_path = os.path.normpath(os.path.join(
             ebook2cw_folder, CHANGELOG_FILE_NAME))
 
+        # version and MD5 hash of the executable valid for its (size, mtime, inode)
+        self.executable_info_local_path = os.path.normpath(os.path.join(
+            ebook2cw_folder, EXECUTABLE_INFO_FILE_NAME))
+        self.executable_info = None
+
         current_os = platform.system()
 
         # check for supported OS'es
@@ -47,14 +63,95 @@ class Ebook2Cw:
                 self.executable_url += '.exe'
                 self.executable_local_path += '.exe'
 
-    def _verify_executable_against_md5_file(self):
+    def _get_executable_identity(self):
+        """Gets identity of the executable file which changes whenever
+            the file gets replaced or modified.
+
+        Args:
+            None
+
+        Returns:
+            list: [size, mtime_ns, inode] or None when there is no executable
+        """
+
+        try:
+            executable_stat = os.stat(self.executable_local_path)
+        except OSError:
+            return None
+
+        return [executable_stat.st_size, executable_stat.st_mtime_ns, executable_stat.st_ino]
+
+    def _get_executable_info(self, identity):
+        """Gets memoized executable information valid for its identity
+            (read from the info file on first use).
+
+        Args:
+            identity (list): Executable identity as returned by _get_executable_identity()
+
+        Returns:
+            dict: Dictionary (values known so far, empty when identity does not match)
+                'version' -> local version string
+                'md5' -> HEX representation of the executable MD5 hash
+        """
+
+        if self.executable_info is None:
+            try:
+                with open(self.executable_info_local_path, mode="r", encoding="utf-8") as info_file:
+                    self.executable_info = json.load(info_file)
+            except (OSError, ValueError):
+                self.executable_info = {}
+
+        if identity is None or self.executable_info.get('identity') != identity:
+            return {}
+
+        return self.executable_info
+
+    def _set_executable_info(self, identity, **values):
+        """Memoizes executable information for its identity
+            (info of any other identity is dropped).
+
+        Args:
+            identity (list): Executable identity as returned by _get_executable_identity()
+            **values: 'version' and / or 'md5' values
+
+        Returns:
+            None
+        """
+
+        executable_info = dict(self._get_executable_info(identity))
+        executable_info.update(values, identity=identity)
+        self.executable_info = executable_info
+
+        try:
+            with open(self.executable_info_local_path, mode="w", encoding="utf-8") as info_file:
+                json.dump(executable_info, info_file)
+        except OSError:
+            pass
+
+    def _invalidate_executable_info(self):
+        """Drops memoized executable information (e.g. when file gets replaced).
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        self.executable_info = {}
+        if os.path.exists(self.executable_info_local_path):
+            os.remove(self.executable_info_local_path)
+
+    def _verify_executable_against_md5_file(self, executable_md5=None):
         """Verifies if ebook2cw file's calculated MD5 hash match the one stored
             in relevant md5 file. Files are expected to exist in default location.
             File with pre-calculated MD5 hashes should contain a row with hash
             and file name separated by space.
 
         Args:
-            None
+            executable_md5 (str): MD5 hash of the executable already calculated
+                (e.g. while downloading), None to use the memoized one
+                or calculate it out of the file
 
         Returns:
             bool: True when MD5 verification succeeded, False otherwise
@@ -66,7 +163,13 @@ class Ebook2Cw:
             if os.path.exists(self.executable_local_path) and os.path.exists(self.hash_file_local_path):
                 executable_file_name = os.path.basename(
                     self.executable_local_path)
-                executable_md5 = helpers.md5(self.executable_local_path)
+                identity = self._get_executable_identity()
+                if executable_md5 is None:
+                    executable_md5 = self._get_executable_info(
+                        identity).get('md5')
+                if executable_md5 is None:
+                    executable_md5 = helpers.md5(self.executable_local_path)
+                self._set_executable_info(identity, md5=executable_md5)
 
                 with open(os.path.normpath(self.hash_file_local_path), mode="r") as md5_file:
                     for line in md5_file:
@@ -111,11 +214,40 @@ class Ebook2Cw:
 
         return self.is_os_supported
 
+    def _is_changelog_fresh(self):
+        """Returns if downloaded ChangeLog was checked against the server
+            no longer than version check TTL ago.
+
+        Args:
+            None
+
+        Returns:
+            bool: True when ChangeLog is fresh, False otherwise
+        """
+
+        metadata = helpers.get_file_metadata(self.changelog_file_local_path)
+
+        return os.path.exists(self.changelog_file_local_path) and \
+            metadata.get('url') == self.changelog_file_url and \
+            0 <= time.time() - metadata.get('checked', 0) < self.version_check_ttl
+
     def get_executable_version_online(self):
+        """Gets latest ebook2cw version out of the ChangeLog. Within version
+            check TTL already downloaded ChangeLog is used, afterwards it is
+            downloaded only when modified (conditional request).
+
+        Args:
+            None
+
+        Returns:
+            str: "0" when service is not accessible, otherwise version string
+        """
+
         version = '0'
 
         if self.is_os_supported:
-            if helpers.get_file_from_web(self.changelog_file_url, self.changelog_file_local_path):
+            if self._is_changelog_fresh() or helpers.get_file_from_web(
+                    self.changelog_file_url, self.changelog_file_local_path, conditional=True):
                 if os.path.exists(self.changelog_file_local_path):
                     with open(self.changelog_file_local_path, 'r') as changelog:
                         data = changelog.readline()
@@ -127,21 +259,39 @@ class Ebook2Cw:
         return version
 
     def get_executable_version_local(self):
+        """Gets local ebook2cw version. It is memoized for the executable
+            identity, so executable is spawned only when it was replaced.
+
+        Args:
+            None
+
+        Returns:
+            str: "0" when program is not accessible, otherwise version string
+        """
+
         version = '0'
 
-        if self.is_os_supported and self._is_executable_present():
-            output = subprocess.Popen(
-                [self.executable_local_path, "-h"], stdout=subprocess.PIPE).communicate()[0].decode()
-            # correct response is: file_name version
-            if len(output) > 0:
-                extracted_version = output.split('\n', 1)[0].split()[1]
-                # basic check for version length which is at least X.Y.Z
-                if len(extracted_version) >= 5:
-                    version = extracted_version
+        if self.is_os_supported:
+            identity = self._get_executable_identity()
+            if identity is not None:
+                memoized_version = self._get_executable_info(
+                    identity).get('version')
+                if memoized_version is not None:
+                    return memoized_version
+
+                output = subprocess.Popen(
+                    [self.executable_local_path, "-h"], stdout=subprocess.PIPE).communicate()[0].decode()
+                # correct response is: file_name version
+                if len(output) > 0:
+                    extracted_version = output.split('\n', 1)[0].split()[1]
+                    # basic check for version length which is at least X.Y.Z
+                    if len(extracted_version) >= 5:
+                        version = extracted_version
+                self._set_executable_info(identity, version=version)
 
         return version
 
-    def get_executable(self, force_latest=True):
+    def get_executable(self, force_latest=True, progress_callback=None):
         """Downloads latest version of the ebook2cw (OS speciffic)
             performing download integrity check by MD5 verification.
             When not forced it checks if executable exist locally.
@@ -150,6 +300,8 @@ class Ebook2Cw:
         Args:
             force_latest (bool): Forces to download latest version
                 regardless if local copy exist or not
+            progress_callback (function): Called with (bytes_done, bytes_total)
+                while executable is being downloaded
 
         Returns:
             bool: True when executable is available, False otherwise
@@ -162,17 +314,230 @@ class Ebook2Cw:
             if not force_latest and os.path.exists(self.executable_local_path):
                 if_got_executable = True
             else:
-                # download files (executable + md5)
-                if helpers.get_file_from_web(
-                        self.executable_url, self.executable_local_path):
+                # executable is going to be replaced
+                self._invalidate_executable_info()
+                # download files (executable + md5), executable is hashed while downloading
+                download_result = helpers.download_file(
+                    self.executable_url, self.executable_local_path, progress_callback=progress_callback)
+                if download_result['success']:
                     if helpers.get_file_from_web(
                             self.hash_file_url, self.hash_file_local_path):
                         # verify executable's integrity
-                        if self._verify_executable_against_md5_file():
+                        if self._verify_executable_against_md5_file(download_result['md5']):
                             if_got_executable = True
                         else:
                             # md5 mismatch - remove files
                             os.remove(self.executable_local_path)
                             os.remove(self.hash_file_local_path)
+                            self._invalidate_executable_info()
 
         return if_got_executable
+
+    def get_render_command(self, text_file_path, output_base_path, wpm, farns, pitch):
+        """Assembles ebook2cw command line rendering text file to audio.
+
+        Args:
+            text_file_path (str): Path to the text file (ISO-8859-1 encoded)
+            output_base_path (str): Path prefix of resulting audio file
+                (ebook2cw appends chapter number and extension to it)
+            wpm (int): Characters speed in words per minute
+            farns (int): Effective (Farnsworth) speed in words per minute,
+                ignored when 0 or not lower than wpm
+            pitch (int): Tone frequency in Hz
+
+        Returns:
+            list: Command line arguments
+        """
+
+        command = [self.executable_local_path,
+                   '-w', str(wpm), '-f', str(pitch), '-o', output_base_path]
+        if 0 < farns < wpm:
+            command += ['-e', str(farns)]
+        command.append(text_file_path)
+
+        return command
+
+    def get_render_output_path(self, output_base_path):
+        """Gets path of the audio file ebook2cw renders for given path prefix
+            (ebook2cw appends chapter number, training text is a single chapter).
+
+        Args:
+            output_base_path (str): Path prefix of resulting audio file
+
+        Returns:
+            str: Path to the audio file
+        """
+
+        return output_base_path + '0000.mp3'
+
+    def render(self, text_file_path, output_base_path, wpm, farns, pitch, timeout=None):
+        """Renders text file to audio using ebook2cw executable.
+
+        Args:
+            text_file_path (str): Path to the text file (ISO-8859-1 encoded)
+            output_base_path (str): Path prefix of resulting audio file
+            wpm (int): Characters speed in words per minute
+            farns (int): Effective (Farnsworth) speed in words per minute
+            pitch (int): Tone frequency in Hz
+            timeout (float): Maximal rendering time in seconds (None for no limit)
+
+        Returns:
+            bool: True when ebook2cw finished successfully, False otherwise
+        """
+
+        is_rendered = False
+
+        if self.is_os_supported and self._is_executable_present():
+            try:
+                completed = subprocess.run(self.get_render_command(text_file_path, output_base_path, wpm, farns, pitch),
+                                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
+                is_rendered = completed.returncode == 0
+            except (OSError, subprocess.TimeoutExpired):
+                is_rendered = False
+
+        return is_rendered
+
+
+class RenderScheduler:
+    """Class running ebook2cw rendering jobs with bounded concurrency.
+        Each job is a separate ebook2cw process so threads are enough
+        to keep all CPU cores busy.
+    """
+
+    def __init__(self, ebook2cw, max_workers=None, timeout=None, retries=1, audio_cache=None):
+        """Class initialization
+
+        Args:
+            ebook2cw (Ebook2Cw): Object used to render jobs
+            max_workers (int): Maximal number of concurrent ebook2cw processes
+                (None means CPU count)
+            timeout (float): Maximal single rendering time in seconds (None for no limit)
+            retries (int): Number of additional attempts for failed job
+            audio_cache (AudioCache): Cache of rendered audio (None disables caching)
+        """
+
+        self.ebook2cw = ebook2cw
+        self.audio_cache = audio_cache
+        self.renderer_version = None
+        self.max_workers = max_workers if max_workers else (
+            os.cpu_count() or 1)
+        self.timeout = timeout
+        self.retries = retries
+        self.batch_time = 0.0
+        self.latencies = []
+
+    def _render_job(self, job, submit_time):
+        """Renders single job retrying on failure (run on worker thread).
+
+        Args:
+            job (dict): Job as passed to run()
+            submit_time (float): time.perf_counter() value of job submission
+
+        Returns:
+            dict: Result as yielded by run()
+        """
+
+        start_time = time.perf_counter()
+        attempts = 0
+        is_rendered = False
+        is_cached = False
+        audio_key = None
+        output_path = self.ebook2cw.get_render_output_path(
+            job['output_base_path'])
+
+        if self.audio_cache is not None:
+            try:
+                with open(job['text_file_path'], 'rb') as text_file:
+                    audio_key = self.audio_cache.get_key(
+                        text_file.read(), job['wpm'], job['farns'], job['pitch'], self.renderer_version)
+            except OSError:
+                audio_key = None
+            if audio_key is not None and self.audio_cache.fetch(audio_key, output_path):
+                is_rendered = True
+                is_cached = True
+
+        while not is_rendered and attempts <= self.retries:
+            attempts += 1
+            is_rendered = self.ebook2cw.render(job['text_file_path'], job['output_base_path'],
+                                               job['wpm'], job['farns'], job['pitch'], self.timeout)
+            if is_rendered and audio_key is not None:
+                self.audio_cache.store(audio_key, output_path)
+        end_time = time.perf_counter()
+
+        return {'job': job,
+                'success': is_rendered,
+                'cached': is_cached,
+                'attempts': attempts,
+                'run_time': end_time - start_time,
+                'latency': end_time - submit_time}
+
+    def run(self, jobs):
+        """Renders jobs streaming results as soon as they are done.
+            Jobs are taken from the iterable only when a worker is about
+            to be free, so they may be produced while rendering goes on.
+
+        Args:
+            jobs (iterable): dict with rendering parameters
+                'text_file_path' -> Path to the text file (ISO-8859-1 encoded)
+                'output_base_path' -> Path prefix of resulting audio file
+                'wpm' -> Characters speed in words per minute
+                'farns' -> Effective (Farnsworth) speed in words per minute
+                'pitch' -> Tone frequency in Hz
+                other keys are passed through untouched
+
+        Returns:
+            generator: dict for every job (in completion order)
+                'job' -> job itself
+                'success' -> True when audio was rendered
+                'cached' -> True when audio was taken from audio cache
+                'attempts' -> number of ebook2cw runs
+                'run_time' -> rendering time in seconds (all attempts)
+                'latency' -> time from job submission to its completion in seconds
+        """
+
+        jobs = iter(jobs)
+        batch_start_time = time.perf_counter()
+        self.latencies = []
+
+        # version is part of audio key so upgraded ebook2cw does not reuse old audio
+        if self.audio_cache is not None:
+            self.renderer_version = self.ebook2cw.get_executable_version_local()
+
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers) as executor:
+            # keep job queue short to not consume whole jobs iterable upfront
+            pending = {executor.submit(self._render_job, job, time.perf_counter())
+                       for job in itertools.islice(jobs, 2 * self.max_workers)}
+            while pending:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for job in itertools.islice(jobs, len(done)):
+                    pending.add(executor.submit(
+                        self._render_job, job, time.perf_counter()))
+                for future in done:
+                    result = future.result()
+                    self.latencies.append(result['latency'])
+                    self.batch_time = time.perf_counter() - batch_start_time
+                    yield result
+
+        self.batch_time = time.perf_counter() - batch_start_time
+
+    def get_statistics(self):
+        """Gets timing statistics of the last run().
+
+        Args:
+            None
+
+        Returns:
+            dict: Dictionary
+                'jobs' -> number of jobs done
+                'batch_time' -> total run time in seconds
+                'latency_mean' -> mean job latency in seconds
+                'latency_max' -> maximal job latency in seconds
+        """
+
+        jobs_count = len(self.latencies)
+
+        return {'jobs': jobs_count,
+                'batch_time': self.batch_time,
+                'latency_mean': sum(self.latencies) / jobs_count if jobs_count else 0.0,
+                'latency_max': max(self.latencies) if jobs_count else 0.0}
@@ -1,6 +1,7 @@
 import cwgen
 import os
 import sys
+import threading
 import PySimpleGUI as sg
 
 
@@ -13,10 +14,14 @@ class CwGenUI:
     # GUI - text config
     E2CW_VER_LOCAL_KEY = '-E2CW VER LOCAL-'
     E2CW_VER_ONLINE_KEY = '-E2CW VER ONLINE-'
+    DICTIONARY_LOAD_STATUS_KEY = '-DICTIONARY LOAD STATUS-'
+    E2CW_VER_CHECKING = 'checking…'
+    E2CW_DOWNLOAD_STATUS_KEY = '-E2CW DOWNLOAD STATUS-'
 
     # GUI - button config
     FILE_BROWSE_KEY = '-ADD FILE-'
     FILE_REMOVE_KEY = '-REMOVE FILE-'
+    DICTIONARY_LOAD_CANCEL_KEY = '-DICTIONARY LOAD CANCEL-'
     E2CW_DOWNLOAD_KEY = '-E2CW DOWNLOAD-'
     E2CW_GENERATE_KEY = '-E2CW GENERATE-'
 
@@ -50,29 +55,51 @@ class CwGenUI:
     E2CW_PITCH_RANGE_START_KEY = '-E2CW PITCH RANGE START-'
     E2CW_PITCH_RANGE_STOP_KEY = '-E2CW PITCH RANGE STOP-'
 
+    # GUI - progress bar config
+    DICTIONARY_LOAD_PROGRESS_KEY = '-DICTIONARY LOAD PROGRESS-'
+    DICTIONARY_LOAD_PROGRESS_MAX = 1000
+    E2CW_DOWNLOAD_PROGRESS_KEY = '-E2CW DOWNLOAD PROGRESS-'
+    E2CW_DOWNLOAD_PROGRESS_MAX = 1000
+
     # GUI - combo config
     COMBO_LETTERS_SET_KEY = '-LETTERS SET-'
     COMBO_MATERIAL_GENERATION_KEY = '-MATERIAL GENERATION-'
 
+    # GUI - events generated by worker threads
+    DICTIONARY_LOAD_PROGRESS_EVENT = '-DICTIONARY LOAD PROGRESS EVENT-'
+    DICTIONARY_LOAD_DONE_EVENT = '-DICTIONARY LOAD DONE EVENT-'
+    DICTIONARY_REMOVE_DONE_EVENT = '-DICTIONARY REMOVE DONE EVENT-'
+    E2CW_VER_EVENT = '-E2CW VER EVENT-'
+    WORDS_FILTERED_EVENT = '-WORDS FILTERED EVENT-'
+
+    # words filtering requested within this time (seconds) are coalesced
+    WORDS_FILTERING_DEBOUNCE_TIME = 0.15
+    E2CW_DOWNLOAD_PROGRESS_EVENT = '-E2CW DOWNLOAD PROGRESS EVENT-'
+    E2CW_DOWNLOAD_DONE_EVENT = '-E2CW DOWNLOAD DONE EVENT-'
+
     def __init__(self):
         """Class initialization"""
 
         # Members
         self.files_table_idx = -1
+        self.dictionary_load_cancel = None
+        # latest words filtering request, results of older ones are discarded
+        self.words_filtering_generation = 0
+        self.words_filtering_timer = None
         self.cw_gen = cwgen.CwGen()
+        # guards cw_gen dictionary set against changes while words are filtered on a worker thread
+        self.cw_gen_lock = threading.Lock()
         self.letters_sets = self.cw_gen.get_letters_sets()
         self.training_generator_schemes = self.cw_gen.get_training_generator_schemes()
 
-        ebook2cw_version_local = self.cw_gen.get_ebook2cw_version_local()
-        ebook2cw_version_online = self.cw_gen.get_ebook2cw_version_online()
-
         # GUI - header columns -> name, column size, visible?
         files_data_header = [
             ("UUID",       0, False),
             ("File name", 14, True),
             ("Words",      6, True),
             ("Min len",    7, True),
-            ("Max len",    7, True)
+            ("Max len",    7, True),
+            ("Phrases",    7, True)
         ]
 
         words_filtered_header = [
@@ -122,10 +149,16 @@ class CwGenUI:
 
         # GUI - rows
         files_operation = [sg.Input(enable_events=True, visible=False, key=self.FILE_PATH_INPUT_KEY),
-                           sg.FileBrowse(button_text="Add", file_types=(
+                           sg.FilesBrowse(button_text="Add", file_types=(
                                ("ALL Files", "*.*"), ("CWOPS sessions", "*.cwo")), target=self.FILE_PATH_INPUT_KEY, key=self.FILE_BROWSE_KEY),
                            sg.Button(button_text="Remove selected", key=self.FILE_REMOVE_KEY)]
 
+        files_loading = [sg.ProgressBar(max_value=self.DICTIONARY_LOAD_PROGRESS_MAX, orientation='h',
+                                        size=(14, 10), key=self.DICTIONARY_LOAD_PROGRESS_KEY),
+                         sg.Text("", size=(12, 1),
+                                 key=self.DICTIONARY_LOAD_STATUS_KEY),
+                         sg.Button(button_text="Cancel", disabled=True, key=self.DICTIONARY_LOAD_CANCEL_KEY)]
+
         letters_min = [sg.Text("MIN:", size=(4, 1)),
                        sg.Text("0", size=(2, 1),
                                key=self.LETTERS_MIN_RANGE_START_KEY),
@@ -167,12 +200,17 @@ class CwGenUI:
                                     orientation='h', enable_events=True, key=self.WORDS_TO_TRAIN_RANGE_START_KEY),
                           sg.Text("0", size=(2, 1), key=self.WORDS_TO_TRAIN_RANGE_STOP_KEY)]
 
-        e2cw_version = [sg.Text('Local version:', size=(15, 1)), sg.Text(ebook2cw_version_local, key=self.E2CW_VER_LOCAL_KEY),
-                        sg.Text('Online version:', size=(15, 1)), sg.Text(ebook2cw_version_online, key=self.E2CW_VER_ONLINE_KEY)]
+        # versions are filled in by background probes (see start_ebook2cw_version_probes)
+        e2cw_version = [sg.Text('Local version:', size=(15, 1)), sg.Text(self.E2CW_VER_CHECKING, size=(10, 1), key=self.E2CW_VER_LOCAL_KEY),
+                        sg.Text('Online version:', size=(15, 1)), sg.Text(self.E2CW_VER_CHECKING, size=(10, 1), key=self.E2CW_VER_ONLINE_KEY)]
 
         e2cw_buttons = [sg.Button('Download / Update Ebook2CW', key=self.E2CW_DOWNLOAD_KEY),
                         sg.Button('Generate training files', key=self.E2CW_GENERATE_KEY)]
 
+        e2cw_downloading = [sg.ProgressBar(max_value=self.E2CW_DOWNLOAD_PROGRESS_MAX, orientation='h',
+                                           size=(20, 10), key=self.E2CW_DOWNLOAD_PROGRESS_KEY),
+                            sg.Text("", size=(16, 1), key=self.E2CW_DOWNLOAD_STATUS_KEY)]
+
         e2cw_wpm = [sg.Text("WPM:", size=(6, 1)),
                     sg.Text("0", size=(2, 1),
                             key=self.E2CW_WPM_RANGE_START_KEY),
@@ -196,7 +234,7 @@ class CwGenUI:
 
         # GUI - columns
         left_col = [
-            [sg.Frame('Dictionaries', [files_operation, files_data_table])],
+            [sg.Frame('Dictionaries', [files_operation, files_loading, files_data_table])],
             [sg.Frame('Letters selection', [letters_set])],
             [sg.Frame('Words length', [letters_min, letters_max])],
             [sg.Frame('Training input', [words_filtered_table])]]
@@ -206,13 +244,17 @@ class CwGenUI:
             [sg.Frame('Training set size', [words_to_train])],
             [sg.Frame('Training output', [words_to_gen_table])],
             [sg.Frame('Audible parameters', [e2cw_wpm, e2cw_farns, e2cw_pitch])],
-            [sg.Frame('Ebook2CW', [e2cw_version, e2cw_buttons])]]
+            [sg.Frame('Ebook2CW', [e2cw_version, e2cw_buttons, e2cw_downloading])]]
 
         # App layout
         layout = [[sg.Column(left_col), sg.VSeparator(), sg.Column(right_col)]]
 
-        # Configure and create the window
-        self.window = sg.Window(self.WINDOW_DESCRIPTION, layout)
+        # Configure and create the window (finalized so it shows up
+        # and accepts events from worker threads right away)
+        self.window = sg.Window(
+            self.WINDOW_DESCRIPTION, layout, finalize=True)
+
+        self.start_ebook2cw_version_probes()
 
     def _get_dictionary_key_by_value(self, dictionary, lookup_value, nested_key=None):
         '''Retrieves a key based on provided string value
@@ -266,9 +308,10 @@ class CwGenUI:
             for dictionary_data in dictionaries_info:
                 row = [dictionary_data['uuid'],
                        dictionary_data['name'],
-                       dictionary_data['stat']['words_count'],
-                       dictionary_data['stat']['min_length'],
-                       dictionary_data['stat']['max_length']]
+                       dictionary_data['stat'].get('words_count', 0),
+                       dictionary_data['stat'].get('min_length', '-'),
+                       dictionary_data['stat'].get('max_length', '-'),
+                       dictionary_data['phrases_stat'].get('phrases_count', 0)]
                 table_data.append(row)
 
             if len(words_info) > 0:
@@ -281,12 +324,14 @@ class CwGenUI:
         words_min_length, words_max_length = self.update_words_length_sliders_config(
             values, (sliders_range))
         self._update_ui_on_words_filtering_change(
-            values, words_min_length, words_max_length)
+            values, words_min_length, words_max_length, debounce=False)
 
-    def _update_ui_on_words_filtering_change(self, values, min_length=None, max_length=None):
+    def _update_ui_on_words_filtering_change(self, values, min_length=None, max_length=None, debounce=True):
         '''Updates words stat with filtered result
             which allow user to see the data out of which
             training material could be generated.
+            Filtering runs on a worker thread (see handle_words_filtered),
+            requests made within debounce time are coalesced into the last one.
 
         Args:
             values():
@@ -296,6 +341,7 @@ class CwGenUI:
             max_length (int): Maximal words length
                 passed in when reading the value from self.window is not yet updated
                 (window hadling did not advanced to the next loop yet)
+            debounce (bool): Wait for further requests before filtering
 
         Returns:
             None
@@ -312,12 +358,59 @@ class CwGenUI:
         if max_length is not None:
             words_max_length = max_length
 
-        # get filtered words stat
-        words_stat_filtered = self.cw_gen.get_words_stat_filtered(
-            words_min_length, words_max_length,
-            self._get_dictionary_key_by_value(
-                self.letters_sets, letters_set, 'description'),
-            self._get_dictionary_key_by_value(self.training_generator_schemes, generator_scheme))
+        filter_parameters = (words_min_length, words_max_length,
+                             self._get_dictionary_key_by_value(
+                                 self.letters_sets, letters_set, 'description'),
+                             self._get_dictionary_key_by_value(self.training_generator_schemes, generator_scheme))
+
+        # newer request supersedes pending and in-flight ones
+        self.words_filtering_generation += 1
+        if self.words_filtering_timer is not None:
+            self.words_filtering_timer.cancel()
+        self.words_filtering_timer = threading.Timer(self.WORDS_FILTERING_DEBOUNCE_TIME if debounce else 0,
+                                                     self._words_filtering_worker,
+                                                     args=(self.words_filtering_generation, filter_parameters))
+        self.words_filtering_timer.daemon = True
+        self.words_filtering_timer.start()
+
+    def _words_filtering_worker(self, generation, filter_parameters):
+        """Gets filtered words stat on a worker thread reporting
+            the result back to the GUI via window event.
+            Superseded requests are dropped before and after filtering.
+
+        Args:
+            generation (int): Words filtering request number
+            filter_parameters (tuple): (min length, max length, letters set id, generator scheme id)
+
+        Returns:
+            None
+        """
+
+        if generation != self.words_filtering_generation:
+            return
+
+        with self.cw_gen_lock:
+            words_stat_filtered = self.cw_gen.get_words_stat_filtered(
+                *filter_parameters)
+
+        if generation == self.words_filtering_generation:
+            self.window.write_event_value(
+                self.WORDS_FILTERED_EVENT, (generation, words_stat_filtered))
+
+    def handle_words_filtered(self, values):
+        """Handle filtered words stat reported by worker thread.
+            Only the result of the latest request updates the table.
+
+        Args:
+            values (dict): Dictionary containing GUI elements values
+
+        Returns:
+            None
+        """
+
+        generation, words_stat_filtered = values[self.WORDS_FILTERED_EVENT]
+        if generation != self.words_filtering_generation:
+            return
 
         # assemble words stat table (sorted by word length)
         stat = []
@@ -329,9 +422,213 @@ class CwGenUI:
         # update UI
         self.window[self.WORDS_FILTERED_TABLE_KEY].update(values=stat)
 
+    def _set_dictionary_loading_state(self, is_loading):
+        """Updates UI elements availability on dictionary loading start / stop.
+            Dictionary set can't be changed while loading is in progress.
+
+        Args:
+            is_loading (bool): True when loading starts, False when it stops
+
+        Returns:
+            None
+        """
+
+        self.window[self.FILE_BROWSE_KEY].update(disabled=is_loading)
+        self.window[self.FILE_REMOVE_KEY].update(disabled=is_loading)
+        self.window[self.DICTIONARY_LOAD_CANCEL_KEY].update(
+            disabled=not is_loading)
+        if not is_loading:
+            self.window[self.DICTIONARY_LOAD_PROGRESS_KEY].update(
+                current_count=0)
+            self.window[self.DICTIONARY_LOAD_STATUS_KEY].update(value="")
+
+    def _load_dictionaries_worker(self, file_paths, cancel_event):
+        """Loads dictionaries on a worker thread reporting progress
+            and result back to the GUI via window events.
+            Single file progress is reported in bytes, while many files
+            are loaded concurrently and reported file by file.
+            Loaded dictionaries are added to cwgen (words index) here as well,
+            so the GUI is not blocked by it. Completion is always reported,
+            even when loading fails unexpectedly.
+
+        Args:
+            file_paths (list): Paths to the dictionary files
+            cancel_event (threading.Event): Loading stops when set
+
+        Returns:
+            None
+        """
+
+        def report_bytes_progress(bytes_read, bytes_total, words_parsed):
+            self.window.write_event_value(self.DICTIONARY_LOAD_PROGRESS_EVENT,
+                                          (bytes_read, bytes_total, "{} words".format(words_parsed)))
+
+        def report_files_progress(files_done, files_total):
+            self.window.write_event_value(self.DICTIONARY_LOAD_PROGRESS_EVENT,
+                                          (files_done, files_total, "{}/{} files".format(files_done, files_total)))
+
+        results = None
+        try:
+            if len(file_paths) == 1:
+                results = [{'path': file_paths[0],
+                            'dictionary': None, 'error': None}]
+                try:
+                    results[0]['dictionary'] = self.cw_gen.load_dictionary(
+                        file_paths[0], report_bytes_progress, cancel_event)
+                except OSError as error:
+                    results[0]['error'] = str(error)
+            else:
+                results = self.cw_gen.load_dictionaries(
+                    file_paths, progress_callback=report_files_progress, cancel_event=cancel_event)
+
+            # dictionaries are added unless loading got cancelled meanwhile
+            for result in results or []:
+                if cancel_event.is_set():
+                    break
+                if result['error'] is None:
+                    with self.cw_gen_lock:
+                        result['is_added'] = self.cw_gen.add_loaded_dictionary(
+                            result['dictionary'])
+                # words are kept by the index only
+                result['dictionary'] = None
+        except Exception as error:
+            # any unexpected error is reported as failure of the whole loading
+            results = (results or []) + [{'path': ', '.join(file_paths),
+                                          'dictionary': None, 'error': repr(error)}]
+        finally:
+            self.window.write_event_value(
+                self.DICTIONARY_LOAD_DONE_EVENT, results)
+
+    def _ebook2cw_version_worker(self, version_key, probe):
+        """Runs ebook2cw version probe on a worker thread reporting
+            the result back to the GUI via window event.
+
+        Args:
+            version_key (str): Key of the version text element
+            probe (function): Function returning version string
+
+        Returns:
+            None
+        """
+
+        try:
+            version = probe()
+        except (OSError, IndexError, ValueError):
+            version = '0'
+
+        self.window.write_event_value(
+            self.E2CW_VER_EVENT, (version_key, version))
+
+    def start_ebook2cw_version_probes(self):
+        """Starts local (spawns the executable) and online (downloads the ChangeLog)
+            ebook2cw version probes in background so the window is not
+            blocked by them. Version fields show 'checking…' until
+            results arrive (see handle_ebook2cw_version).
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        for version_key, probe in ((self.E2CW_VER_LOCAL_KEY, self.cw_gen.get_ebook2cw_version_local),
+                                   (self.E2CW_VER_ONLINE_KEY, self.cw_gen.get_ebook2cw_version_online)):
+            self.window[version_key].update(value=self.E2CW_VER_CHECKING)
+            threading.Thread(target=self._ebook2cw_version_worker,
+                             args=(version_key, probe),
+                             daemon=True).start()
+
+    def handle_ebook2cw_version(self, values):
+        """Handle ebook2cw version reported by probe worker thread.
+
+        Args:
+            values (dict): Dictionary containing GUI elements values
+
+        Returns:
+            None
+        """
+
+        version_key, version = values[self.E2CW_VER_EVENT]
+        self.window[version_key].update(value=version)
+
+    def _ebook2cw_download_worker(self):
+        """Downloads latest ebook2cw on a worker thread reporting progress
+            and result back to the GUI via window events.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        def report_progress(bytes_done, bytes_total):
+            self.window.write_event_value(
+                self.E2CW_DOWNLOAD_PROGRESS_EVENT, (bytes_done, bytes_total))
+
+        is_downloaded = self.cw_gen.get_ebook2cw(True, report_progress)
+        self.window.write_event_value(
+            self.E2CW_DOWNLOAD_DONE_EVENT, is_downloaded)
+
+    def handle_ebook2cw_download(self, values):
+        """Handle ebook2cw download / update request
+            by downloading it on a worker thread.
+
+        Args:
+            values (dict): Dictionary containing GUI elements values
+
+        Returns:
+            None
+        """
+
+        self.window[self.E2CW_DOWNLOAD_KEY].update(disabled=True)
+        self.window[self.E2CW_DOWNLOAD_STATUS_KEY].update(value="connecting…")
+        threading.Thread(target=self._ebook2cw_download_worker,
+                         daemon=True).start()
+
+    def handle_ebook2cw_download_progress(self, values):
+        """Handle ebook2cw download progress reported by worker thread.
+
+        Args:
+            values (dict): Dictionary containing GUI elements values
+
+        Returns:
+            None
+        """
+
+        bytes_done, bytes_total = values[self.E2CW_DOWNLOAD_PROGRESS_EVENT]
+        if bytes_total > 0:
+            self.window[self.E2CW_DOWNLOAD_PROGRESS_KEY].update(
+                current_count=self.E2CW_DOWNLOAD_PROGRESS_MAX * bytes_done // bytes_total)
+        self.window[self.E2CW_DOWNLOAD_STATUS_KEY].update(
+            value="{} kB".format(bytes_done // 1024))
+
+    def handle_ebook2cw_downloaded(self, values):
+        """Handle ebook2cw download completion reported by worker thread.
+            Local version gets checked again.
+
+        Args:
+            values (dict): Dictionary containing GUI elements values
+
+        Returns:
+            None
+        """
+
+        self.window[self.E2CW_DOWNLOAD_KEY].update(disabled=False)
+        self.window[self.E2CW_DOWNLOAD_PROGRESS_KEY].update(current_count=0)
+        self.window[self.E2CW_DOWNLOAD_STATUS_KEY].update(value="")
+
+        if values[self.E2CW_DOWNLOAD_DONE_EVENT]:
+            self.start_ebook2cw_version_probes()
+        else:
+            sg.popup_error('Ebook2CW download or verification failed',
+                           title='Ebook2CW')
+
     def handle_dictionary_add(self, values):
-        """Handle new dictionary addition
-            by passing file path to cwgen. UI gets updated.
+        """Handle new dictionaries addition
+            by loading selected files on a worker thread. UI gets updated
+            once loading completes (see handle_dictionary_loaded).
 
         Args:
             values (dict): Dictionary containing GUI elements values
@@ -342,17 +639,105 @@ class CwGenUI:
 
         # on file selection cancel values[FILE_PATH_INPUT_KEY] is empty
         if len(values[self.FILE_PATH_INPUT_KEY]) > 0:
-            file_path = os.path.normpath(values[self.FILE_PATH_INPUT_KEY])
-            if os.path.isfile(file_path):
-                if self.cw_gen.add_dictionary(file_path):
-                    self._update_ui_on_dictionary_set_change(values)
+            # multiple files selection is separated with ';'
+            file_paths = [os.path.normpath(file_path)
+                          for file_path in values[self.FILE_PATH_INPUT_KEY].split(';')]
+            file_paths = [file_path for file_path in file_paths
+                          if os.path.isfile(file_path) and not self.cw_gen.is_dictionary_loaded(file_path)]
+            if len(file_paths) > 0 and self.dictionary_load_cancel is None:
+                self.dictionary_load_cancel = threading.Event()
+                self._set_dictionary_loading_state(True)
+                threading.Thread(target=self._load_dictionaries_worker,
+                                 args=(file_paths,
+                                       self.dictionary_load_cancel),
+                                 daemon=True).start()
 
             # clear file path storage to properly handle CANCEL situation
             self.window[self.FILE_PATH_INPUT_KEY].update(value="")
 
+    def handle_dictionary_load_progress(self, values):
+        """Handle dictionaries loading progress reported by worker thread.
+
+        Args:
+            values (dict): Dictionary containing GUI elements values
+
+        Returns:
+            None
+        """
+
+        done, total, status = values[self.DICTIONARY_LOAD_PROGRESS_EVENT]
+        if self.dictionary_load_cancel is not None and total > 0:
+            self.window[self.DICTIONARY_LOAD_PROGRESS_KEY].update(
+                current_count=self.DICTIONARY_LOAD_PROGRESS_MAX * done // total)
+            self.window[self.DICTIONARY_LOAD_STATUS_KEY].update(value=status)
+
+    def handle_dictionary_loaded(self, values):
+        """Handle dictionaries loading completion reported by worker thread.
+            Dictionaries were already added by the worker thread (unless
+            loading was cancelled), UI gets updated and failures reported.
+
+        Args:
+            values (dict): Dictionary containing GUI elements values
+
+        Returns:
+            None
+        """
+
+        results = values[self.DICTIONARY_LOAD_DONE_EVENT] or []
+        is_cancelled = self.dictionary_load_cancel.is_set()
+        self.dictionary_load_cancel = None
+        self._set_dictionary_loading_state(False)
+
+        # dictionaries added before cancellation stay loaded
+        if any(result.get('is_added', False) for result in results):
+            self._update_ui_on_dictionary_set_change(values)
+
+        if not is_cancelled:
+            failures = ['{}: {}'.format(result['path'], result['error'])
+                        for result in results if result['error'] is not None]
+            if failures:
+                sg.popup_error('Dictionaries not loaded:',
+                               *failures, title='Dictionaries')
+
+    def handle_dictionary_load_cancel(self, values):
+        """Handle dictionary loading cancellation request.
+            Worker thread stops and reports completion on its own.
+
+        Args:
+            values (dict): Dictionary containing GUI elements values
+
+        Returns:
+            None
+        """
+
+        if self.dictionary_load_cancel is not None:
+            self.dictionary_load_cancel.set()
+            self.window[self.DICTIONARY_LOAD_CANCEL_KEY].update(disabled=True)
+
+    def _remove_dictionary_worker(self, dictionary_uuid):
+        """Removes dictionary (and its words from the index) on a worker thread
+            reporting the result back to the GUI via window event.
+
+        Args:
+            dictionary_uuid (UUID): Dictionary identifier
+
+        Returns:
+            None
+        """
+
+        is_dictionary_removed = False
+        try:
+            with self.cw_gen_lock:
+                is_dictionary_removed = self.cw_gen.remove_dictionary(
+                    dictionary_uuid)
+        finally:
+            self.window.write_event_value(
+                self.DICTIONARY_REMOVE_DONE_EVENT, is_dictionary_removed)
+
     def handle_dictionary_delete(self, values):
         """Handle dictionary deletion
-            by passing its generated UUID to cwgen. UI gets updated.
+            by passing its generated UUID to cwgen on a worker thread.
+            UI gets updated once it completes (see handle_dictionary_removed).
 
         Args:
             values (dict): Dictionary containing GUI elements values
@@ -364,12 +749,31 @@ class CwGenUI:
         if self.files_table_idx >= 0:
             table_data = self.window[self.FILES_DATA_TABLE_KEY].get()
             selected_dictionary_uuid = table_data[self.files_table_idx][0]
-            if self.cw_gen.remove_dictionary(selected_dictionary_uuid):
-                self._update_ui_on_dictionary_set_change(values)
+            # dictionary set can't be changed until removal completes
+            self.window[self.FILE_BROWSE_KEY].update(disabled=True)
+            self.window[self.FILE_REMOVE_KEY].update(disabled=True)
+            threading.Thread(target=self._remove_dictionary_worker,
+                             args=(selected_dictionary_uuid,),
+                             daemon=True).start()
 
             # set table index to negative to properly handle dictionary remove button click
             self.files_table_idx = -1
 
+    def handle_dictionary_removed(self, values):
+        """Handle dictionary removal completion reported by worker thread.
+
+        Args:
+            values (dict): Dictionary containing GUI elements values
+
+        Returns:
+            None
+        """
+
+        self.window[self.FILE_BROWSE_KEY].update(disabled=False)
+        self.window[self.FILE_REMOVE_KEY].update(disabled=False)
+        if values[self.DICTIONARY_REMOVE_DONE_EVENT]:
+            self._update_ui_on_dictionary_set_change(values)
+
     def handle_words_length_sliders(self, event, values):
         """Handle words length sliders movement
             to not let their values become ridiculous.
@@ -462,6 +866,12 @@ class CwGenUI:
         event, values = self.window.read()
         # See if user wants to quit or window was closed
         if event == sg.WINDOW_CLOSED:
+            if self.dictionary_load_cancel is not None:
+                self.dictionary_load_cancel.set()
+            # drop pending and in-flight words filtering
+            self.words_filtering_generation += 1
+            if self.words_filtering_timer is not None:
+                self.words_filtering_timer.cancel()
             self.window.close()
             return False
 
@@ -473,9 +883,35 @@ class CwGenUI:
         if event == self.FILE_PATH_INPUT_KEY:
             self.handle_dictionary_add(values)
 
+        # dictionary loading (worker thread) progress, completion and cancellation
+        if event == self.DICTIONARY_LOAD_PROGRESS_EVENT:
+            self.handle_dictionary_load_progress(values)
+        if event == self.DICTIONARY_LOAD_DONE_EVENT:
+            self.handle_dictionary_loaded(values)
+        if event == self.DICTIONARY_LOAD_CANCEL_KEY:
+            self.handle_dictionary_load_cancel(values)
+
+        # words filtering (worker thread) results
+        if event == self.WORDS_FILTERED_EVENT:
+            self.handle_words_filtered(values)
+
+        # ebook2cw version probes (worker threads) results
+        if event == self.E2CW_VER_EVENT:
+            self.handle_ebook2cw_version(values)
+
+        # ebook2cw download (worker thread) start, progress and completion
+        if event == self.E2CW_DOWNLOAD_KEY:
+            self.handle_ebook2cw_download(values)
+        if event == self.E2CW_DOWNLOAD_PROGRESS_EVENT:
+            self.handle_ebook2cw_download_progress(values)
+        if event == self.E2CW_DOWNLOAD_DONE_EVENT:
+            self.handle_ebook2cw_downloaded(values)
+
         # remove dictionary from the list
         if event == self.FILE_REMOVE_KEY:
             self.handle_dictionary_delete(values)
+        if event == self.DICTIONARY_REMOVE_DONE_EVENT:
+            self.handle_dictionary_removed(values)
 
         # handle words length change
         if (event == self.LETTERS_MIN_KEY) or (event == self.LETTERS_MAX_KEY):
@@ -491,15 +927,21 @@ class CwGenUI:
         return True
 
 
-# UI theming
-sg.theme('Default1')
+def main():
+    # UI theming
+    sg.theme('Default1')
+
+    # Start the GUI
+    ui = CwGenUI()
+
+    # Display and interact with the GUI using an Event Loop
+    while ui.handleGui():
+        pass
 
-# Start the GUI
-ui = CwGenUI()
+    # Game over
+    del ui
 
-# Display and interact with the GUI using an Event Loop
-while ui.handleGui():
-    pass
 
-# Game over
-del ui
+# guarded as worker processes (spawned when loading dictionaries) import this module
+if __name__ == '__main__':
+    main()
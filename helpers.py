@@ -1,46 +1,204 @@
+import collections
 import os
 import hashlib
+import http.client
+import json
+import time
+import urllib.error
 import urllib.request
 
 
-def get_file_from_web(file_url, file_path):
+# downloaded file metadata is stored in file of the same name with this suffix
+METADATA_FILE_SUFFIX = '.meta'
+
+
+def get_file_metadata(file_path):
+    """Gets metadata of file downloaded with download_file().
+        Metadata is stored beside the file (file name with '.meta' suffix).
+
+    Args:
+        file_path (str): Path to the downloaded file
+
+    Returns:
+        dict: Dictionary (empty when there is no metadata)
+            'url' -> URL the file was downloaded from
+            'etag' -> ETag header of the response (None if not sent)
+            'last_modified' -> Last-Modified header of the response (None if not sent)
+            'checked' -> time of the last check against the server (seconds since epoch)
+            'md5' -> HEX representation of file MD5 hash
+            'size' -> file size in bytes
+    """
+
+    try:
+        with open(file_path + METADATA_FILE_SUFFIX, mode="r", encoding="utf-8") as metadata_file:
+            metadata = json.load(metadata_file)
+    except (OSError, ValueError):
+        return {}
+
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def _set_file_metadata(file_path, metadata):
+    with open(file_path + METADATA_FILE_SUFFIX, mode="w", encoding="utf-8") as metadata_file:
+        json.dump(metadata, metadata_file)
+
+
+def _get_resume_validator(metadata):
+    # resuming needs server to tell it still has the same file
+    # (weak ETag can't be used for that)
+    validator = metadata.get('etag')
+    if not validator or validator.startswith('W/'):
+        validator = metadata.get('last_modified')
+
+    return validator
+
+
+def download_file(file_url, file_path, conditional=False, progress_callback=None):
     """Downloads specified file from provided URL and store in selected location.
         In order to keep data integrity file after downloading is saved with
         suffix and later on is renamed to the original name assuring already
         existing file gets deleted.
+        Data is written and hashed in a single pass while it is received.
+        Response validators (ETag, Last-Modified) are stored beside the file
+        (see get_file_metadata), so conditional download of already existing
+        file asks server to send it only when it was modified, while
+        interrupted download is resumed (HTTP Range) on the next call.
 
     Args:
         file_url  (str): URL of the file to download
         file_path (str): Path to the resulting file (incl. file name)
+        conditional (bool): Skip download when server reports file not modified
+        progress_callback (function): Called with (bytes_done, bytes_total)
+            after every received block, bytes_total is 0 when not known
 
     Returns:
-        bool: True when file was downloaeded, False on error
+        dict: Dictionary
+            'success' -> True when file was downloaded (or is up to date), False on error
+            'modified' -> True when file was downloaded, False when local copy is up to date
+            'md5' -> HEX representation of file MD5 hash (None when not known)
+            'size' -> file size in bytes
     """
 
     TEMP_FILE_SUFFIX = '_tmp'
-    is_file_downloaded = True
+    BUFFER_SIZE = 1024 * 1024
+
+    result = {'success': False, 'modified': False, 'md5': None, 'size': 0}
 
     # make sure directories are there
     file_directory = os.path.dirname(file_path)
     if not os.path.exists(file_directory):
         os.makedirs(file_directory)
 
-    # download the file with temporary suffix
+    request = urllib.request.Request(file_url)
+    metadata = get_file_metadata(file_path)
+    if conditional and os.path.exists(file_path) and metadata.get('url') == file_url:
+        if metadata.get('etag'):
+            request.add_header('If-None-Match', metadata['etag'])
+        if metadata.get('last_modified'):
+            request.add_header('If-Modified-Since', metadata['last_modified'])
+
+    # resume partial download when server can tell it still has the same file
     temp_file_path = file_path + TEMP_FILE_SUFFIX
+    partial_metadata = get_file_metadata(temp_file_path)
+    partial_validator = _get_resume_validator(partial_metadata)
+    partial_size = 0
+    if partial_validator and partial_metadata.get('url') == file_url and os.path.exists(temp_file_path):
+        partial_size = os.path.getsize(temp_file_path)
+    if partial_size > 0:
+        request.add_header('Range', 'bytes={}-'.format(partial_size))
+        request.add_header('If-Range', partial_validator)
+
+    hash_md5 = hashlib.md5()
+    buffer = bytearray(BUFFER_SIZE)
+    buffer_view = memoryview(buffer)
     try:
-        urllib.request.urlretrieve(file_url, temp_file_path)
-    except urllib.error.URLError:
-        is_file_downloaded = False
+        with urllib.request.urlopen(request) as response:
+            file_mode = "wb"
+            if response.getcode() == 206:
+                # already downloaded part is the only data read back
+                file_mode = "ab"
+                with open(temp_file_path, "rb") as temp_file:
+                    for data_chunk in iter(lambda: temp_file.read(BUFFER_SIZE), b""):
+                        hash_md5.update(data_chunk)
+            else:
+                partial_size = 0
+
+            metadata = {'url': file_url,
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified')}
+            _set_file_metadata(temp_file_path, metadata)
+            # data being received now can be resumed with current response validators
+            partial_validator = _get_resume_validator(metadata)
+
+            content_length = response.headers.get('Content-Length')
+            bytes_total = partial_size + \
+                int(content_length) if content_length else 0
+            bytes_done = partial_size
+            with open(temp_file_path, file_mode) as temp_file:
+                while True:
+                    bytes_read = response.readinto(buffer)
+                    if not bytes_read:
+                        break
+                    hash_md5.update(buffer_view[:bytes_read])
+                    temp_file.write(buffer_view[:bytes_read])
+                    bytes_done += bytes_read
+                    if progress_callback is not None:
+                        progress_callback(bytes_done, bytes_total)
+
+            if bytes_total and bytes_done != bytes_total:
+                # incomplete, kept for resuming
+                return result
+    except urllib.error.HTTPError as error:
+        if error.code == 304:
+            # local copy is up to date
+            metadata['checked'] = time.time()
+            _set_file_metadata(file_path, metadata)
+            result.update(success=True, md5=metadata.get('md5'),
+                          size=os.path.getsize(file_path))
+        elif error.code == 416:
+            # partial download does not fit the file anymore
+            _remove_files(temp_file_path, temp_file_path + METADATA_FILE_SUFFIX)
+        return result
+    except (OSError, http.client.HTTPException):
+        # covers urllib.error.URLError and connection reset as well,
+        # partial download is kept for resuming when it has a validator
+        if not partial_validator:
+            _remove_files(temp_file_path, temp_file_path + METADATA_FILE_SUFFIX)
+        return result
+
+    # verify if another copy already exist and rename downloaded file
+    os.replace(temp_file_path, file_path)
+    _remove_files(temp_file_path + METADATA_FILE_SUFFIX)
+
+    metadata.update(checked=time.time(), md5=hash_md5.hexdigest(), size=bytes_done)
+    _set_file_metadata(file_path, metadata)
+    result.update(success=True, modified=True,
+                  md5=metadata['md5'], size=bytes_done)
 
-    if is_file_downloaded:
-        # verify if another copy already exist
+    return result
+
+
+def _remove_files(*file_paths):
+    for file_path in file_paths:
         if os.path.exists(file_path):
             os.remove(file_path)
 
-        # rename downloaded file
-        os.rename(temp_file_path, file_path)
 
-    return is_file_downloaded
+def get_file_from_web(file_url, file_path, conditional=False, progress_callback=None):
+    """Downloads specified file from provided URL and store in selected location
+        (see download_file).
+
+    Args:
+        file_url  (str): URL of the file to download
+        file_path (str): Path to the resulting file (incl. file name)
+        conditional (bool): Skip download when server reports file not modified
+        progress_callback (function): Called with (bytes_done, bytes_total)
+
+    Returns:
+        bool: True when file was downloaeded (or is up to date), False on error
+    """
+
+    return download_file(file_url, file_path, conditional, progress_callback)['success']
 
 
 def md5(file_path):
@@ -52,9 +210,136 @@ def md5(file_path):
     Returns:
         string: A string containing HEX representation of calculated MD5 hash
     """
+
+    BUFFER_SIZE = 1024 * 1024
+
     hash_md5 = hashlib.md5()
     with open(file_path, "rb") as f:
-        for data_chunk in iter(lambda: f.read(4096), b""):
+        for data_chunk in iter(lambda: f.read(BUFFER_SIZE), b""):
             hash_md5.update(data_chunk)
 
     return hash_md5.hexdigest()
+
+
+class LruCache:
+    """Bounded cache dropping least recently used entries.
+        Cache size is number of entries unless entry size function is given
+        (e.g. len to bound cache of bytes values by their total size).
+    """
+
+    def __init__(self, max_size, get_size=None):
+        """Class initialization
+
+        Args:
+            max_size (int): Maximal size of the cache (number of entries by default)
+            get_size (function): Called with entry value, returns entry size
+                (None means each entry has size 1)
+        """
+
+        self.max_size = max_size
+        self.get_size = get_size
+        self.entries = collections.OrderedDict()
+        # total size of entries (number of entries by default)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Gets cached value marking it as most recently used.
+
+        Args:
+            key (hashable): Entry key
+            default: Value returned when key is not cached
+
+        Returns:
+            Cached value or default when key is not cached
+        """
+
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def put(self, key, value):
+        """Stores value in the cache evicting least recently used
+            entries when cache size is exceeded.
+
+        Args:
+            key (hashable): Entry key
+            value: Value to store
+
+        Returns:
+            None
+        """
+
+        if key in self.entries:
+            self.size -= self._get_entry_size(self.entries[key])
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self.size += self._get_entry_size(value)
+        self._evict()
+
+    def resize(self, max_size):
+        """Changes maximal size of the cache.
+
+        Args:
+            max_size (int): Maximal size of the cache (see __init__)
+
+        Returns:
+            None
+        """
+
+        self.max_size = max_size
+        self._evict()
+
+    def clear(self):
+        """Removes all entries (statistics are kept).
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        self.entries.clear()
+        self.size = 0
+
+    def get_info(self):
+        """Gets cache statistics.
+
+        Args:
+            None
+
+        Returns:
+            dict: Dictionary
+                'hits' -> number of lookups served from the cache
+                'misses' -> number of lookups not found in the cache
+                'evictions' -> number of entries dropped due to size limit
+                'size' -> current size (number of entries by default)
+                'max_size' -> maximal size
+                'entries' -> current number of entries
+        """
+
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': self.size,
+                'max_size': self.max_size,
+                'entries': len(self.entries)}
+
+    def _get_entry_size(self, value):
+        return 1 if self.get_size is None else self.get_size(value)
+
+    def _evict(self):
+        while self.entries and self.size > max(self.max_size, 0):
+            _key, value = self.entries.popitem(last=False)
+            self.size -= self._get_entry_size(value)
+            self.evictions += 1
@@ -0,0 +1,189 @@
+import collections
+import cProfile
+import functools
+import json
+import pstats
+import threading
+import time
+
+
+class Instrumentation:
+    """Class measuring calls of selected object methods.
+        Methods get replaced with measuring wrappers on the object itself
+        (class is not touched) only while instrumentation is in use,
+        so there is no cost at all when it is not.
+        Safe to use from many threads.
+    """
+
+    # latencies kept per method for percentiles (the most recent ones)
+    MAX_SAMPLES = 10000
+
+    def __init__(self):
+        """Class initialization"""
+
+        self.lock = threading.Lock()
+        # key: method name, value: Dictionary of collected data
+        self.records = {}
+        # (object, method name) of replaced methods
+        self.instrumented = []
+
+    def instrument(self, instance, method_name, get_scanned=None, get_returned=None, get_returned_total=None):
+        """Replaces object method with measuring wrapper.
+
+        Args:
+            instance (object): Object which method gets measured
+            method_name (str): Name of the method
+            get_scanned (function): Called with instance before and after the call,
+                returns counter of items scanned (difference is recorded)
+            get_returned (function): Called with (instance, call result),
+                returns number of items returned
+            get_returned_total (function): Called with instance before and after the call,
+                returns counter of items returned (difference is recorded),
+                alternative to get_returned for methods not returning items
+
+        Returns:
+            None
+        """
+
+        method = getattr(instance, method_name)
+        name = '{}.{}'.format(type(instance).__name__, method_name)
+
+        @functools.wraps(method)
+        def measured_method(*args, **kwargs):
+            scanned = -get_scanned(instance) if get_scanned is not None else 0
+            returned = -get_returned_total(instance) if get_returned_total is not None else 0
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+                if get_returned is not None:
+                    returned = get_returned(instance, result)
+                return result
+            finally:
+                latency = time.perf_counter() - start
+                if get_scanned is not None:
+                    scanned += get_scanned(instance)
+                if get_returned_total is not None:
+                    returned += get_returned_total(instance)
+                self._record(name, latency, scanned, returned)
+
+        setattr(instance, method_name, measured_method)
+        self.instrumented.append((instance, method_name))
+
+    def restore(self):
+        """Brings back original methods of all instrumented objects
+            (collected data is kept).
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        for instance, method_name in self.instrumented:
+            # wrapper shadows the class method, removing it is enough
+            delattr(instance, method_name)
+        self.instrumented = []
+
+    def _record(self, name, latency, scanned, returned):
+        with self.lock:
+            record = self.records.get(name)
+            if record is None:
+                record = {'calls': 0,
+                          'total_time': 0.0,
+                          'max_time': 0.0,
+                          'items_scanned': 0,
+                          'items_returned': 0,
+                          'latencies': collections.deque(maxlen=self.MAX_SAMPLES)}
+                self.records[name] = record
+            record['calls'] += 1
+            record['total_time'] += latency
+            record['max_time'] = max(record['max_time'], latency)
+            record['items_scanned'] += scanned
+            record['items_returned'] += returned
+            record['latencies'].append(latency)
+
+    @staticmethod
+    def _get_percentile(sorted_values, percent):
+        # nearest rank method
+        rank = max(1, -(-len(sorted_values) * percent // 100))
+        return sorted_values[int(rank) - 1]
+
+    def get_stats(self):
+        """Gets statistics of measured methods.
+
+        Args:
+            None
+
+        Returns:
+            dict: Dictionary (key, value)
+                key: method name ('Class.method')
+                value: Dictionary (times in seconds)
+                    'calls' -> number of calls
+                    'total_time' -> cumulative time of all calls
+                    'mean_time' -> mean call time
+                    'max_time' -> the longest call time
+                    'p50', 'p95', 'p99' -> percentiles of the recent calls time
+                    'items_scanned' -> number of items (e.g. words) scanned
+                    'items_returned' -> number of items (e.g. words) returned
+        """
+
+        stats = {}
+        with self.lock:
+            for name, record in self.records.items():
+                latencies = sorted(record['latencies'])
+                stats[name] = {'calls': record['calls'],
+                               'total_time': record['total_time'],
+                               'mean_time': record['total_time'] / record['calls'],
+                               'max_time': record['max_time'],
+                               'p50': self._get_percentile(latencies, 50),
+                               'p95': self._get_percentile(latencies, 95),
+                               'p99': self._get_percentile(latencies, 99),
+                               'items_scanned': record['items_scanned'],
+                               'items_returned': record['items_returned']}
+
+        return stats
+
+    def reset(self):
+        """Drops collected data.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        with self.lock:
+            self.records = {}
+
+    def dump_json(self, file_path):
+        """Writes statistics (see get_stats) to JSON file.
+
+        Args:
+            file_path (str): Path to the resulting file
+
+        Returns:
+            None
+        """
+
+        with open(file_path, mode="w", encoding="utf-8") as json_file:
+            json.dump(self.get_stats(), json_file, indent=2, sort_keys=True)
+
+
+def profile_call(function, *args, **kwargs):
+    """Runs single call under cProfile.
+
+    Args:
+        function (function): Profiled function
+        *args: Function positional arguments
+        **kwargs: Function keyword arguments
+
+    Returns:
+        tuple: (function result, pstats.Stats of the call)
+    """
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(function, *args, **kwargs)
+
+    return result, pstats.Stats(profiler)
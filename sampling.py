@@ -0,0 +1,159 @@
+import bisect
+import itertools
+
+
+class AliasTable:
+    """Walker's alias method table (Vose's construction)
+        drawing weighted random indexes in constant time.
+    """
+
+    def __init__(self, weights):
+        """Class initialization
+
+        Args:
+            weights (list): Non-negative weights (at least one positive)
+        """
+
+        count = len(weights)
+        total = float(sum(weights))
+        if count == 0 or total <= 0:
+            raise ValueError('At least one positive weight is required')
+
+        self.probabilities = [0.0] * count
+        self.aliases = list(range(count))
+
+        scaled = [weight * count / total for weight in weights]
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+
+        while small and large:
+            small_index = small.pop()
+            large_index = large.pop()
+            self.probabilities[small_index] = scaled[small_index]
+            self.aliases[small_index] = large_index
+            scaled[large_index] -= 1.0 - scaled[small_index]
+            if scaled[large_index] < 1.0:
+                small.append(large_index)
+            else:
+                large.append(large_index)
+
+        # leftovers are 1.0 up to floating point rounding
+        for index in itertools.chain(small, large):
+            self.probabilities[index] = 1.0
+
+    def sample(self, rng):
+        """Draws a single index.
+
+        Args:
+            rng (random.Random): Random numbers generator
+
+        Returns:
+            int: Index of the drawn weight
+        """
+
+        index = rng.randrange(len(self.probabilities))
+        if rng.random() < self.probabilities[index]:
+            return index
+
+        return self.aliases[index]
+
+
+class WordsSampler:
+    """Class drawing words out of length buckets according to a scheme.
+        Length bucket is drawn with alias table built out of scheme weights
+        and then a word is drawn uniformly out of the bucket,
+        so drawing N words costs O(N) regardless of buckets size.
+    """
+
+    def __init__(self, words_dictionary, generator_scheme):
+        """Class initialization
+
+        Args:
+            words_dictionary (dict): Words buckets by length (not empty)
+            generator_scheme (str): Id of the generator scheme
+                'all' -> every word at most once
+                'rand' -> every word equally probable
+                'equal' -> every word length equally probable
+                'short' -> shorter words lengths more probable
+                'long' -> longer words lengths more probable
+        """
+
+        self.generator_scheme = generator_scheme
+        self.lengths = sorted(length for length,
+                              bucket in words_dictionary.items() if len(bucket) > 0)
+        self.buckets = [words_dictionary[length] for length in self.lengths]
+        if not self.buckets:
+            raise ValueError('No words to sample from')
+
+        sizes = [len(bucket) for bucket in self.buckets]
+        self.offsets = list(itertools.accumulate(sizes))
+
+        # weights of length buckets (by rank of length among available ones)
+        lengths_count = len(self.lengths)
+        if generator_scheme in ('all', 'rand'):
+            weights = sizes
+        elif generator_scheme == 'equal':
+            weights = [1] * lengths_count
+        elif generator_scheme == 'short':
+            weights = list(range(lengths_count, 0, -1))
+        elif generator_scheme == 'long':
+            weights = list(range(1, lengths_count + 1))
+        else:
+            raise ValueError('Unknown generator scheme: ' + generator_scheme)
+
+        self.alias_table = AliasTable(weights)
+
+    def get_words_count(self):
+        """Gets number of words available for sampling.
+
+        Args:
+            None
+
+        Returns:
+            int: Words count
+        """
+
+        return self.offsets[-1]
+
+    def _get_word(self, position):
+        """Gets word at position of all buckets concatenated.
+
+        Args:
+            position (int): Word position
+
+        Returns:
+            str: Word
+        """
+
+        bucket_index = bisect.bisect_right(self.offsets, position)
+        bucket_start = self.offsets[bucket_index - 1] if bucket_index > 0 else 0
+
+        return self.buckets[bucket_index][position - bucket_start]
+
+    def sample(self, words_count, rng):
+        """Draws words.
+
+        Args:
+            words_count (int): Number of words to draw
+                ('all' scheme returns no more than available words count)
+            rng (random.Random): Random numbers generator
+
+        Returns:
+            list: Words drawn
+        """
+
+        if words_count <= 0:
+            return []
+
+        if self.generator_scheme == 'all':
+            # sampling without replacement over positions, words are not touched
+            positions = rng.sample(range(self.get_words_count()),
+                                   min(words_count, self.get_words_count()))
+            return [self._get_word(position) for position in positions]
+
+        words = []
+        for _ in range(words_count):
+            bucket = self.buckets[self.alias_table.sample(rng)]
+            words.append(bucket[rng.randrange(len(bucket))])
+
+        return words
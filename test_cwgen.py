@@ -0,0 +1,256 @@
+import cwgen
+import wordindex
+import wordsbucket
+import json
+import os
+import random
+import tempfile
+import unittest
+import uuid
+
+
+class WordsStatAggregateTest(unittest.TestCase):
+    """Verifies words stat aggregate maintained incrementally on dictionary
+        set changes against full recomputation out of all dictionaries data.
+    """
+
+    DICTIONARIES_COUNT = 5
+    OPERATIONS_COUNT = 60
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.rng = random.Random(0)
+        self.cw_gen = cwgen.CwGen(dictionary_cache_folder=os.path.join(
+            self.temp_dir.name, 'cache'), audio_cache_size=0)
+
+        # small dictionaries sharing words (some repeated within a file)
+        self.files_paths = []
+        # key: file path, value: set of file words
+        self.files_words = {}
+        for index in range(self.DICTIONARIES_COUNT):
+            file_path = os.path.join(
+                self.temp_dir.name, 'dictionary{}.txt'.format(index))
+            with open(file_path, mode="w", encoding="ISO-8859-1") as dictionary:
+                dictionary.write('# comment\n\n/metadata\n')
+                for _ in range(self.rng.randint(0, 200)):
+                    word = ''.join(self.rng.choices(
+                        'teanois14', k=self.rng.randint(1, 6)))
+                    dictionary.write(word + '/X\n')
+                    self.files_words.setdefault(file_path, set()).add(word)
+            self.files_paths.append(file_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def get_words_stat_recomputed(self):
+        words_stat = {}
+        for dictionary in self.cw_gen.dictionary_list:
+            for word_length, words_count in dictionary['stat'].get('words_stat', {}).items():
+                words_stat[word_length] = words_stat.get(
+                    word_length, 0) + words_count
+
+        words_info = {}
+        if words_stat:
+            words_info['words_count'] = sum(words_stat.values())
+            words_info['min_length'] = min(words_stat)
+            words_info['max_length'] = max(words_stat)
+            words_info['words_stat'] = words_stat
+
+        return words_info
+
+    def get_words_stat_filtered_recounted(self, min_length, max_length, letters_set):
+        letters = self.cw_gen.get_letters_sets()[letters_set]['letters']
+        words = set()
+        for dictionary in self.cw_gen.dictionary_list:
+            words.update(self.files_words.get(dictionary['path'], ()))
+
+        words_stat = {}
+        for word in words:
+            if min_length <= len(word) <= max_length and (letters == '*' or set(word) <= set(letters)):
+                words_stat[len(word)] = words_stat.get(len(word), 0) + 1
+
+        words_info = {}
+        if words_stat:
+            words_info['words_count'] = sum(words_stat.values())
+            words_info['min_length'] = min(words_stat)
+            words_info['max_length'] = max(words_stat)
+            words_info['words_stat'] = dict(sorted(words_stat.items()))
+
+        return words_info
+
+    def change_dictionary_set(self):
+        loaded = self.cw_gen.get_dictionaries_info()
+        if loaded and self.rng.random() < 0.4:
+            self.assertTrue(self.cw_gen.remove_dictionary(
+                self.rng.choice(loaded)['uuid']))
+        else:
+            self.cw_gen.add_dictionary(self.rng.choice(self.files_paths))
+
+    def test_random_dictionary_set_changes(self):
+        for operation in range(self.OPERATIONS_COUNT):
+            self.change_dictionary_set()
+
+            with self.subTest(operation=operation):
+                self.assertEqual(self.cw_gen.get_words_stat(),
+                                 self.get_words_stat_recomputed())
+
+    def test_filtered_stat_random_dictionary_set_changes(self):
+        for operation in range(self.OPERATIONS_COUNT):
+            self.change_dictionary_set()
+
+            min_length = self.rng.randint(1, 6)
+            max_length = self.rng.randint(min_length, 6)
+            for letters_set in self.cw_gen.get_letters_sets():
+                with self.subTest(operation=operation, letters_set=letters_set):
+                    self.assertEqual(self.cw_gen.get_words_stat_filtered(min_length, max_length, letters_set, 'rand'),
+                                     self.get_words_stat_filtered_recounted(min_length, max_length, letters_set))
+
+    def test_all_dictionaries_removed(self):
+        for file_path in self.files_paths:
+            self.cw_gen.add_dictionary(file_path)
+        for dictionary_info in self.cw_gen.get_dictionaries_info():
+            self.cw_gen.remove_dictionary(dictionary_info['uuid'])
+
+        self.assertEqual(self.cw_gen.get_words_stat(), {})
+
+    def test_returned_stat_is_a_copy(self):
+        self.cw_gen.add_dictionary(self.files_paths[0])
+        words_info = self.cw_gen.get_words_stat()
+        words_info.get('words_stat', {}).clear()
+
+        self.assertEqual(self.cw_gen.get_words_stat(),
+                         self.get_words_stat_recomputed())
+
+    def test_returned_dictionaries_stat_is_a_copy(self):
+        self.cw_gen.add_dictionary(self.files_paths[0])
+        dictionary_info = self.cw_gen.get_dictionaries_info()[0]
+        words_info = self.cw_gen.get_words_stat()
+        dictionary_info['stat'].get('words_stat', {}).clear()
+        dictionary_info['stat'].clear()
+        self.cw_gen.remove_dictionary(dictionary_info['uuid'])
+        self.cw_gen.add_dictionary(self.files_paths[0])
+
+        self.assertEqual(self.cw_gen.get_words_stat(), words_info)
+        self.assertEqual(self.cw_gen.get_words_stat(),
+                         self.get_words_stat_recomputed())
+
+
+class WordIndexTest(unittest.TestCase):
+    """Verifies words index (distinct words, dictionaries counts, lookup
+        and matching words counts) against words of dictionaries kept
+        in plain sets while dictionaries are added and removed at random.
+    """
+
+    OPERATIONS_COUNT = 400
+    LETTERS = 'abcde'
+    REJECTED_MASKS = (0, cwgen.get_word_mask('bd'), cwgen.get_word_mask('a'))
+
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.word_index = wordindex.WordIndex(self.REJECTED_MASKS)
+        # key: dictionary UUID, value: set of dictionary words
+        self.dictionaries = {}
+
+    def generate_dictionary(self):
+        words_dictionary = {}
+        for _ in range(self.rng.randint(0, 120)):
+            word = ''.join(self.rng.choices(
+                self.LETTERS, k=self.rng.randint(1, 3)))
+            bucket = words_dictionary.setdefault(
+                len(word), wordsbucket.WordsBucket(len(word)))
+            bucket.append(word, cwgen.get_word_mask(word))
+
+        return words_dictionary
+
+    def assert_index_consistent(self):
+        word_dictionaries = {}
+        for dictionary_uuid, words in self.dictionaries.items():
+            for word in words:
+                word_dictionaries.setdefault(word, set()).add(dictionary_uuid)
+
+        indexed_words = [word for key in self.word_index.get_words_counts()
+                         for word in self.word_index.select(key, 0)]
+        self.assertCountEqual(indexed_words, word_dictionaries)
+        for word, dictionaries in word_dictionaries.items():
+            self.assertCountEqual(
+                self.word_index.get_word_dictionaries(word), dictionaries)
+
+        for mask_index, rejected_mask in enumerate(self.REJECTED_MASKS):
+            matching_counts = {}
+            for word in word_dictionaries:
+                if not cwgen.get_word_mask(word) & rejected_mask:
+                    matching_counts[len(word)] = matching_counts.get(
+                        len(word), 0) + 1
+            self.assertEqual(self.word_index.get_matching_counts(
+                mask_index), matching_counts)
+
+    def test_random_dictionary_set_changes(self):
+        for operation in range(self.OPERATIONS_COUNT):
+            # slightly more removals so the index shrinks (and compacts) too
+            if self.dictionaries and self.rng.random() < 0.52:
+                dictionary_uuid = self.rng.choice(list(self.dictionaries))
+                del self.dictionaries[dictionary_uuid]
+                self.assertTrue(self.word_index.remove(dictionary_uuid))
+            else:
+                dictionary_uuid = uuid.uuid4()
+                words_dictionary = self.generate_dictionary()
+                self.dictionaries[dictionary_uuid] = set(
+                    word for bucket in words_dictionary.values() for word in bucket)
+                self.word_index.add(dictionary_uuid, words_dictionary)
+
+            with self.subTest(operation=operation):
+                self.assert_index_consistent()
+
+    def test_removed_dictionary_is_not_indexed(self):
+        self.assertFalse(self.word_index.remove(uuid.uuid4()))
+        self.assertEqual(self.word_index.get_word_dictionaries('abc'), [])
+
+
+class JobFileTest(unittest.TestCase):
+    """Verifies invalid batch job files are rejected with ValueError."""
+
+    LETTERS_SETS = ('all', 'cwo1')
+    GENERATOR_SCHEMES = ('rand', 'all')
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, 'job.json')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def read_job_file(self, job_data):
+        with open(self.file_path, mode="w", encoding="utf-8") as job_file:
+            json.dump(job_data, job_file)
+
+        return cwgen.read_job_file(self.file_path, self.LETTERS_SETS, self.GENERATOR_SCHEMES)
+
+    def test_valid_job(self):
+        job_file = self.read_job_file({'dictionaries': ['words.txt'],
+                                       'defaults': {'min_length': 2},
+                                       'jobs': [{'name': 'first', 'letters_set': 'cwo1', 'seed': 1}]})
+
+        self.assertEqual(job_file['jobs'][0]['min_length'], 2)
+        self.assertEqual(job_file['jobs'][0]['letters_set'], 'cwo1')
+
+    def test_invalid_jobs(self):
+        invalid_jobs = [{'min_length': 'x'}, {'min_length': 0}, {'words_count': 2.5},
+                        {'min_length': 5, 'max_length': 2}, {'wpm': True},
+                        {'letters_set': 'cwo9'}, {'letters_set': 1},
+                        {'generator_scheme': 'short'}, {'audio': 'no'},
+                        {'seed': [1]}, {'name': '../job'}, 3]
+        for job_spec in invalid_jobs:
+            with self.subTest(job_spec=job_spec):
+                with self.assertRaises(ValueError):
+                    self.read_job_file({'jobs': [job_spec]})
+
+    def test_invalid_file_structure(self):
+        for job_data in ([], {'jobs': {}}, {'dictionaries': 'words.txt'},
+                         {'defaults': []}, {'jobs': [{'name': 'a'}, {'name': 'a'}]}):
+            with self.subTest(job_data=job_data):
+                with self.assertRaises(ValueError):
+                    self.read_job_file(job_data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,477 @@
+import wordsbucket
+import array
+import bisect
+import zlib
+
+
+POSITIONS_TYPECODE = 'I'
+# lookup table slots hold word position or EMPTY_SLOT
+SLOTS_TYPECODE = 'i'
+EMPTY_SLOT = -1
+MIN_SLOTS_COUNT = 8
+
+
+def get_matching_counts(masks, rejected_masks):
+    """Counts words matching each of rejected masks
+        (word matches when it has none of mask characters).
+
+    Args:
+        masks (sequence): Characters masks (int) of words
+        rejected_masks (sequence): Characters masks (int) to count matching words for
+
+    Returns:
+        list: Number of matching words per rejected mask
+    """
+
+    return [sum(1 for mask in masks if not mask & rejected_mask) for rejected_mask in rejected_masks]
+
+
+class WordIndex:
+    """Class holding distinct words of all loaded dictionaries.
+        Each word is stored once per length bucket along with the number of
+        dictionaries containing it. Every dictionary keeps sorted positions
+        of its words in the index buckets, which tells what dictionaries
+        contain a word and what to release when dictionary gets removed.
+        Words are found by an open addressing lookup table of positions
+        (hashed with CRC32 of encoded word), so adding or removing
+        a dictionary costs as much as its own words, regardless of the index
+        size. Position of removed word becomes a hole reused by words added
+        later, bucket is compacted only when holes take most of it.
+        Buckets may be keyed by anything hashable (e.g. phrases are keyed
+        by characters and words count), words length is the default key.
+        Optionally distinct words matching each of given rejected masks are
+        counted per bucket as words enter and leave the index, so filtered
+        words counts are available without touching words.
+    """
+
+    def __init__(self, rejected_masks=()):
+        """Class initialization
+
+        Args:
+            rejected_masks (sequence): Characters masks (int) of filters to count
+                matching words for, word matches when it has none of mask characters
+        """
+
+        # key: bucket key (word length), value: WordsBucket of distinct words (holes included)
+        self.buckets = {}
+        # key: bucket key (word length), value: array of dictionaries count containing each word (0 for holes)
+        self.refcounts = {}
+        # key: bucket key (word length), value: array of positions of removed words
+        self.holes = {}
+        # key: bucket key (word length), value: lookup table (array of positions, power of 2 size)
+        self.tables = {}
+        # key: dictionary UUID, value: Dictionary {key: bucket key, value: array of sorted positions}
+        self.positions = {}
+        self.rejected_masks = list(rejected_masks)
+        # key: bucket key (word length), value: array of distinct words count matching each rejected mask
+        self.counts = {}
+
+    def _find(self, key, word_data):
+        """Looks word up in the bucket lookup table.
+
+        Args:
+            key (hashable): Bucket key (word length)
+            word_data (bytes): Encoded word
+
+        Returns:
+            tuple: (table slot, word position or EMPTY_SLOT when word is not indexed)
+        """
+
+        table = self.tables[key]
+        slots_mask = len(table) - 1
+        data = self.buckets[key].data
+        word_length = len(word_data)
+
+        slot = zlib.crc32(word_data) & slots_mask
+        while True:
+            position = table[slot]
+            if position == EMPTY_SLOT:
+                return slot, EMPTY_SLOT
+            start = position * word_length
+            if data[start:start + word_length] == word_data:
+                return slot, position
+            slot = (slot + 1) & slots_mask
+
+    def _rebuild_table(self, key, words_count=0):
+        """Builds bucket lookup table from scratch sized for twice
+            the number of words (holes are not looked up).
+
+        Args:
+            key (hashable): Bucket key (word length)
+            words_count (int): Number of words the table should fit
+                (when more than words already in the bucket)
+
+        Returns:
+            None
+        """
+
+        bucket = self.buckets[key]
+        # words being added are not counted yet, so holes tell what is not indexed
+        holes = set(self.holes[key])
+        slots_count = MIN_SLOTS_COUNT
+        while slots_count < 2 * max(words_count, len(bucket) - len(holes)):
+            slots_count *= 2
+
+        table = array.array(SLOTS_TYPECODE, [EMPTY_SLOT]) * slots_count
+        slots_mask = slots_count - 1
+        for position, word_data in enumerate(bucket.iter_encoded()):
+            if position not in holes:
+                slot = zlib.crc32(word_data) & slots_mask
+                while table[slot] != EMPTY_SLOT:
+                    slot = (slot + 1) & slots_mask
+                table[slot] = position
+        self.tables[key] = table
+
+    def _remove_slot(self, key, slot):
+        """Removes table entry moving back entries of the same probe
+            sequence (no deleted markers needed for linear probing).
+
+        Args:
+            key (hashable): Bucket key (word length)
+            slot (int): Table slot to free
+
+        Returns:
+            None
+        """
+
+        table = self.tables[key]
+        slots_mask = len(table) - 1
+        data = self.buckets[key].data
+        word_length = self.buckets[key].word_length
+
+        next_slot = slot
+        while True:
+            next_slot = (next_slot + 1) & slots_mask
+            position = table[next_slot]
+            if position == EMPTY_SLOT:
+                break
+            start = position * word_length
+            home_slot = zlib.crc32(data[start:start + word_length]) & slots_mask
+            # entry stays when its home slot lies cyclically in (slot, next_slot]
+            if (home_slot - slot - 1) & slots_mask < (next_slot - slot) & slots_mask:
+                continue
+            table[slot] = position
+            slot = next_slot
+        table[slot] = EMPTY_SLOT
+
+    def add(self, dictionary_uuid, words_dictionary, matching_counts=None):
+        """Adds dictionary words to the index
+            (index keeps its own copy, dictionary data is not referenced).
+
+        Args:
+            dictionary_uuid (UUID): Dictionary identifier
+            words_dictionary (dict): Words buckets by key (word length)
+            matching_counts (dict): Precomputed dictionary words count matching
+                each rejected mask by key (word length), used for buckets
+                which words are all new to the index (counted otherwise)
+
+        Returns:
+            None
+        """
+
+        dictionary_positions = {}
+
+        for key, bucket in words_dictionary.items():
+            if key not in self.buckets:
+                self.buckets[key] = wordsbucket.WordsBucket(bucket.word_length)
+                self.refcounts[key] = array.array(POSITIONS_TYPECODE)
+                self.holes[key] = array.array(POSITIONS_TYPECODE)
+                self._rebuild_table(key)
+            index_bucket = self.buckets[key]
+            refcounts = self.refcounts[key]
+            holes = self.holes[key]
+
+            positions = array.array(POSITIONS_TYPECODE)
+            new_masks = array.array(index_bucket.masks.typecode)
+            words_count = len(index_bucket) - len(holes)
+            # table is grown once for all words of the dictionary being new
+            if 2 * (words_count + len(bucket)) > len(self.tables[key]):
+                self._rebuild_table(key, words_count + len(bucket))
+            # lookup of _find() inlined, it is run for every word of the dictionary
+            table = self.tables[key]
+            slots_mask = len(table) - 1
+            index_data = index_bucket.data
+            word_length = bucket.word_length
+            data = bytes(bucket.data)
+            for start, mask in zip(range(0, len(data), word_length), bucket.masks):
+                word_data = data[start:start + word_length]
+                slot = zlib.crc32(word_data) & slots_mask
+                position = table[slot]
+                while position != EMPTY_SLOT:
+                    index_start = position * word_length
+                    if index_data[index_start:index_start + word_length] == word_data:
+                        break
+                    slot = (slot + 1) & slots_mask
+                    position = table[slot]
+                if position == EMPTY_SLOT:
+                    # new word (counted below) takes a hole or goes to the bucket end
+                    if holes:
+                        position = holes.pop()
+                        index_bucket.replace_encoded(position, word_data, mask)
+                    else:
+                        position = len(index_bucket)
+                        index_bucket.append_encoded(word_data, mask)
+                        refcounts.append(0)
+                    table[slot] = position
+                    new_masks.append(mask)
+                    words_count += 1
+                    if 2 * words_count > len(table):
+                        self._rebuild_table(key)
+                        table = self.tables[key]
+                        slots_mask = len(table) - 1
+                positions.append(position)
+
+            # words repeated in a dictionary are counted once
+            positions = array.array(POSITIONS_TYPECODE, sorted(set(positions)))
+            for position in positions:
+                refcounts[position] += 1
+            dictionary_positions[key] = positions
+
+            if matching_counts is not None and key in matching_counts and len(new_masks) == len(bucket):
+                self._add_counts(key, matching_counts[key])
+            else:
+                self._update_counts(key, new_masks, 1)
+
+        self.positions[dictionary_uuid] = dictionary_positions
+
+    def remove(self, dictionary_uuid):
+        """Removes dictionary words from the index.
+            Words no longer contained in any dictionary are dropped.
+
+        Args:
+            dictionary_uuid (UUID): Dictionary identifier
+
+        Returns:
+            bool: True when dictionary was indexed, False otherwise
+        """
+
+        dictionary_positions = self.positions.pop(dictionary_uuid, None)
+        if dictionary_positions is None:
+            return False
+
+        for key, positions in dictionary_positions.items():
+            index_bucket = self.buckets[key]
+            refcounts = self.refcounts[key]
+            holes = self.holes[key]
+
+            dropped_positions = []
+            for position in positions:
+                refcounts[position] -= 1
+                if not refcounts[position]:
+                    dropped_positions.append(position)
+            self._update_counts(key, [index_bucket.masks[position]
+                                      for position in dropped_positions], -1)
+
+            if len(dropped_positions) == len(index_bucket) - len(holes):
+                for index_data in (self.buckets, self.refcounts, self.holes, self.tables, self.counts):
+                    index_data.pop(key, None)
+                continue
+
+            holes.extend(dropped_positions)
+            if 2 * len(holes) > len(index_bucket):
+                self._compact(key)
+                continue
+            if 4 * len(dropped_positions) > len(index_bucket):
+                # rebuilding table is cheaper than removing many slots one by one
+                self._rebuild_table(key)
+                continue
+
+            # word slot is found comparing positions only (no words compared)
+            table = self.tables[key]
+            slots_mask = len(table) - 1
+            word_length = index_bucket.word_length
+            for position in dropped_positions:
+                start = position * word_length
+                slot = zlib.crc32(index_bucket.data[start:start + word_length]) & slots_mask
+                while table[slot] != position:
+                    slot = (slot + 1) & slots_mask
+                self._remove_slot(key, slot)
+
+        return True
+
+    def _compact(self, key):
+        """Drops holes of the bucket updating positions of all dictionaries.
+            Cost depends on the bucket size, so it is done only when holes
+            take most of the bucket.
+
+        Args:
+            key (hashable): Bucket key (word length)
+
+        Returns:
+            None
+        """
+
+        refcounts = self.refcounts[key]
+        remap = array.array(POSITIONS_TYPECODE, [0]) * len(refcounts)
+        new_position = 0
+        for position, refcount in enumerate(refcounts):
+            if refcount:
+                remap[position] = new_position
+                new_position += 1
+
+        self.buckets[key] = self.buckets[key].select(refcounts)
+        self.refcounts[key] = array.array(
+            POSITIONS_TYPECODE, (refcount for refcount in refcounts if refcount))
+        self.holes[key] = array.array(POSITIONS_TYPECODE)
+        self._rebuild_table(key)
+        # remapping keeps positions sorted
+        for dictionary_positions in self.positions.values():
+            if key in dictionary_positions:
+                dictionary_positions[key] = array.array(
+                    POSITIONS_TYPECODE, (remap[position] for position in dictionary_positions[key]))
+
+    def select(self, key, rejected_mask):
+        """Creates a new bucket of indexed words having none of rejected characters.
+
+        Args:
+            key (hashable): Bucket key (word length)
+            rejected_mask (int): Characters mask (0 selects all words)
+
+        Returns:
+            WordsBucket: Selected words (holes skipped)
+        """
+
+        bucket = self.buckets[key]
+        if self.holes[key]:
+            return bucket.select(refcount and not mask & rejected_mask
+                                 for mask, refcount in zip(bucket.masks, self.refcounts[key]))
+        if not rejected_mask:
+            return wordsbucket.WordsBucket(bucket.word_length, bytearray(bucket.data),
+                                           array.array(bucket.masks.typecode, bucket.masks))
+
+        # single AND-compare on precomputed characters masks
+        return bucket.select(not mask & rejected_mask for mask in bucket.masks)
+
+    def _update_counts(self, key, masks, multiplier):
+        """Adds (or subtracts) words to the counts of matching words.
+
+        Args:
+            key (hashable): Bucket key (word length)
+            masks (sequence): Characters masks of words added (dropped)
+            multiplier (int): 1 when words were added, -1 when dropped
+
+        Returns:
+            None
+        """
+
+        if not self.rejected_masks or not masks:
+            return
+
+        self._add_counts(key, [multiplier * count for count in get_matching_counts(
+            masks, self.rejected_masks)])
+
+    def _add_counts(self, key, matching_counts):
+        """Adds words counts matching each rejected mask.
+
+        Args:
+            key (hashable): Bucket key (word length)
+            matching_counts (sequence): Words count (int) per rejected mask
+
+        Returns:
+            None
+        """
+
+        if not self.rejected_masks:
+            return
+
+        counts = self.counts.setdefault(key, array.array(
+            POSITIONS_TYPECODE, [0]) * len(self.rejected_masks))
+        for index, words_count in enumerate(matching_counts):
+            counts[index] += words_count
+
+    def get_matching_counts(self, mask_index):
+        """Gets distinct words count per bucket matching given rejected mask.
+
+        Args:
+            mask_index (int): Index of the mask in rejected_masks
+
+        Returns:
+            dict: Dictionary (key, value)
+                key: bucket key (word length)
+                value: number of matching words (buckets without matching words are skipped)
+        """
+
+        return {key: counts[mask_index] for key, counts in self.counts.items() if counts[mask_index]}
+
+    def get_word_dictionaries(self, word, key=None):
+        """Gets UUIDs of dictionaries containing the word.
+
+        Args:
+            word (str): Word to look for
+            key (hashable): Key of the bucket holding the word (None for word length)
+
+        Returns:
+            list: UUIDs of dictionaries (empty when word is not indexed)
+        """
+
+        if key is None:
+            key = len(word)
+        if key not in self.buckets:
+            return []
+
+        try:
+            word_data = word.encode(wordsbucket.ENCODING)
+        except UnicodeEncodeError:
+            return []
+        if len(word_data) != self.buckets[key].word_length:
+            return []
+        _slot, position = self._find(key, word_data)
+        if position == EMPTY_SLOT:
+            return []
+
+        dictionaries = []
+        for dictionary_uuid, dictionary_positions in self.positions.items():
+            positions = dictionary_positions.get(key)
+            if positions is not None:
+                found = bisect.bisect_left(positions, position)
+                if found < len(positions) and positions[found] == position:
+                    dictionaries.append(dictionary_uuid)
+
+        return dictionaries
+
+    def get_words_counts(self):
+        """Gets number of distinct words per bucket.
+
+        Args:
+            None
+
+        Returns:
+            dict: Dictionary (key, value)
+                key: bucket key (word length)
+                value: number of distinct words
+        """
+
+        return {key: len(bucket) - len(self.holes[key]) for key, bucket in self.buckets.items()}
+
+    def get_size(self):
+        """Gets memory taken by the index arrays (words data, characters masks,
+            dictionaries counts, holes, lookup tables and dictionaries positions).
+
+        Args:
+            None
+
+        Returns:
+            int: Size in bytes
+        """
+
+        arrays = [bucket.data for bucket in self.buckets.values()]
+        arrays += [bucket.masks for bucket in self.buckets.values()]
+        for index_data in (self.refcounts, self.holes, self.tables, self.counts):
+            arrays += index_data.values()
+        for dictionary_positions in self.positions.values():
+            arrays += dictionary_positions.values()
+
+        return sum(len(data) * data.itemsize if isinstance(data, array.array) else len(data)
+                   for data in arrays)
+
+    def get_words_count(self):
+        """Gets number of distinct words in the index.
+
+        Args:
+            None
+
+        Returns:
+            int: Distinct words count
+        """
+
+        return sum(self.get_words_counts().values())
@@ -0,0 +1,173 @@
+import array
+import collections.abc
+import itertools
+
+
+# words are stored in the same single byte encoding dictionaries are read with
+ENCODING = 'ISO-8859-1'
+MASKS_TYPECODE = 'Q'
+
+
+class WordsBucket(collections.abc.Sequence):
+    """Words of the same length stored back to back in a single buffer
+        (fixed stride equal to word length) along with their characters masks.
+        Works as a read-only sequence of str, extended only with append / extend.
+    """
+
+    def __init__(self, word_length, data=None, masks=None):
+        """Class initialization
+
+        Args:
+            word_length (int): Length of all words in the bucket (> 0)
+            data (bytes): Words encoded with ENCODING stored back to back
+            masks (array): Characters masks of the words (same order)
+        """
+
+        self.word_length = word_length
+        self.data = bytearray() if data is None else data
+        self.masks = array.array(
+            MASKS_TYPECODE) if masks is None else masks
+
+        if len(self.data) != len(self.masks) * word_length:
+            raise ValueError('Words data does not match masks count')
+
+    def __len__(self):
+        return len(self.masks)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('WordsBucket index out of range')
+        start = index * self.word_length
+
+        return self.data[start:start + self.word_length].decode(ENCODING)
+
+    def __iter__(self):
+        # decoding whole buffer at once is much faster than word by word
+        words = self.data.decode(ENCODING)
+        for start in range(0, len(words), self.word_length):
+            yield words[start:start + self.word_length]
+
+    def __eq__(self, other):
+        if isinstance(other, WordsBucket):
+            return self.word_length == other.word_length and \
+                self.data == other.data and self.masks == other.masks
+        if isinstance(other, collections.abc.Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __contains__(self, word):
+        # search encoded data (position must be aligned to word start)
+        try:
+            word_data = word.encode(ENCODING)
+        except (AttributeError, UnicodeEncodeError):
+            return False
+        if len(word_data) != self.word_length:
+            return False
+        start = self.data.find(word_data)
+        while start >= 0:
+            if start % self.word_length == 0:
+                return True
+            start = self.data.find(word_data, start + 1)
+
+        return False
+
+    def __repr__(self):
+        return 'WordsBucket(word_length={}, words={})'.format(self.word_length, len(self))
+
+    def append(self, word, mask):
+        """Appends a word to the bucket.
+
+        Args:
+            word (str): Word of the bucket length
+            mask (int): Word characters mask
+
+        Returns:
+            None
+        """
+
+        self.data += word.encode(ENCODING)
+        self.masks.append(mask)
+
+    def extend(self, bucket):
+        """Appends all words of another bucket.
+
+        Args:
+            bucket (WordsBucket): Bucket with words of the same length
+
+        Returns:
+            None
+        """
+
+        self.data += bucket.data
+        self.masks.extend(bucket.masks)
+
+    def append_encoded(self, word_data, mask):
+        """Appends already encoded word to the bucket.
+
+        Args:
+            word_data (bytes): Word of the bucket length encoded with ENCODING
+            mask (int): Word characters mask
+
+        Returns:
+            None
+        """
+
+        self.data += word_data
+        self.masks.append(mask)
+
+    def replace_encoded(self, index, word_data, mask):
+        """Replaces a word with already encoded one.
+
+        Args:
+            index (int): Position of the replaced word
+            word_data (bytes): Word of the bucket length encoded with ENCODING
+            mask (int): Word characters mask
+
+        Returns:
+            None
+        """
+
+        start = index * self.word_length
+        self.data[start:start + self.word_length] = word_data
+        self.masks[index] = mask
+
+    def iter_encoded(self):
+        """Iterates over words without decoding them.
+
+        Args:
+            None
+
+        Returns:
+            generator: memoryview of each word
+        """
+
+        data = memoryview(self.data)
+        for start in range(0, len(data), self.word_length):
+            yield data[start:start + self.word_length]
+
+    def select(self, selectors):
+        """Creates a new bucket containing words for which selector is true.
+
+        Args:
+            selectors (iterable): Values evaluated as bool, one per word
+
+        Returns:
+            WordsBucket: Selected words
+        """
+
+        # slicing selected words only is cheap as usually few words match
+        word_length = self.word_length
+        selected = list(itertools.compress(range(len(self)), selectors))
+        data = bytearray().join([self.data[index * word_length:(index + 1) * word_length]
+                                 for index in selected])
+        masks = array.array(MASKS_TYPECODE, [self.masks[index]
+                                             for index in selected])
+
+        return WordsBucket(self.word_length, data, masks)